@@ -0,0 +1,553 @@
+import os
+import re
+import sys
+import json
+import time
+import queue
+import fnmatch
+import argparse
+import threading
+import urllib.request
+from collections import Counter, namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from collector import METRICS, MetricsCollector, get_collector, snapshot_series
+
+# Rules and sinks are read from this file when it exists, otherwise the
+# built-in DEFAULT_CONFIG below is used. Same layout as DEFAULT_CONFIG.
+CONFIG_PATH = os.path.join(os.path.expanduser('~'), '.system_dashboard', 'alerts.json')
+LOG_PATH = os.path.join(os.path.expanduser('~'), '.system_dashboard', 'alerts.log')
+
+RULE_TYPES = ('threshold', 'sustained', 'rate')
+
+# Lowest first; None means no alert is firing
+SEVERITIES = ('warning', 'critical')
+SEVERITY_COLORS = {
+    None: '#00FF9D',  # Neon green
+    'warning': '#FFD700',  # Gold
+    'critical': '#FF4444',  # Bright red
+}
+
+# First component of a series name -> metric group that produces it
+SERIES_GROUPS = {'cpu': 'cpu', 'memory': 'memory', 'swap': 'memory', 'disk': 'disk', 'mount': 'disk',
+                 'gpu': 'gpu', 'net': 'net', 'cgroup': 'cgroup',
+                 'pressure': 'pressure', 'vm': 'pressure'}
+
+# threshold: fires as soon as the reading crosses "above" (or "below")
+# sustained: the reading has to stay past it for "for" seconds first
+# rate:      the per-second change of the reading, smoothed over "window"
+#            seconds, is compared instead of the reading itself
+# Every rule resolves only once the reading is back past "clear", so a value
+# hovering around the threshold does not fire over and over.
+DEFAULT_CONFIG = {
+    'rules': [
+        {'name': 'cpu-busy', 'series': 'cpu.percent', 'type': 'threshold',
+         'above': 60, 'clear': 55, 'severity': 'warning'},
+        {'name': 'cpu-saturated', 'series': 'cpu.percent', 'type': 'sustained',
+         'above': 80, 'clear': 75, 'for': 10, 'severity': 'critical'},
+        {'name': 'core-pegged', 'series': 'cpu.core.*', 'type': 'sustained',
+         'above': 98, 'clear': 90, 'for': 60, 'severity': 'warning'},
+        {'name': 'memory-busy', 'series': 'memory.percent', 'type': 'threshold',
+         'above': 60, 'clear': 55, 'severity': 'warning'},
+        {'name': 'memory-full', 'series': 'memory.percent', 'type': 'sustained',
+         'above': 80, 'clear': 75, 'for': 10, 'severity': 'critical'},
+        {'name': 'memory-climbing', 'series': 'memory.percent', 'type': 'rate',
+         'above': 0.5, 'clear': 0.1, 'window': 30, 'severity': 'warning'},
+        {'name': 'swap-busy', 'series': 'swap.percent', 'type': 'sustained',
+         'above': 50, 'clear': 40, 'for': 30, 'severity': 'warning'},
+        {'name': 'disk-busy', 'series': 'disk.percent', 'type': 'threshold',
+         'above': 60, 'clear': 58, 'severity': 'warning'},
+        {'name': 'disk-full', 'series': 'disk.percent', 'type': 'threshold',
+         'above': 80, 'clear': 78, 'severity': 'critical'},
+        {'name': 'mount-full', 'series': 'mount.*.percent', 'type': 'threshold',
+         'above': 90, 'clear': 88, 'severity': 'critical'},
+        {'name': 'disk-slow', 'series': 'disk.*.latency_ms', 'type': 'sustained',
+         'above': 50, 'clear': 20, 'for': 30, 'severity': 'warning'},
+        {'name': 'gpu-busy', 'series': 'gpu.percent', 'type': 'threshold',
+         'above': 60, 'clear': 55, 'severity': 'warning'},
+        {'name': 'gpu-saturated', 'series': 'gpu.percent', 'type': 'sustained',
+         'above': 80, 'clear': 75, 'for': 10, 'severity': 'critical'},
+        {'name': 'gpu-hot', 'series': 'gpu.*.temperature', 'type': 'sustained',
+         'above': 85, 'clear': 80, 'for': 10, 'severity': 'critical'},
+        {'name': 'link-busy', 'series': 'net.link_percent', 'type': 'threshold',
+         'above': 60, 'clear': 55, 'severity': 'warning'},
+        {'name': 'link-saturated', 'series': 'net.link_percent', 'type': 'sustained',
+         'above': 80, 'clear': 75, 'for': 10, 'severity': 'critical'},
+        {'name': 'nic-errors', 'series': 'net.*.errin', 'type': 'sustained',
+         'above': 1, 'clear': 0, 'for': 10, 'severity': 'warning'},
+    ],
+    'sinks': {
+        # Every transition is appended to the log; the banner and the
+        # webhook only hear about alerts of at least their severity
+        'log': LOG_PATH,
+        'banner': 'critical',
+        'webhook': None,
+        'webhook_severity': 'warning',
+        # Off: rules are checked against whatever the open windows sample,
+        # so alerting costs nothing extra. On: the groups the rules use are
+        # sampled for them all the time, even with no window open on them.
+        'background': False,
+    },
+}
+
+Rule = namedtuple('Rule', ['name', 'series', 'type', 'above', 'below', 'clear', 'hold', 'window',
+                           'severity', 'groups'])
+
+# state is 'firing' or 'resolved'; value is the reading (a per-second change
+# for rate rules) that caused the transition
+Alert = namedtuple('Alert', ['timestamp', 'state', 'rule', 'severity', 'series', 'value', 'message'])
+
+
+def series_groups(pattern):
+    # Metric groups a series pattern needs sampled
+    head = pattern.split('.', 1)[0]
+    if head in SERIES_GROUPS:
+        return frozenset((SERIES_GROUPS[head],))
+    return frozenset(group for prefix, group in SERIES_GROUPS.items() if fnmatch.fnmatchcase(prefix, head))
+
+
+def parse_rule(spec):
+    # Validates one rule dict from the config and returns a Rule
+    name = spec.get('name')
+    if not name or not spec.get('series'):
+        raise ValueError(f"alert rule {spec!r} needs a name and a series")
+    kind = spec.get('type', 'threshold')
+    if kind not in RULE_TYPES:
+        raise ValueError(f"alert rule {name}: unknown type {kind!r}")
+    severity = spec.get('severity', 'warning')
+    if severity not in SEVERITIES:
+        raise ValueError(f"alert rule {name}: unknown severity {severity!r}")
+    if ('above' in spec) == ('below' in spec):
+        raise ValueError(f"alert rule {name}: needs exactly one of above or below")
+
+    above = spec.get('above')
+    below = spec.get('below')
+    trigger = float(above if above is not None else below)
+    clear = float(spec.get('clear', trigger))
+    if (above is not None and clear > trigger) or (below is not None and clear < trigger):
+        raise ValueError(f"alert rule {name}: clear must be on the quiet side of the threshold")
+    hold = float(spec.get('for', 0))
+    if kind == 'sustained' and hold <= 0:
+        raise ValueError(f"alert rule {name}: sustained rules need a positive 'for'")
+    window = float(spec.get('window', 10))
+    if window <= 0:
+        raise ValueError(f"alert rule {name}: window must be positive")
+
+    groups = series_groups(spec['series'])
+    if not groups:
+        raise ValueError(f"alert rule {name}: series {spec['series']!r} matches no metric group")
+    return Rule(name, spec['series'], kind, above, below, clear, hold, window, severity, groups)
+
+
+def load_config(path=CONFIG_PATH):
+    # (rules, sinks config); raises ValueError on a malformed file
+    config = DEFAULT_CONFIG
+    if path is not None and os.path.exists(path):
+        with open(path) as f:
+            try:
+                config = json.load(f)
+            except ValueError as e:
+                raise ValueError(f"{path}: {e}")
+    rules = [parse_rule(spec) for spec in config.get('rules', ())]
+    duplicates = [name for name, count in Counter(rule.name for rule in rules).items() if count > 1]
+    if duplicates:
+        raise ValueError(f"duplicate alert rules: {', '.join(sorted(duplicates))}")
+    sinks = dict(DEFAULT_CONFIG['sinks'])
+    sinks.update(config.get('sinks', {}))
+    return rules, sinks
+
+
+def describe(rule, series, value, state):
+    unit = '/s' if rule.type == 'rate' else ''
+    reading = f"{series} {'changing ' if rule.type == 'rate' else 'at '}{value:.4g}{unit}"
+    if state == 'resolved':
+        return f"{rule.name}: {reading}, back past {rule.clear:g}{unit}"
+    direction = 'above' if rule.above is not None else 'below'
+    limit = rule.above if rule.above is not None else rule.below
+    held = f" for {rule.hold:g}s" if rule.hold else ""
+    return f"{rule.name}: {reading}, {direction} {limit:g}{unit}{held}"
+
+
+class AlertEngine:
+    def __init__(self, rules, sinks=()):
+        # Rules are matched against each series name once, the first time
+        # the series is seen. Every (rule, series) pair becomes a row of the
+        # arrays below, so a snapshot is checked with a handful of NumPy
+        # operations however many rules, cores and disks there are.
+        self.rules = list(rules)
+        self.sinks = list(sinks)
+        self.lock = threading.Lock()
+
+        self.exact = {}
+        self.patterns = []
+        for i, rule in enumerate(self.rules):
+            if any(c in rule.series for c in '*?['):
+                self.patterns.append((re.compile(fnmatch.translate(rule.series)), i))
+            else:
+                self.exact.setdefault(rule.series, []).append(i)
+
+        # Per series: slot index, and the last reading for rates
+        self.slots = {}
+        self.slot_names = []
+        self.last_value = np.empty(0)
+        self.last_time = np.empty(0)
+
+        # Per (rule, series) instance: compiled parameters and state. Readings
+        # are multiplied by sign, so "below" rules use the same comparisons.
+        self.rule_of = np.empty(0, dtype=np.intp)
+        self.slot_of = np.empty(0, dtype=np.intp)
+        self.sign = np.empty(0)
+        self.trigger = np.empty(0)
+        self.clear = np.empty(0)
+        self.hold = np.empty(0)
+        self.window = np.empty(0)
+        self.is_rate = np.empty(0, dtype=bool)
+        self.active = np.empty(0, dtype=bool)
+        self.since = np.empty(0)
+        self.rate = np.empty(0)
+
+        # instance -> firing Alert; series -> {instance: severity rank}
+        self.firing = {}
+        self.series_severity = {}
+
+    def groups(self):
+        # Metric groups the rules need sampled
+        groups = set()
+        for rule in self.rules:
+            groups |= rule.groups
+        return groups
+
+    def slot(self, name):
+        slot = self.slots.get(name)
+        if slot is None:
+            slot = self.slots[name] = len(self.slot_names)
+            self.slot_names.append(name)
+        return slot
+
+    def matching_rules(self, name):
+        matched = list(self.exact.get(name, ()))
+        matched.extend(i for pattern, i in self.patterns if pattern.match(name))
+        return matched
+
+    def compile_series(self, first_slot):
+        # Adds an instance row for every rule matching the series from
+        # first_slot on, in one go however many series are new
+        new_slots = len(self.slot_names) - first_slot
+        self.last_value = np.append(self.last_value, np.full(new_slots, np.nan))
+        self.last_time = np.append(self.last_time, np.full(new_slots, np.nan))
+
+        matched = []
+        slots = []
+        for slot in range(first_slot, len(self.slot_names)):
+            rules = self.matching_rules(self.slot_names[slot])
+            matched.extend(rules)
+            slots.extend([slot] * len(rules))
+        if not matched:
+            return
+        rules = [self.rules[i] for i in matched]
+        sign = np.array([1.0 if rule.above is not None else -1.0 for rule in rules])
+        trigger = np.array([rule.above if rule.above is not None else rule.below for rule in rules], dtype=float)
+        count = len(rules)
+
+        self.rule_of = np.append(self.rule_of, np.array(matched, dtype=np.intp))
+        self.slot_of = np.append(self.slot_of, np.array(slots, dtype=np.intp))
+        self.sign = np.append(self.sign, sign)
+        self.trigger = np.append(self.trigger, trigger * sign)
+        self.clear = np.append(self.clear, np.array([rule.clear for rule in rules]) * sign)
+        self.hold = np.append(self.hold, [rule.hold for rule in rules])
+        self.window = np.append(self.window, [rule.window for rule in rules])
+        self.is_rate = np.append(self.is_rate, [rule.type == 'rate' for rule in rules])
+        self.active = np.append(self.active, np.zeros(count, dtype=bool))
+        self.since = np.append(self.since, np.full(count, np.nan))
+        self.rate = np.append(self.rate, np.full(count, np.nan))
+
+    def evaluate(self, snapshot):
+        # Collector callback: checks the series sampled in this snapshot and
+        # hands firing and resolved alerts to the sinks
+        pairs = list(snapshot_series(snapshot, snapshot.sampled))
+        if not pairs:
+            return []
+        now = snapshot.timestamp
+        with self.lock:
+            known = len(self.slot_names)
+            slots = np.fromiter((self.slot(name) for name, _ in pairs), dtype=np.intp, count=len(pairs))
+            if len(self.slot_names) > known:
+                self.compile_series(known)
+            if not len(self.rule_of):
+                return []
+            values = np.full(len(self.slot_names), np.nan)
+            values[slots] = [np.nan if value is None else value for _, value in pairs]
+
+            # Per-second change of every fresh series since its last reading
+            fresh = ~np.isnan(values)
+            elapsed = now - self.last_time
+            with np.errstate(invalid='ignore', divide='ignore'):
+                slot_rate = np.where(fresh & (elapsed > 0), (values - self.last_value) / elapsed, np.nan)
+            self.last_value[fresh] = values[fresh]
+            self.last_time[fresh] = now
+
+            # Rate rules smooth the change with an EWMA over their window
+            rate = slot_rate[self.slot_of]
+            has_rate = ~np.isnan(rate)
+            alpha = 1 - np.exp(-np.nan_to_num(elapsed[self.slot_of]) / self.window)
+            smoothed = np.where(np.isnan(self.rate), rate, self.rate + alpha * (rate - self.rate))
+            self.rate = np.where(has_rate, smoothed, self.rate)
+
+            reading = np.where(self.is_rate, self.rate, values[self.slot_of])
+            valid = fresh[self.slot_of] & ~np.isnan(reading)
+            signed = np.where(valid, reading * self.sign, 0.0)
+            over = valid & (signed >= self.trigger)
+            quiet = valid & (signed < self.clear)
+
+            # Sustained rules: remember when the reading first went over
+            idle = ~self.active
+            self.since[idle & over & np.isnan(self.since)] = now
+            self.since[idle & valid & ~over] = np.nan
+            with np.errstate(invalid='ignore'):
+                fire = idle & over & (now - self.since >= self.hold)
+            resolve = self.active & quiet
+            self.active[fire] = True
+            self.active[resolve] = False
+            self.since[resolve] = np.nan
+
+            alerts = [self.transition(i, 'firing' if fire[i] else 'resolved', reading[i], now)
+                      for i in np.flatnonzero(fire | resolve)]
+
+        if alerts:
+            for sink in self.sinks:
+                sink.send(alerts)
+        return alerts
+
+    def transition(self, instance, state, value, now):
+        rule = self.rules[self.rule_of[instance]]
+        series = self.slot_names[self.slot_of[instance]]
+        alert = Alert(now, state, rule.name, rule.severity, series, float(value),
+                      describe(rule, series, float(value), state))
+        severities = self.series_severity.setdefault(series, {})
+        if state == 'firing':
+            self.firing[instance] = alert
+            severities[instance] = SEVERITIES.index(rule.severity)
+        else:
+            self.firing.pop(instance, None)
+            severities.pop(instance, None)
+        return alert
+
+    def active_alerts(self):
+        with self.lock:
+            return sorted(self.firing.values(), key=lambda alert: alert.timestamp)
+
+    def severity(self, series):
+        # Highest severity currently firing for a series, or None
+        with self.lock:
+            severities = self.series_severity.get(series)
+            if not severities:
+                return None
+            return SEVERITIES[max(severities.values())]
+
+    def level(self, series, value):
+        # Severity the threshold rules would give a reading right now, without
+        # hysteresis or hold times; for readings the engine does not
+        # evaluate itself, such as other hosts of a fleet
+        rank = -1
+        for i in self.matching_rules(series):
+            rule = self.rules[i]
+            if rule.type == 'rate':
+                continue
+            if (rule.above is not None and value >= rule.above) or (rule.below is not None and value <= rule.below):
+                rank = max(rank, SEVERITIES.index(rule.severity))
+        return SEVERITIES[rank] if rank >= 0 else None
+
+    def colorizer(self, series):
+        # Colour function for a UsageGauge showing this series
+        return lambda value: SEVERITY_COLORS[self.severity(series)]
+
+
+class LogSink:
+    def __init__(self, target):
+        # target: a file path, or an open text stream such as sys.stdout
+        self.path = target if isinstance(target, str) else None
+        self.stream = None if self.path else target
+
+    def send(self, alerts):
+        if self.stream is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.stream = open(self.path, 'a')
+        for alert in alerts:
+            stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(alert.timestamp))
+            self.stream.write(f"{stamp} {alert.state.upper():<8} {alert.severity:<8} {alert.message}\n")
+        self.stream.flush()
+
+
+class BannerSink:
+    def __init__(self, min_severity='critical'):
+        # Windows register listeners; each one is called on the collector's
+        # thread with the alerts of one snapshot
+        self.min_rank = SEVERITIES.index(min_severity)
+        self.listeners = []
+        self.lock = threading.Lock()
+
+    def add_listener(self, callback):
+        with self.lock:
+            self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self.lock:
+            if callback in self.listeners:
+                self.listeners.remove(callback)
+
+    def send(self, alerts):
+        alerts = [alert for alert in alerts if SEVERITIES.index(alert.severity) >= self.min_rank]
+        if not alerts:
+            return
+        with self.lock:
+            listeners = list(self.listeners)
+        for callback in listeners:
+            callback(alerts)
+
+
+class WebhookSink:
+    def __init__(self, url, min_severity='warning', timeout=5.0):
+        # Alerts are POSTed as one JSON list per snapshot from a background
+        # thread, so a slow endpoint never holds up the collector
+        self.url = url
+        self.min_rank = SEVERITIES.index(min_severity)
+        self.timeout = timeout
+        self.queue = queue.SimpleQueue()
+        self.failing = False
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def send(self, alerts):
+        alerts = [alert for alert in alerts if SEVERITIES.index(alert.severity) >= self.min_rank]
+        if alerts:
+            self.queue.put(alerts)
+
+    def run(self):
+        while True:
+            alerts = self.queue.get()
+            body = json.dumps([alert._asdict() for alert in alerts]).encode()
+            request = urllib.request.Request(self.url, data=body, headers={'Content-Type': 'application/json'})
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    response.read()
+                self.failing = False
+            except OSError as e:
+                # Report once per outage, not once per alert
+                if not self.failing:
+                    print(f"Alert webhook {self.url} failed: {e}", file=sys.stderr)
+                self.failing = True
+
+
+def build_sinks(config):
+    # (sinks, banner sink or None) from the "sinks" section of the config
+    sinks = []
+    if config.get('log'):
+        sinks.append(LogSink(os.path.expanduser(config['log'])))
+    banner = None
+    if config.get('banner'):
+        banner = BannerSink(config['banner'])
+        sinks.append(banner)
+    if config.get('webhook'):
+        sinks.append(WebhookSink(config['webhook'], config.get('webhook_severity', 'warning')))
+    return sinks, banner
+
+
+class WebhookStubHandler(BaseHTTPRequestHandler):
+    received = None
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.received.put(json.loads(body))
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_webhook_stub(host='127.0.0.1', port=0):
+    # Local stand-in for a real webhook: returns the server and a queue
+    # that receives every posted list of alerts. Point the "webhook"
+    # setting at http://host:port/ to try a config without a real endpoint.
+    received = queue.SimpleQueue()
+    handler = type('Handler', (WebhookStubHandler,), {'received': received})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, received
+
+
+_alerts = None
+_banner = None
+_alerts_lock = threading.Lock()
+
+
+def get_alerts(path=CONFIG_PATH):
+    # Shared engine fed by the collector; path only applies on first call
+    global _alerts, _banner
+    with _alerts_lock:
+        if _alerts is None:
+            try:
+                rules, config = load_config(path)
+            except (OSError, ValueError) as e:
+                print(f"Alert config not loaded ({e}), using the built-in rules", file=sys.stderr)
+                rules, config = load_config(None)
+            sinks, _banner = build_sinks(config)
+            _alerts = AlertEngine(rules, sinks)
+            groups = _alerts.groups() if config.get('background') else ()
+            get_collector().subscribe(_alerts.evaluate, metrics=tuple(m for m in METRICS if m in groups))
+        return _alerts
+
+
+def get_banner():
+    # The desktop banner sink, or None when the config turns it off
+    get_alerts()
+    return _banner
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate alert rules without a GUI")
+    parser.add_argument('--config', default=CONFIG_PATH, help="rules file (JSON)")
+    parser.add_argument('--interval', type=float, default=1.0, help="seconds between samples")
+    parser.add_argument('--check', action='store_true', help="validate the rules file and exit")
+    parser.add_argument('--webhook-stub', type=int, metavar='PORT',
+                        help="only run a local webhook stub that prints what it receives")
+    args = parser.parse_args(argv)
+
+    if args.webhook_stub is not None:
+        server, received = start_webhook_stub(port=args.webhook_stub)
+        print(f"Webhook stub listening on http://127.0.0.1:{server.server_address[1]}/")
+        try:
+            while True:
+                for alert in received.get():
+                    print(f"{alert['state']:<8} {alert['severity']:<8} {alert['message']}")
+        except KeyboardInterrupt:
+            server.shutdown()
+        return
+
+    try:
+        rules, sinks = load_config(args.config)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    if args.check:
+        print(f"{len(rules)} rules OK")
+        return
+    if args.interval <= 0:
+        parser.error("--interval must be positive")
+
+    sinks, _ = build_sinks(dict(sinks, banner=None))
+    engine = AlertEngine(rules, sinks + [LogSink(sys.stdout)])
+    collector = MetricsCollector(args.interval)
+    collector.subscribe(engine.evaluate, metrics=tuple(m for m in METRICS if m in engine.groups()))
+    print(f"Evaluating {len(rules)} rules every {args.interval:g}s")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# Alert rule evaluation cost per snapshot as rules and cores grow. Uses
+# synthetic snapshots, so no collector or display is needed:
+#     python -m benchmarks.bench_alerts --rules 10,100,1000,5000 --cores 256
+import argparse
+import random
+import statistics
+import time
+
+from alerts import AlertEngine, parse_rule
+from collector import MemoryInfo, Snapshot, SwapInfo
+
+
+def make_rules(count):
+    # A mix of all rule types over per-core and whole-system series
+    kinds = (
+        {'series': 'cpu.core.*', 'type': 'sustained', 'for': 5},
+        {'series': 'cpu.percent', 'type': 'threshold'},
+        {'series': 'memory.percent', 'type': 'rate', 'window': 30},
+    )
+    rules = []
+    for i in range(count):
+        spec = dict(kinds[i % len(kinds)], name=f'rule-{i}', above=50 + i % 45)
+        spec['clear'] = spec['above'] - 5
+        rules.append(parse_rule(spec))
+    return rules
+
+
+def make_snapshot(timestamp, cores, rng):
+    values = dict.fromkeys(Snapshot._fields)
+    per_core = tuple(rng.uniform(0, 100) for _ in range(cores))
+    values.update(timestamp=timestamp, cpu_percent=sum(per_core) / cores, per_core=per_core,
+                  memory=MemoryInfo(1, 1, 1, rng.uniform(40, 60)), swap=SwapInfo(1, 1, 1, 0.0),
+                  disk_usage=None, disks=(), mounts=(), sampled=frozenset(('cpu', 'memory')))
+    return Snapshot(**values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Alert rule evaluation benchmark")
+    parser.add_argument('--rules', default='10,100,1000,5000')
+    parser.add_argument('--cores', type=int, default=256)
+    parser.add_argument('--snapshots', type=int, default=100)
+    args = parser.parse_args()
+
+    for count in (int(r) for r in args.rules.split(',')):
+        rng = random.Random(0)
+        engine = AlertEngine(make_rules(count))
+        start = time.perf_counter()
+        engine.evaluate(make_snapshot(0.0, args.cores, rng))
+        compile_ms = (time.perf_counter() - start) * 1000
+
+        snapshots = [make_snapshot(float(i), args.cores, rng) for i in range(1, args.snapshots + 1)]
+        times = []
+        fired = 0
+        for snapshot in snapshots:
+            start = time.perf_counter()
+            fired += len(engine.evaluate(snapshot))
+            times.append((time.perf_counter() - start) * 1000)
+        times.sort()
+        print(f"{count:>6} rules  {len(engine.rule_of):>8} instances  first snapshot {compile_ms:8.2f} ms  "
+              f"mean {statistics.mean(times):7.3f} ms  p95 {times[int(len(times) * 0.95) - 1]:7.3f} ms  "
+              f"{fired / len(snapshots):7.1f} transitions/snapshot")
+
+
+if __name__ == "__main__":
+    main()
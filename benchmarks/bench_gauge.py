@@ -0,0 +1,124 @@
+# Compare the incremental UsageGauge with the old clear-and-redraw pie gauge.
+# Runs headless on the Agg backend:
+#     python -m benchmarks.bench_gauge --frames 500
+import argparse
+import random
+import statistics
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from gauge import UsageGauge
+
+FG_COLOR = '#FFFFFF'
+ACCENT_COLOR = '#00FF9D'
+FRAME_BG = '#2D2D2D'
+
+
+def legacy_color(usage):
+    # The fixed 60/80 cutoffs the gauges used before the alert rules
+    if usage < 60:
+        return '#00FF9D'
+    elif usage < 80:
+        return '#FFD700'
+    else:
+        return '#FF4444'
+
+
+def legacy_update_gauge(ax, canvas, usage):
+    # The update_gauge every dashboard used before UsageGauge
+    ax.clear()
+    sizes = [usage, 100 - usage]
+    colors = [legacy_color(usage), '#3D3D3D']
+    ax.pie(sizes,
+           colors=colors,
+           startangle=90,
+           counterclock=False,
+           wedgeprops=dict(width=0.3))
+    ax.text(0, 0, f'{usage}%',
+            ha='center',
+            va='center',
+            fontsize=20,
+            color=FG_COLOR)
+    ax.axis('equal')
+    ax.set_title('CPU Usage', color=ACCENT_COLOR)
+    canvas.draw()
+
+
+def usage_series(frames, seed=0):
+    # A 1-decimal random walk, like psutil.cpu_percent(); idle hosts repeat
+    # the same value often, which the incremental gauge can skip
+    rng = random.Random(seed)
+    usage = 30.0
+    values = []
+    for _ in range(frames):
+        if rng.random() < 0.6:
+            usage = min(max(usage + rng.uniform(-5, 5), 0), 100)
+        values.append(round(usage, 1))
+    return values
+
+
+def time_frames(update, values):
+    wall = []
+    cpu = []
+    for usage in values:
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        update(usage)
+        cpu.append(time.process_time() - cpu_start)
+        wall.append(time.perf_counter() - wall_start)
+    return wall, cpu
+
+
+def summarize(name, wall, cpu):
+    wall_ms = sorted(t * 1000 for t in wall)
+    return {
+        'name': name,
+        'frames': len(wall_ms),
+        'mean_ms': statistics.mean(wall_ms),
+        'p95_ms': wall_ms[int(len(wall_ms) * 0.95) - 1],
+        'cpu_ms_per_frame': sum(cpu) * 1000 / len(cpu),
+    }
+
+
+def new_figure():
+    plt.style.use('dark_background')
+    fig, ax = plt.subplots(figsize=(4, 4), facecolor=FRAME_BG)
+    fig.canvas.draw()
+    return fig, ax
+
+
+def run(frames):
+    values = usage_series(frames)
+
+    fig, ax = new_figure()
+    legacy = summarize('legacy update_gauge', *time_frames(
+        lambda usage: legacy_update_gauge(ax, fig.canvas, usage), values))
+    plt.close(fig)
+
+    fig, ax = new_figure()
+    gauge = UsageGauge(ax, 'CPU Usage', FG_COLOR, ACCENT_COLOR, color=legacy_color)
+    fig.canvas.draw()
+    incremental = summarize('UsageGauge', *time_frames(gauge.update, values))
+    plt.close(fig)
+
+    return [legacy, incremental]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gauge frame time benchmark")
+    parser.add_argument('--frames', type=int, default=300)
+    args = parser.parse_args()
+
+    results = run(args.frames)
+    for result in results:
+        print(f"{result['name']:<22} mean {result['mean_ms']:8.3f} ms  "
+              f"p95 {result['p95_ms']:8.3f} ms  cpu {result['cpu_ms_per_frame']:8.3f} ms/frame")
+    speedup = results[0]['mean_ms'] / max(results[1]['mean_ms'], 1e-9)
+    print(f"speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# Per-core heatmap render cost as the core count grows. Measures the NumPy
+# image build that feeds the single PhotoImage update; no display needed:
+#     python -m benchmarks.bench_heatmap
+import argparse
+import math
+import statistics
+import time
+
+import numpy as np
+
+from heatmap import build_palette, layout, render_image
+
+
+def fake_topology(cpu_count, sockets=2, threads=2):
+    # cpu -> (package, core), Linux-style numbering: siblings are N/2 apart
+    per_socket = max(cpu_count // sockets, 1)
+    return [((cpu % (cpu_count // threads)) // max(per_socket // threads, 1) % sockets,
+             cpu % (cpu_count // threads)) for cpu in range(cpu_count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-core heatmap benchmark")
+    parser.add_argument('--cores', default='4,16,64,192,512')
+    parser.add_argument('--frames', type=int, default=200)
+    args = parser.parse_args()
+
+    palette = build_palette()
+    rng = np.random.default_rng(0)
+    for cpu_count in (int(c) for c in args.cores.split(',')):
+        columns = max(1, min(cpu_count, math.ceil(math.sqrt(cpu_count * 2))))
+        grid = layout(cpu_count, 'smt', fake_topology(cpu_count), columns)
+        cell = max(4, min(32, 360 // grid.shape[1]))
+        values = rng.uniform(0, 100, size=(args.frames, cpu_count)).astype(np.float32)
+
+        times = []
+        for frame in values:
+            started = time.perf_counter()
+            render_image(frame, grid, palette, cell)
+            times.append((time.perf_counter() - started) * 1000)
+        print(f"{cpu_count:>4} cores  grid {grid.shape[0]:>2}x{grid.shape[1]:<2}  "
+              f"median {statistics.median(times):6.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
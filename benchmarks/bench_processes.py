@@ -0,0 +1,97 @@
+# Compare the cached ProcessTable with a naive full rescan that builds a new
+# psutil.Process for every PID on every tick:
+#     python -m benchmarks.bench_processes --spawn 2000 --ticks 10
+import argparse
+import heapq
+import statistics
+import subprocess
+import sys
+import time
+
+import psutil
+
+from processes import ProcessTable
+
+
+def naive_top(previous, top_n=10):
+    # What a first attempt usually looks like: everything re-read per tick
+    now = time.monotonic()
+    rows = []
+    current = {}
+    for pid in psutil.pids():
+        try:
+            proc = psutil.Process(pid)
+            with proc.oneshot():
+                name = proc.name()
+                times = proc.cpu_times()
+                rss = proc.memory_info().rss
+                try:
+                    io = proc.io_counters()
+                    io_bytes = io.read_bytes + io.write_bytes
+                except psutil.AccessDenied:
+                    io_bytes = 0
+        except psutil.Error:
+            continue
+        busy = times.user + times.system
+        current[pid] = (now, busy, io_bytes)
+        cpu = io_rate = 0.0
+        if pid in previous and now > previous[pid][0]:
+            elapsed = now - previous[pid][0]
+            cpu = (busy - previous[pid][1]) / elapsed * 100
+            io_rate = max(io_bytes - previous[pid][2], 0) / elapsed
+        rows.append((pid, name, cpu, rss, io_rate))
+    top = [heapq.nlargest(top_n, rows, key=lambda r: r[i]) for i in (2, 3, 4)]
+    return current, top
+
+
+def spawn_sleepers(count):
+    code = "import time; time.sleep(3600)"
+    return [subprocess.Popen([sys.executable, '-c', code]) if i < 8 else
+            subprocess.Popen(['sleep', '3600']) for i in range(count)]
+
+
+def time_ticks(tick, ticks):
+    times = []
+    for _ in range(ticks):
+        started = time.perf_counter()
+        tick()
+        times.append((time.perf_counter() - started) * 1000)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process table refresh benchmark")
+    parser.add_argument('--ticks', type=int, default=10)
+    parser.add_argument('--spawn', type=int, default=0,
+                        help="start this many idle processes to simulate a busy host")
+    args = parser.parse_args()
+
+    children = spawn_sleepers(args.spawn)
+    try:
+        time.sleep(0.5)
+        print(f"processes: {len(psutil.pids())}")
+
+        table = ProcessTable()
+        table.top()
+        cached = time_ticks(table.top, args.ticks)
+
+        state = {'previous': {}}
+
+        def naive_tick():
+            state['previous'], _ = naive_top(state['previous'])
+
+        naive_tick()
+        naive = time_ticks(naive_tick, args.ticks)
+    finally:
+        for child in children:
+            child.kill()
+        for child in children:
+            child.wait()
+
+    for name, times in (("naive rescan", naive), ("ProcessTable", cached)):
+        print(f"{name:<14} median {statistics.median(times):8.2f} ms  max {max(times):8.2f} ms")
+    print(f"speedup: {statistics.median(naive) / statistics.median(cached):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+# Per-tick cost of the collector's every-tick readings at 100 Hz: psutil
+# against the /proc fast path (procfs.py), on generated /proc trees of
+# many-core hosts that both read. Linux only; no display needed:
+#     python -m benchmarks.bench_procfs --cores 64,256,1024 --seconds 5
+#     python -m benchmarks.bench_procfs --check    # values must match psutil
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+import tempfile
+
+import psutil
+
+from procfs import ProcReader
+from diskio import COUNTER_FIELDS as DISK_FIELDS
+from network import COUNTER_FIELDS as NET_FIELDS
+
+
+class FakeProc:
+    def __init__(self, root, cores, disks=48, nics=8, seed=0):
+        # A /proc with the four files, advanced by tick(); files are
+        # rewritten in place so open descriptors see the new contents
+        self.root = root
+        self.rng = random.Random(seed)
+        self.cpu = [[self.rng.randrange(10 ** 6) for _ in range(10)] for _ in range(cores)]
+        self.disks = [[self.rng.randrange(10 ** 6) for _ in range(17)] for _ in range(disks)]
+        self.nics = [[self.rng.randrange(10 ** 9) for _ in range(16)] for _ in range(nics)]
+        os.makedirs(os.path.join(root, 'net'), exist_ok=True)
+        self.tick()
+
+    def write(self, name, text):
+        with open(os.path.join(self.root, name), 'w') as f:
+            f.write(text)
+
+    def tick(self):
+        rng = self.rng
+        for row in self.cpu:
+            busy = rng.randrange(0, 5)
+            for column, step in ((0, busy), (2, busy // 2), (3, 5 - busy), (4, rng.randrange(2))):
+                row[column] += step
+        total = [sum(column) for column in zip(*self.cpu)]
+        lines = ["cpu  " + " ".join(map(str, total))]
+        lines += [f"cpu{i} " + " ".join(map(str, row)) for i, row in enumerate(self.cpu)]
+        lines += ["intr 0", "ctxt 0", "btime 0", "processes 1", "procs_running 1", "procs_blocked 0"]
+        self.write('stat', "\n".join(lines) + "\n")
+
+        used = rng.randrange(10 ** 6, 6 * 10 ** 7)
+        self.write('meminfo', f"MemTotal:       67108864 kB\nMemFree:        {67108864 - used} kB\n"
+                              f"MemAvailable:   {67108864 - used + 1000} kB\nBuffers:           1000 kB\n"
+                              f"Cached:          2000000 kB\nSwapTotal:       8388608 kB\n"
+                              f"SwapFree:        {8388608 - rng.randrange(10 ** 6)} kB\n"
+                              f"Shmem:             1000 kB\nActive:          1000000 kB\n"
+                              f"Inactive:        1000000 kB\nSlab:             100000 kB\n"
+                              f"HugePages_Total:       0\n")
+        self.write('vmstat', "pswpin 0\npswpout 0\n")
+
+        lines = []
+        for i, row in enumerate(self.disks):
+            for column in (0, 2, 3, 4, 6, 7, 9):
+                row[column] += rng.randrange(100)
+            lines.append(f" 259 {i} nvme{i}n1 " + " ".join(map(str, row)))
+        self.write('diskstats', "\n".join(lines) + "\n")
+
+        lines = ["Inter-|   Receive                            |  Transmit",
+                 " face |bytes    packets errs drop fifo frame compressed multicast|bytes"]
+        for i, row in enumerate(self.nics):
+            for column in (0, 1, 8, 9):
+                row[column] += rng.randrange(10 ** 5)
+            lines.append(f"  eth{i}: " + " ".join(map(str, row)))
+        self.write('net/dev', "\n".join(lines) + "\n")
+
+
+def use_procfs(root):
+    # Point psutil at root, forgetting the counters it remembers to undo
+    # wraparounds, which would be from the previous tree
+    psutil.PROCFS_PATH = root
+    psutil.disk_io_counters.cache_clear()
+    psutil.net_io_counters.cache_clear()
+
+
+def psutil_tick():
+    # What the psutil backend of collector.Sampler reads on a tick
+    psutil.cpu_percent()
+    psutil.cpu_percent(percpu=True)
+    psutil.virtual_memory()
+    psutil.swap_memory()
+    psutil.disk_io_counters(perdisk=True)
+    psutil.net_io_counters(pernic=True)
+
+
+def procfs_tick(reader):
+    reader.cpu_percent()
+    reader.memory()
+    reader.disk_counters()
+    reader.net_counters()
+
+
+def run_at(tick, fake, rate, seconds):
+    # Ticks at rate Hz; returns per-tick times and the share of one core
+    # spent ticking. The fake /proc advances between ticks, untimed.
+    period = 1.0 / rate
+    times = []
+    busy = 0.0
+    started = time.monotonic()
+    next_tick = started
+    while time.monotonic() - started < seconds:
+        fake.tick()
+        cpu = time.thread_time()
+        begin = time.perf_counter()
+        tick()
+        times.append(time.perf_counter() - begin)
+        busy += time.thread_time() - cpu
+        next_tick += period
+        time.sleep(max(next_tick - time.monotonic(), 0))
+    return times, busy / (time.monotonic() - started) * 100
+
+
+def counters_match(read_counters, read_psutil, fields, attempts=5):
+    # Live counters can move between the two reads, so a few tries
+    for _ in range(attempts):
+        names, values = read_counters()
+        expected = {name: [getattr(row, field) for field in fields] for name, row in read_psutil().items()}
+        if dict(zip(names, values.tolist())) == expected:
+            return True
+    return False
+
+
+def check(root, advance=None):
+    # Returns the mismatches between psutil and the reader under root;
+    # advance moves a generated /proc on between the two CPU readings
+    reader = ProcReader(root)
+    errors = []
+    for _ in range(5):
+        # A clock tick can land between the two reads of a live /proc
+        reader.cpu_percent()
+        psutil.cpu_percent()
+        psutil.cpu_percent(percpu=True)
+        time.sleep(0.2)
+        if advance is not None:
+            advance()
+        total, per_core = reader.cpu_percent()
+        if (total, list(per_core)) == (psutil.cpu_percent(), psutil.cpu_percent(percpu=True)):
+            break
+    else:
+        errors.append("cpu_percent")
+    memory, swap = reader.memory()
+    ram, sw = psutil.virtual_memory(), psutil.swap_memory()
+    if tuple(memory) != (ram.total, ram.used, ram.available, ram.percent):
+        errors.append("virtual_memory")
+    if tuple(swap) != (sw.total, sw.used, sw.free, sw.percent):
+        errors.append("swap_memory")
+    if not counters_match(reader.disk_counters, lambda: psutil.disk_io_counters(perdisk=True), DISK_FIELDS):
+        errors.append("disk_io_counters")
+    if not counters_match(reader.net_counters, lambda: psutil.net_io_counters(pernic=True), NET_FIELDS):
+        errors.append("net_io_counters")
+    reader.close()
+    return errors
+
+
+def run(cores_list, seconds, rate=100.0):
+    results = {}
+    for cores in cores_list:
+        with tempfile.TemporaryDirectory() as root:
+            fake = FakeProc(root, cores)
+            use_procfs(root)
+            try:
+                psutil_times, psutil_busy = run_at(psutil_tick, fake, rate, seconds)
+                reader = ProcReader(root)
+                procfs_times, procfs_busy = run_at(lambda: procfs_tick(reader), fake, rate, seconds)
+                reader.close()
+            finally:
+                use_procfs('/proc')
+        results[str(cores)] = {
+            'psutil_median_us': statistics.median(psutil_times) * 1e6,
+            'procfs_median_us': statistics.median(procfs_times) * 1e6,
+            'psutil_cpu_percent': psutil_busy,
+            'procfs_cpu_percent': procfs_busy,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/proc fast path against psutil at 100 Hz")
+    parser.add_argument('--cores', default='16,64,256,1024')
+    parser.add_argument('--seconds', type=float, default=3.0, help="per backend and core count")
+    parser.add_argument('--rate', type=float, default=100.0, help="ticks per second")
+    parser.add_argument('--check', action='store_true', help="compare values with psutil and exit")
+    args = parser.parse_args()
+
+    if args.check:
+        with tempfile.TemporaryDirectory() as root:
+            fake = FakeProc(root, 256)
+            use_procfs(root)
+            try:
+                generated = check(root, fake.tick)
+            finally:
+                use_procfs('/proc')
+        local = check('/proc')
+        for name, errors in (("generated 256-core /proc", generated), ("this machine's /proc", local)):
+            print(f"{name}: {'mismatch in ' + ', '.join(errors) if errors else 'same as psutil'}")
+        sys.exit(1 if generated or local else 0)
+
+    cores_list = [int(c) for c in args.cores.split(',')]
+    print(f"{'cores':>6} {'psutil us/tick':>15} {'procfs us/tick':>15} {'speedup':>8} "
+          f"{'psutil %core':>13} {'procfs %core':>13}")
+    for cores, result in run(cores_list, args.seconds, args.rate).items():
+        print(f"{cores:>6} {result['psutil_median_us']:15.1f} {result['procfs_median_us']:15.1f} "
+              f"{result['psutil_median_us'] / result['procfs_median_us']:7.1f}x "
+              f"{result['psutil_cpu_percent']:13.2f} {result['procfs_cpu_percent']:13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# Track import time per module and time-to-first-frame of main_dashboard.
+# Every measurement runs in a fresh interpreter so nothing is pre-imported:
+#     python -m benchmarks.bench_startup --budget-ms 500
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    'monitor',
+    'collector',
+    'render_scheduler',
+    'gauge',
+    'history',
+    'trend_chart',
+    'tsdb',
+    'main_dashboard',
+    'cpu_dashboard',
+    'ram_dashboard',
+    'disk_dashboard',
+    'gpu_dashboard',
+    'network_dashboard',
+    'fleet_dashboard',
+]
+
+IMPORT_SCRIPT = """
+import time
+started = time.perf_counter()
+import {module}
+print(time.perf_counter() - started)
+"""
+
+# Time from interpreter start of main_dashboard work until the root window
+# is mapped and its first idle redraw is done, then until static info is in
+FIRST_FRAME_SCRIPT = """
+import json, time
+started = time.perf_counter()
+import tkinter as tk
+try:
+    root = tk.Tk()
+except tk.TclError as e:
+    print(json.dumps({"skipped": str(e)}))
+    raise SystemExit
+import main_dashboard
+app = main_dashboard.SystemInfoDashboard(root)
+root.wait_visibility(root)
+root.update_idletasks()
+first_frame = time.perf_counter() - started
+while not app.static_info_loaded:
+    root.update()
+ready = time.perf_counter() - started
+if app.store is not None:
+    app.store.close()
+root.destroy()
+print(json.dumps({"first_frame": first_frame, "ready": ready}))
+"""
+
+
+def run_script(script):
+    result = subprocess.run([sys.executable, '-c', script], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    return result.stdout.strip().splitlines()[-1]
+
+
+def measure_imports(repeat):
+    results = {}
+    for module in MODULES:
+        times = [float(run_script(IMPORT_SCRIPT.format(module=module))) for _ in range(repeat)]
+        results[module] = statistics.median(times) * 1000
+    return results
+
+
+def measure_first_frame(repeat):
+    runs = [json.loads(run_script(FIRST_FRAME_SCRIPT)) for _ in range(repeat)]
+    if 'skipped' in runs[0]:
+        return {'skipped': runs[0]['skipped']}
+    return {
+        'first_frame_ms': statistics.median(run['first_frame'] for run in runs) * 1000,
+        'ready_ms': statistics.median(run['ready'] for run in runs) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time benchmark")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per measurement (median is reported)")
+    parser.add_argument('--budget-ms', type=float, default=0,
+                        help="fail if time-to-first-frame exceeds this (0 disables)")
+    parser.add_argument('--json', action='store_true', help="print a machine-readable report")
+    args = parser.parse_args()
+
+    report = {
+        'imports_ms': measure_imports(args.repeat),
+        'startup': measure_first_frame(args.repeat),
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for module, ms in report['imports_ms'].items():
+            print(f"import {module:<18} {ms:8.1f} ms")
+        startup = report['startup']
+        if 'skipped' in startup:
+            print(f"time-to-first-frame: skipped ({startup['skipped']})")
+        else:
+            print(f"time-to-first-frame: {startup['first_frame_ms']:.1f} ms")
+            print(f"static info loaded:  {startup['ready_ms']:.1f} ms")
+
+    first_frame = report['startup'].get('first_frame_ms')
+    if args.budget_ms and first_frame is not None and first_frame > args.budget_ms:
+        print(f"time-to-first-frame {first_frame:.1f} ms is over the {args.budget_ms:.0f} ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
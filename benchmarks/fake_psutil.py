@@ -0,0 +1,164 @@
+# Deterministic stand-in for the parts of psutil the collector uses, so
+# benchmarks can be repeated exactly and scaled to machines we do not have
+# (1024 cores, 512 disks, 10000 processes):
+#     with fake_psutil(cores=256, disks=64, processes=5000):
+#         Sampler().sample(('cpu', 'disk', 'processes'))
+import random
+import contextlib
+from collections import namedtuple
+
+import psutil
+
+import collector
+import diskio
+import network
+import processes
+
+scpufreq = namedtuple('scpufreq', ['current', 'min', 'max'])
+svmem = namedtuple('svmem', ['total', 'available', 'percent', 'used', 'free'])
+sswap = namedtuple('sswap', ['total', 'used', 'free', 'percent', 'sin', 'sout'])
+sdiskusage = namedtuple('sdiskusage', ['total', 'used', 'free', 'percent'])
+sdiskpart = namedtuple('sdiskpart', ['device', 'mountpoint', 'fstype', 'opts'])
+sdiskio = namedtuple('sdiskio', ['read_count', 'write_count', 'read_bytes', 'write_bytes',
+                                 'read_time', 'write_time', 'busy_time'])
+snetio = namedtuple('snetio', ['bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv',
+                               'errin', 'errout', 'dropin', 'dropout'])
+snicstats = namedtuple('snicstats', ['isup', 'duplex', 'speed', 'mtu', 'flags'])
+pmem = namedtuple('pmem', ['rss', 'vms'])
+pio = namedtuple('pio', ['read_count', 'write_count', 'read_bytes', 'write_bytes'])
+
+GIB = 1024 ** 3
+
+# Modules that call psutil while sampling
+PATCHED_MODULES = (collector, diskio, network, processes)
+
+
+class FakeProcess:
+    def __init__(self, pid, rng):
+        self.pid = pid
+        self.rng = rng
+        self.busy = rng.random() < 0.05
+        self.rss = rng.randrange(1, 512) * 1024 * 1024
+        self.io_bytes = 0
+
+    def name(self):
+        return f"proc-{self.pid}"
+
+    def cpu_percent(self):
+        return self.rng.uniform(1, 100) if self.busy else 0.0
+
+    def memory_info(self):
+        return pmem(self.rss, self.rss * 2)
+
+    def io_counters(self):
+        if self.busy:
+            self.io_bytes += self.rng.randrange(0, 1 << 20)
+        return pio(0, 0, self.io_bytes, 0)
+
+    def oneshot(self):
+        return contextlib.nullcontext()
+
+
+class FakePsutil:
+    Error = psutil.Error
+    AccessDenied = psutil.AccessDenied
+    NoSuchProcess = psutil.NoSuchProcess
+
+    def __init__(self, cores=8, disks=4, processes=300, nics=2, mounts=4, churn=0.01, seed=0):
+        # churn: share of processes replaced by new ones on every process_iter
+        self.rng = random.Random(seed)
+        self.cores = cores
+        self.churn = churn
+        self.usage = [self.rng.uniform(0, 100) for _ in range(cores)]
+        self.disk_counters = {f"sd{i}": [0] * len(sdiskio._fields) for i in range(disks)}
+        self.nic_counters = {f"eth{i}": [0] * len(snetio._fields) for i in range(nics)}
+        self.partitions = tuple(sdiskpart(f"/dev/sd{i}1", '/' if i == 0 else f"/mnt/data{i}", 'ext4', 'rw')
+                                for i in range(mounts))
+        self.next_pid = 1
+        self.processes = [self.new_process() for _ in range(processes)]
+
+    def new_process(self):
+        proc = FakeProcess(self.next_pid, self.rng)
+        self.next_pid += 1
+        return proc
+
+    # CPU: each core does a bounded random walk per call
+    def cpu_percent(self, interval=None, percpu=False):
+        if percpu:
+            self.usage = [min(max(u + self.rng.uniform(-5, 5), 0), 100) for u in self.usage]
+            return list(self.usage)
+        return sum(self.usage) / len(self.usage)
+
+    def cpu_count(self, logical=True):
+        return self.cores if logical else max(self.cores // 2, 1)
+
+    def cpu_freq(self, percpu=False):
+        return scpufreq(2400.0 + self.rng.uniform(-200, 200), 800.0, 3600.0)
+
+    def virtual_memory(self):
+        total = 64 * GIB
+        used = int(total * self.rng.uniform(0.3, 0.7))
+        return svmem(total, total - used, used / total * 100, used, total - used)
+
+    def swap_memory(self):
+        return sswap(8 * GIB, GIB, 7 * GIB, 12.5, 0, 0)
+
+    def disk_usage(self, path):
+        return sdiskusage(1000 * GIB, 400 * GIB, 600 * GIB, 40.0)
+
+    def disk_partitions(self, all=False):
+        return self.partitions
+
+    def disk_io_counters(self, perdisk=False):
+        for values in self.disk_counters.values():
+            ops = self.rng.randrange(0, 200)
+            for i, step in enumerate((ops, ops // 2, ops * 4096, ops * 2048, ops, ops // 2, min(ops * 5, 1000))):
+                values[i] += step
+        counters = {name: sdiskio(*values) for name, values in self.disk_counters.items()}
+        if perdisk:
+            return counters
+        return sdiskio(*(sum(column) for column in zip(*counters.values())))
+
+    def net_io_counters(self, pernic=False):
+        for values in self.nic_counters.values():
+            packets = self.rng.randrange(0, 10000)
+            for i, step in enumerate((packets * 800, packets * 1200, packets, packets, 0, 0, 0, 0)):
+                values[i] += step
+        counters = {name: snetio(*values) for name, values in self.nic_counters.items()}
+        if pernic:
+            return counters
+        return snetio(*(sum(column) for column in zip(*counters.values())))
+
+    def net_if_stats(self):
+        return {name: snicstats(True, 2, 10000, 1500, '') for name in self.nic_counters}
+
+    def net_connections(self, kind='inet'):
+        return []
+
+    def process_iter(self, attrs=None):
+        # The same objects come back on every call, like psutil's cache
+        replace = int(len(self.processes) * self.churn)
+        for _ in range(replace):
+            self.processes[self.rng.randrange(len(self.processes))] = self.new_process()
+        return iter(list(self.processes))
+
+    def pids(self):
+        return [proc.pid for proc in self.processes]
+
+
+@contextlib.contextmanager
+def fake_psutil(**options):
+    # Points the collector's modules at a FakePsutil for the duration; disk
+    # names are not looked up in /sys/block, which would drop them
+    fake = FakePsutil(**options)
+    saved = [(module, module.psutil) for module in PATCHED_MODULES]
+    saved_is_physical = diskio.is_physical
+    for module in PATCHED_MODULES:
+        module.psutil = fake
+    diskio.is_physical = lambda name: True
+    try:
+        yield fake
+    finally:
+        for module, original in saved:
+            module.psutil = original
+        diskio.is_physical = saved_is_physical
@@ -0,0 +1,142 @@
+# Opens and closes every dashboard window through the main window's buttons,
+# over and over, and fails if RSS or the thread count keeps growing: a
+# window that stays subscribed, keeps its figures or leaves a helper such as
+# nvidia-smi running shows up here. Needs a display (Xvfb will do); the data
+# comes from the fake psutil and nvidia-smi:
+#     python -m benchmarks.soak_windows --cycles 1000
+# tests/test_lifecycle.py runs the same soak under pytest when there is a
+# display, and checks the collector side without one.
+import os
+import gc
+import sys
+import time
+import argparse
+
+import psutil
+from matplotlib.figure import Figure
+
+from benchmarks.fake_psutil import fake_psutil
+from benchmarks.suite import FAKE_NVIDIA_SMI
+
+# SystemInfoDashboard buttons. Fleet is left out: its first use starts a
+# listening server that stays up for the life of the process.
+OPENERS = ('open_ram_dashboard', 'open_cpu_dashboard', 'open_disk_dashboard', 'open_gpu_dashboard',
+           'open_network_dashboard', 'open_cgroup_dashboard', 'open_diagnostics')
+
+
+def pump(root, seconds):
+    # Runs the Tk event loop for a while, at least one round
+    end = time.monotonic() + seconds
+    while True:
+        root.update()
+        if time.monotonic() >= end:
+            return
+        time.sleep(0.005)
+
+
+def close(window, from_window_manager):
+    if from_window_manager:
+        # What the title bar's close button runs
+        window.tk.call(window.protocol("WM_DELETE_WINDOW"))
+    else:
+        window.destroy()
+
+
+def measure(root, me, settle):
+    # RSS in MB, OS threads and live matplotlib figures, once stopped
+    # helpers have exited and garbage has been collected
+    pump(root, settle)
+    gc.collect()
+    figures = sum(1 for obj in gc.get_objects() if isinstance(obj, Figure))
+    return {'rss_mb': me.memory_info().rss / 2 ** 20, 'threads': me.num_threads(), 'figures': figures}
+
+
+def run(cycles, dwell, warmup, checkpoints, settle):
+    # Returns (timeline, errors); timeline has one measurement per checkpoint
+    import tkinter as tk
+    root = tk.Tk()
+    root.withdraw()
+    from main_dashboard import SystemInfoDashboard
+    app = SystemInfoDashboard(root)
+    me = psutil.Process()
+    errors = []
+
+    # Pressing a button of an open window brings that window back instead
+    for opener in OPENERS:
+        window = getattr(app, opener)()
+        pump(root, dwell)
+        if getattr(app, opener)() is not window:
+            errors.append(f"{opener} opened a second window")
+        close(window, True)
+        if app.windows:
+            errors.append(f"{opener}: closed window still registered")
+
+    timeline = []
+    every = max(cycles // checkpoints, 1)
+    for cycle in range(1, warmup + cycles + 1):
+        for i, opener in enumerate(OPENERS):
+            window = getattr(app, opener)()
+            pump(root, dwell)
+            close(window, (cycle + i) % 2 == 0)
+        if cycle >= warmup and (cycle - warmup) % every == 0:
+            point = measure(root, me, settle)
+            point['cycle'] = cycle - warmup
+            timeline.append(point)
+            print(f"cycle {point['cycle']:>5}: {point['rss_mb']:7.1f} MB, {point['threads']} threads, "
+                  f"{point['figures']} figures", file=sys.stderr)
+    root.destroy()
+    return timeline, errors
+
+
+def check(timeline, max_rss_growth):
+    # Errors for growth between the first and last measurement
+    first, last = timeline[0], timeline[-1]
+    growth = last['rss_mb'] - first['rss_mb']
+    errors = []
+    if growth > max_rss_growth:
+        errors.append(f"RSS grew by {growth:.1f} MB")
+    if last['threads'] > first['threads']:
+        errors.append(f"{last['threads'] - first['threads']} more threads")
+    if last['figures'] > first['figures']:
+        errors.append(f"{last['figures'] - first['figures']} figures still alive")
+    return errors
+
+
+def soak(cycles, dwell=0.05, warmup=20, checkpoints=10, settle=1.0, max_rss_growth=20.0):
+    # Runs the soak on fake data; returns (timeline, errors). Raises
+    # tkinter.TclError without a display.
+    os.environ['NVIDIA_SMI'] = FAKE_NVIDIA_SMI
+    with fake_psutil(cores=psutil.cpu_count(), disks=4, processes=300):
+        timeline, errors = run(cycles, dwell, warmup, checkpoints, settle)
+    return timeline, errors + check(timeline, max_rss_growth)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open and close every dashboard window, checking for leaks")
+    parser.add_argument('--cycles', type=int, default=1000, help="times every window is opened and closed")
+    parser.add_argument('--dwell', type=float, default=0.05, help="seconds each window stays open")
+    parser.add_argument('--warmup', type=int, default=20, help="cycles before the baseline is taken")
+    parser.add_argument('--checkpoints', type=int, default=10)
+    parser.add_argument('--settle', type=float, default=1.0, help="seconds to wait before each measurement")
+    parser.add_argument('--max-rss-growth', type=float, default=20.0, help="MB")
+    args = parser.parse_args()
+
+    import tkinter as tk
+    try:
+        timeline, errors = soak(args.cycles, args.dwell, args.warmup, args.checkpoints, args.settle,
+                                args.max_rss_growth)
+    except tk.TclError as e:
+        print(f"needs a display: {e}")
+        sys.exit(2)
+
+    first, last = timeline[0], timeline[-1]
+    print(f"{args.cycles} cycles of {len(OPENERS)} windows: RSS {first['rss_mb']:.1f} -> {last['rss_mb']:.1f} MB "
+          f"({last['rss_mb'] - first['rss_mb']:+.1f}), threads {first['threads']} -> {last['threads']}, "
+          f"figures {first['figures']} -> {last['figures']}")
+    for error in errors:
+        print(f"FAIL: {error}")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
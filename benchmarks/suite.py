@@ -0,0 +1,308 @@
+# Every sampling and rendering benchmark in one run, with a JSON report that
+# can be compared between commits. Needs no display: matplotlib runs on Agg
+# and the open-windows case uses withdrawn Tk windows (skipped without Tk).
+#     python -m benchmarks.suite --output before.json
+#     python -m benchmarks.suite --output after.json --compare before.json --max-regression 20
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+import subprocess
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+import psutil
+
+from benchmarks import bench_gauge, bench_procfs
+from benchmarks.fake_psutil import fake_psutil
+from collector import METRICS, MetricsCollector, Sampler
+from history import MetricHistory
+from stats import MetricStats
+from alerts import AlertEngine, load_config
+from instrument import instruments
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# GPU samples come from the bundled fake nvidia-smi
+FAKE_NVIDIA_SMI = f'"{sys.executable}" "{os.path.join(ROOT, "gpu.py")}" --fake-gpus 2 --loop-ms 100'
+
+SCALES = {
+    'cores': ('cpu', (4, 64, 256, 1024)),
+    'disks': ('disk', (1, 16, 128, 512)),
+    'processes': ('processes', (100, 1000, 5000, 10000)),
+}
+QUICK_SCALES = {
+    'cores': ('cpu', (4, 256)),
+    'disks': ('disk', (1, 128)),
+    'processes': ('processes', (100, 2000)),
+}
+WINDOW_COUNTS = (1, 2, 4, 8)
+
+
+def summarize_ms(times):
+    times = sorted(t * 1000 for t in times)
+    return {
+        'median_ms': statistics.median(times),
+        'p95_ms': times[max(int(len(times) * 0.95) - 1, 0)],
+        'max_ms': times[-1],
+    }
+
+
+def time_calls(func, iterations):
+    times = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def bench_sample_latency(iterations):
+    # Cost of one sample of each metric group on this machine's real psutil
+    results = {}
+    for metric in METRICS:
+        sampler = Sampler()
+        sampler.sample((metric,))
+        if metric == 'gpu':
+            # Let the fake nvidia-smi print its first lines
+            time.sleep(0.5)
+        results[metric] = summarize_ms(time_calls(lambda: sampler.sample((metric,)), iterations))
+        if sampler.gpu_stream is not None:
+            sampler.gpu_stream.stop()
+    return results
+
+
+def bench_scaling(scales, iterations):
+    # One collector tick and what the shared consumers do with it, on fake
+    # machines of growing size
+    rules, _ = load_config(None)
+    results = {}
+    for case, (metric, sizes) in scales.items():
+        results[case] = {}
+        for size in sizes:
+            with fake_psutil(**{case: size}):
+                sampler = Sampler()
+                history = MetricHistory()
+                stats = MetricStats()
+                alerts = AlertEngine(rules)
+                stages = {'sample': [], 'history': [], 'stats': [], 'alerts': []}
+                for i in range(iterations + 1):
+                    started = time.perf_counter()
+                    snapshot = sampler.sample((metric,))
+                    sampled = time.perf_counter()
+                    history.append(snapshot)
+                    recorded = time.perf_counter()
+                    stats.append(snapshot)
+                    summarized = time.perf_counter()
+                    alerts.evaluate(snapshot)
+                    done = time.perf_counter()
+                    if i:
+                        # The first tick only primes the counters
+                        stages['sample'].append(sampled - started)
+                        stages['history'].append(recorded - sampled)
+                        stages['stats'].append(summarized - recorded)
+                        stages['alerts'].append(done - summarized)
+            result = {stage: statistics.median(times) * 1000 for stage, times in stages.items()}
+            result['tick_ms'] = sum(result.values())
+            results[case][str(size)] = result
+    return results
+
+
+def bench_gauge_frames(frames):
+    return {result['name']: {key: value for key, value in result.items() if key not in ('name', 'frames')}
+            for result in bench_gauge.run(frames)}
+
+
+def bench_procfs_ticks(cores, seconds):
+    # psutil against the /proc fast path at 100 Hz on generated /proc trees
+    if not os.path.exists('/proc/stat'):
+        return {'skipped': "no /proc"}
+    return bench_procfs.run(cores, seconds)
+
+
+def bench_process(duration, interval):
+    # CPU and RSS of this process over time while a collector feeds the
+    # history, statistics and alert rules from a fake 64-core machine
+    me = psutil.Process()
+    timeline = []
+    with fake_psutil(cores=64, disks=8, processes=1000):
+        collector = MetricsCollector(interval)
+        history = MetricHistory()
+        stats = MetricStats()
+        alerts = AlertEngine(load_config(None)[0])
+        for callback in (history.append, stats.append, alerts.evaluate):
+            collector.subscribe(callback, metrics=('cpu', 'memory', 'disk', 'processes', 'net'))
+        me.cpu_percent()
+        started = time.monotonic()
+        while time.monotonic() - started < duration:
+            time.sleep(0.5)
+            timeline.append({'t': round(time.monotonic() - started, 2),
+                             'cpu_percent': me.cpu_percent(),
+                             'rss_mb': me.memory_info().rss / 2 ** 20})
+        for token in list(collector.subscribers):
+            collector.unsubscribe(token)
+    rss = [point['rss_mb'] for point in timeline]
+    return {
+        'timeline': timeline,
+        'mean_cpu_percent': statistics.mean(point['cpu_percent'] for point in timeline),
+        'max_rss_mb': max(rss),
+        'rss_growth_mb': rss[-1] - rss[0],
+    }
+
+
+def bench_windows(counts, duration):
+    # Dashboards in withdrawn Toplevels driven by fake data; withdrawn
+    # windows still sample, lay out and render on every tick. The fake has
+    # as many cores as this machine, which the CPU heatmap is sized for.
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        return {'skipped': str(e)}
+    root.withdraw()
+
+    from cpu_dashboard import CpuDashboard
+    from ram_dashboard import RamDashboard
+    from disk_dashboard import DiskDashboard
+    from network_dashboard import NetworkDashboard
+    kinds = (CpuDashboard, RamDashboard, DiskDashboard, NetworkDashboard)
+
+    me = psutil.Process()
+    results = {}
+    with fake_psutil(cores=psutil.cpu_count(), disks=4, processes=500):
+        for count in counts:
+            windows = []
+            for i in range(count):
+                window = tk.Toplevel(root)
+                window.withdraw()
+                kinds[i % len(kinds)](window)
+                windows.append(window)
+            instruments.reset()
+            me.cpu_percent()
+            started = time.monotonic()
+            while time.monotonic() - started < duration:
+                root.update()
+                time.sleep(0.01)
+            frames = {s.name: s for s in instruments.summaries()}.get('tk.frame')
+            results[str(count)] = {
+                'cpu_percent': me.cpu_percent(),
+                'rss_mb': me.memory_info().rss / 2 ** 20,
+                'frame_p50_ms': frames.p50_ms if frames else None,
+                'frame_p95_ms': frames.p95_ms if frames else None,
+            }
+            for window in windows:
+                window.destroy()
+            root.update()
+    root.destroy()
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(results, prefix=''):
+    # {'a': {'b': 1.0}} -> {'a.b': 1.0}; timelines and skips are left out
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def compare(baseline, report, max_regression, min_delta):
+    # Every metric is a cost, so higher is worse. Changes smaller than
+    # min_delta (ms, % or MB) are noise and never count. Returns the regressions.
+    old = baseline['metrics']
+    new = report['metrics']
+    regressions = []
+    print(f"{'metric':<52} {'before':>10} {'after':>10} {'change':>8}")
+    for name in sorted(set(old) & set(new)):
+        before, after = old[name], new[name]
+        change = (after - before) / before * 100 if before else 0.0
+        flag = ""
+        if max_regression and change > max_regression and after - before > min_delta:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<52} {before:10.3f} {after:10.3f} {change:+7.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sampling and rendering benchmark suite")
+    parser.add_argument('--output', help="write the JSON report here (default: stdout)")
+    parser.add_argument('--quick', action='store_true', help="fewer iterations and smaller scales")
+    parser.add_argument('--compare', metavar='REPORT', help="baseline report to compare against")
+    parser.add_argument('--max-regression', type=float, default=0,
+                        help="exit with an error if a metric got this many percent worse (0 disables)")
+    parser.add_argument('--min-delta', type=float, default=0.05,
+                        help="ignore changes smaller than this in absolute terms (ms, %% or MB)")
+    parser.add_argument('--skip', default='', help="comma-separated cases to leave out: "
+                        "sample_latency, scaling, gauge, procfs, process, windows")
+    args = parser.parse_args()
+
+    os.environ['NVIDIA_SMI'] = FAKE_NVIDIA_SMI
+    iterations = 10 if args.quick else 50
+    skip = {case.strip() for case in args.skip.split(',') if case.strip()}
+
+    cases = {
+        'sample_latency': lambda: bench_sample_latency(iterations),
+        'scaling': lambda: bench_scaling(QUICK_SCALES if args.quick else SCALES, iterations),
+        'gauge': lambda: bench_gauge_frames(100 if args.quick else 300),
+        'procfs': lambda: bench_procfs_ticks((16, 256) if args.quick else (16, 64, 256, 1024),
+                                             1 if args.quick else 3),
+        'process': lambda: bench_process(5 if args.quick else 30, 0.5),
+        # Last: the dashboards' collector keeps running afterwards
+        'windows': lambda: bench_windows(WINDOW_COUNTS[:2] if args.quick else WINDOW_COUNTS,
+                                         3 if args.quick else 10),
+    }
+    results = {}
+    for name, case in cases.items():
+        if name in skip:
+            continue
+        print(f"running {name}...", file=sys.stderr)
+        results[name] = case()
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.time(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'psutil': psutil.__version__,
+            'numpy': np.__version__,
+            'matplotlib': matplotlib.__version__,
+            'quick': args.quick,
+        },
+        'results': results,
+        'metrics': flatten(results),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.max_regression, args.min_delta)
+        if regressions:
+            print(f"{len(regressions)} metrics regressed by more than {args.max_regression:g}%")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+import os
+import time
+from collections import namedtuple
+import psutil
+from hardware import parse_cpulist, read_text
+from rates import CounterRates, scalar_delta
+
+# cgroup v2 readings. Inside a container psutil reports the whole host, so a
+# container limited to 2 CPUs and 4 GiB looks idle right up until the OOM
+# killer strikes. CgroupTracker reads the usage and limits of one cgroup
+# (by default the one this process runs in); CgroupTree ranks the children
+# of any cgroup for the browser. Both take the cgroupfs mount as root, so a
+# copy of another machine's hierarchy can be read too.
+
+CGROUP_ROOT = '/sys/fs/cgroup'
+
+# Hybrid hosts mount the v2 hierarchy here next to the v1 controllers
+HYBRID_ROOT = '/sys/fs/cgroup/unified'
+
+# Seconds between re-reads of cpu.max, memory.max and the cpuset; limits
+# change rarely (docker update, systemctl set-property)
+LIMITS_INTERVAL = 10.0
+
+# Seconds a directory listing is reused before the directory is listed
+# again; cgroupfs does not update a directory's mtime when children come
+# and go, so new cgroups show up within this time
+LIST_INTERVAL = 30.0
+
+# Children read per CgroupTree.rank call; the rest keep their previous
+# readings and are read on the following calls, so a parent with thousands
+# of children costs the same per refresh as one with a hundred
+SCAN_BUDGET = 128
+
+# cpu.stat and io.stat counters, in the order they are rated
+CPU_FIELDS = ('usage_usec', 'nr_periods', 'nr_throttled', 'throttled_usec')
+IO_FIELDS = ('rbytes', 'wbytes', 'rios', 'wios')
+
+# One cgroup against its limits. cpu_percent is a percent of cpu_limit
+# CPUs; throttled_percent is the share of CFS periods that hit the quota,
+# throttled_ms the milliseconds per second spent throttled. memory_used is
+# the working set (memory.current less inactive file cache, what the OOM
+# killer cannot reclaim) and memory_max the effective limit, the host's
+# memory when there is none.
+CgroupStats = namedtuple('CgroupStats', ['path', 'cpu_percent', 'cpu_limit', 'throttled_percent', 'throttled_ms',
+                                         'memory_used', 'memory_current', 'memory_max', 'memory_percent',
+                                         'read_bps', 'write_bps', 'read_iops', 'write_iops'])
+
+# One child cgroup in the browser; rates are None until it was read twice.
+# cpu_percent is in percent of one CPU, like top.
+CgroupUsage = namedtuple('CgroupUsage', ['path', 'name', 'cpu_percent', 'memory', 'io_bps', 'throttled_percent'])
+
+# Orders the browser can rank children by
+RANK_FIELDS = {'cpu': 'cpu_percent', 'memory': 'memory', 'io': 'io_bps', 'throttling': 'throttled_percent'}
+
+
+def find_root(root=None):
+    # The cgroup v2 mount: root, $DASHBOARD_CGROUP_ROOT, or the usual places.
+    # Raises OSError where only cgroup v1 (or no cgroupfs) is mounted.
+    root = root or os.environ.get('DASHBOARD_CGROUP_ROOT')
+    if root:
+        if not os.path.isdir(root):
+            raise OSError(f"No cgroup hierarchy at {root}")
+        return root
+    for path in (CGROUP_ROOT, HYBRID_ROOT):
+        if os.path.exists(os.path.join(path, 'cgroup.controllers')):
+            return path
+    raise OSError("No cgroup v2 hierarchy mounted")
+
+
+def current_cgroup(proc_root='/proc'):
+    # This process's cgroup, relative to the v2 root: '0::/system.slice/x'
+    text = read_text(os.path.join(proc_root, 'self/cgroup')) or ''
+    for line in text.splitlines():
+        if line.startswith('0::'):
+            return line[3:]
+    raise OSError("This process is not in a cgroup v2 hierarchy")
+
+
+def read_keyed(path):
+    # 'key value' lines (cpu.stat, memory.stat) -> {key: int}; {} if missing
+    values = {}
+    for line in (read_text(path) or '').splitlines():
+        key, _, value = line.partition(' ')
+        if value.isdigit():
+            values[key] = int(value)
+    return values
+
+
+def read_value(path):
+    # A single number (memory.current, memory.max); None for 'max' or missing
+    text = read_text(path)
+    return int(text) if text and text.isdigit() else None
+
+
+def read_io(path):
+    # io.stat summed over devices: one '8:0 rbytes=1 wbytes=2 ...' line each
+    totals = dict.fromkeys(IO_FIELDS, 0)
+    for line in (read_text(path) or '').splitlines():
+        for pair in line.split()[1:]:
+            key, _, value = pair.partition('=')
+            if key in totals:
+                totals[key] += int(value)
+    return totals
+
+
+def lineage(root, cgroup):
+    # Directories of cgroup and each of its ancestors, up to the root
+    parts = [part for part in cgroup.split('/') if part]
+    for depth in range(len(parts), -1, -1):
+        yield os.path.join(root, *parts[:depth])
+
+
+def cpu_limit(root, cgroup):
+    # CPUs the cgroup may use: the tightest cpu.max quota between it and
+    # the root, or its effective cpuset when that is smaller
+    path = os.path.join(root, cgroup.lstrip('/'))
+    cpus = float(len(parse_cpulist(read_text(os.path.join(path, 'cpuset.cpus.effective')) or ''))
+                 or psutil.cpu_count() or 1)
+    for directory in lineage(root, cgroup):
+        quota, _, period = (read_text(os.path.join(directory, 'cpu.max')) or 'max').partition(' ')
+        if quota != 'max':
+            cpus = min(cpus, int(quota) / int(period or 100000))
+    return cpus
+
+
+def memory_limit(root, cgroup):
+    # The tightest memory.max between the cgroup and the root, in bytes,
+    # and never more than the host has
+    limit = psutil.virtual_memory().total
+    for directory in lineage(root, cgroup):
+        value = read_value(os.path.join(directory, 'memory.max'))
+        if value is not None:
+            limit = min(limit, value)
+    return limit
+
+
+class CgroupTracker:
+    def __init__(self, cgroup=None, root=None, limits_interval=LIMITS_INTERVAL):
+        # cgroup is a path below the root such as '/system.slice/app.service',
+        # by default this process's. Raises OSError without cgroup v2.
+        self.root = find_root(root)
+        self.cgroup = cgroup or current_cgroup()
+        self.path = os.path.join(self.root, self.cgroup.lstrip('/'))
+        if not os.path.isdir(self.path):
+            raise OSError(f"No cgroup {self.cgroup} under {self.root}")
+        self.limits_interval = limits_interval
+        self.limits_read = None
+        self.cpu_limit = None
+        self.memory_max = None
+        self.rates = CounterRates()
+
+        # Primed here so the first sample already has rates
+        self.sample()
+
+    def refresh_limits(self, now):
+        if self.limits_read is None or now - self.limits_read >= self.limits_interval:
+            self.cpu_limit = cpu_limit(self.root, self.cgroup)
+            self.memory_max = memory_limit(self.root, self.cgroup)
+            self.limits_read = now
+
+    def sample(self):
+        now = time.monotonic()
+        self.refresh_limits(now)
+        cpu = read_keyed(os.path.join(self.path, 'cpu.stat'))
+        io = read_io(os.path.join(self.path, 'io.stat'))
+        counters = [cpu.get(field, 0) for field in CPU_FIELDS] + [io[field] for field in IO_FIELDS]
+        rates = dict(self.rates.known_rows(['cgroup'], [counters], now)).get('cgroup')
+        usage, periods, throttled, throttled_usec, read_bps, write_bps, read_iops, write_iops = rates or [0.0] * 8
+
+        current = read_value(os.path.join(self.path, 'memory.current'))
+        if current is None:
+            # The root cgroup, or no memory controller: the host's usage
+            ram = psutil.virtual_memory()
+            current = used = ram.total - ram.available
+        else:
+            inactive = read_keyed(os.path.join(self.path, 'memory.stat')).get('inactive_file', 0)
+            used = max(current - inactive, 0)
+
+        return CgroupStats(
+            path=self.cgroup,
+            # usage_usec per second / 10^4 is percent of one CPU
+            cpu_percent=round(usage / 1e4 / self.cpu_limit, 1),
+            cpu_limit=self.cpu_limit,
+            throttled_percent=throttled / periods * 100 if periods else 0.0,
+            throttled_ms=throttled_usec / 1000,
+            memory_used=used,
+            memory_current=current,
+            memory_max=self.memory_max,
+            memory_percent=round(used / self.memory_max * 100, 1),
+            read_bps=read_bps,
+            write_bps=write_bps,
+            read_iops=read_iops,
+            write_iops=write_iops,
+        )
+
+
+class CgroupTree:
+    def __init__(self, root=None, list_interval=LIST_INTERVAL, budget=SCAN_BUDGET):
+        # Only cgroups whose children are asked for are ever listed or
+        # read, so a large hierarchy costs what the open branches cost
+        self.root = find_root(root)
+        self.list_interval = list_interval
+        self.budget = budget
+
+        # cgroup -> (monotonic time listed, child names)
+        self.listings = {}
+
+        # cgroup -> index of the next child to read
+        self.cursors = {}
+
+        # child path -> (monotonic time, counters) of its last reading, and
+        # the CgroupUsage computed from it
+        self.previous = {}
+        self.usage = {}
+
+    def directory(self, cgroup):
+        return os.path.join(self.root, cgroup.lstrip('/'))
+
+    def children(self, cgroup):
+        # Names of the child cgroups, listed again after list_interval
+        now = time.monotonic()
+        listed = self.listings.get(cgroup)
+        if listed is not None and now - listed[0] < self.list_interval:
+            return listed[1]
+        try:
+            with os.scandir(self.directory(cgroup)) as entries:
+                names = sorted(entry.name for entry in entries if entry.is_dir(follow_symlinks=False))
+        except OSError:
+            names = []
+        if listed is not None:
+            for name in set(listed[1]) - set(names):
+                self.forget(self.join(cgroup, name))
+        self.listings[cgroup] = (now, names)
+        return names
+
+    def join(self, cgroup, name):
+        return cgroup.rstrip('/') + '/' + name
+
+    def read(self, path):
+        # Reads one child and updates its usage; False once it is gone
+        directory = self.directory(path)
+        cpu = read_keyed(os.path.join(directory, 'cpu.stat'))
+        if not cpu:
+            return False
+        io = read_io(os.path.join(directory, 'io.stat'))
+        now = time.monotonic()
+        counters = (cpu.get('usage_usec', 0), cpu.get('nr_periods', 0), cpu.get('nr_throttled', 0),
+                    io['rbytes'] + io['wbytes'])
+        memory = read_value(os.path.join(directory, 'memory.current'))
+
+        cpu_percent = io_bps = throttled_percent = None
+        previous = self.previous.get(path)
+        if previous is not None and now > previous[0]:
+            elapsed = now - previous[0]
+            usage, periods, throttled, io_bytes = (scalar_delta(p, c) for p, c in zip(previous[1], counters))
+            cpu_percent = usage / elapsed / 1e4
+            io_bps = io_bytes / elapsed
+            throttled_percent = throttled / periods * 100 if periods else 0.0
+        self.previous[path] = (now, counters)
+        self.usage[path] = CgroupUsage(path, path.rsplit('/', 1)[-1], cpu_percent, memory, io_bps, throttled_percent)
+        return True
+
+    def rank(self, cgroup, by='cpu', limit=None):
+        # CgroupUsage of the children of cgroup, highest first by one of
+        # RANK_FIELDS. At most budget children are read per call, going
+        # round the list; children not read yet are ranked last.
+        names = self.children(cgroup)
+        if names:
+            start = self.cursors.get(cgroup, 0) % len(names)
+            batch = (names[start:] + names[:start])[:self.budget]
+            self.cursors[cgroup] = start + len(batch)
+            for name in batch:
+                path = self.join(cgroup, name)
+                if not self.read(path):
+                    self.forget(path)
+
+        field = RANK_FIELDS[by]
+        usage = [self.usage[path] for path in (self.join(cgroup, name) for name in names) if path in self.usage]
+        usage.sort(key=lambda child: -1 if getattr(child, field) is None else getattr(child, field), reverse=True)
+        return usage[:limit] if limit else usage
+
+    def forget(self, path):
+        # Drops a cgroup that went away, and everything read below it
+        self.previous.pop(path, None)
+        self.usage.pop(path, None)
+        self.collapse(path)
+
+    def collapse(self, cgroup):
+        # Stops listing and reading below cgroup, e.g. a branch the browser closed
+        prefix = cgroup.rstrip('/') + '/'
+        self.listings.pop(cgroup, None)
+        self.cursors.pop(cgroup, None)
+        for table in (self.previous, self.usage, self.listings, self.cursors):
+            for key in [key for key in table if key.startswith(prefix)]:
+                del table[key]
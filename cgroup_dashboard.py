@@ -0,0 +1,213 @@
+import tkinter as tk
+from tkinter import ttk
+from collector import get_collector
+from render_scheduler import get_scheduler, bind_close, bind_visibility
+from cgroup import CgroupTree
+
+COLUMNS = (
+    ('cpu', "CPU", 80),
+    ('memory', "Memory", 100),
+    ('io', "Disk I/O", 100),
+    ('throttled', "Throttled", 80),
+)
+
+RANK_NAMES = {'CPU': 'cpu', 'Memory': 'memory', 'Disk I/O': 'io', 'Throttling': 'throttling'}
+
+# Children shown per open cgroup, busiest first
+ROW_LIMIT = 100
+
+
+class CgroupDashboard:
+    def __init__(self, root, refresh_ms=2000):
+        # The cgroup this process runs in against its limits, and a browser
+        # of the cgroup tree ranking the children of every open branch
+        self.root = root
+        self.root.title("Cgroups")
+        self.root.geometry("700x700")
+        self.refresh_ms = refresh_ms
+        
+        # Configure dark theme colors
+        self.bg_color = "#1E1E1E"  # Dark background
+        self.fg_color = "#FFFFFF"  # White text
+        self.accent_color = "#00FF9D"  # Neon green accent
+        self.frame_bg = "#2D2D2D"  # Slightly lighter background for frames
+        
+        # Configure root window
+        self.root.configure(bg=self.bg_color)
+        
+        # Configure ttk styles
+        self.style = ttk.Style()
+        self.style.configure("TFrame", background=self.bg_color)
+        self.style.configure("TLabelframe", background=self.frame_bg, foreground=self.fg_color)
+        self.style.configure("TLabelframe.Label", background=self.frame_bg, foreground=self.accent_color)
+        self.style.configure("TLabel", background=self.frame_bg, foreground=self.fg_color)
+        self.style.configure("Cgroup.Treeview", background=self.frame_bg, fieldbackground=self.frame_bg,
+                             foreground=self.fg_color, rowheight=20)
+        
+        # Create main frame
+        self.main_frame = ttk.Frame(root)
+        self.main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+        
+        # Create current cgroup frame
+        self.usage_frame = ttk.LabelFrame(self.main_frame, text="This Cgroup")
+        self.usage_frame.pack(fill=tk.X, pady=10)
+        
+        self.path_label = ttk.Label(self.usage_frame, text="Cgroup: N/A")
+        self.path_label.pack(pady=2)
+        
+        self.cpu_label = ttk.Label(self.usage_frame, text="CPU: N/A")
+        self.cpu_label.pack(pady=2)
+        
+        self.throttled_label = ttk.Label(self.usage_frame, text="Throttled: N/A")
+        self.throttled_label.pack(pady=2)
+        
+        self.memory_label = ttk.Label(self.usage_frame, text="Memory: N/A")
+        self.memory_label.pack(pady=2)
+        
+        self.io_label = ttk.Label(self.usage_frame, text="Disk I/O: N/A")
+        self.io_label.pack(pady=2)
+        
+        # Create cgroup tree frame
+        self.tree_frame = ttk.LabelFrame(self.main_frame, text="Child Cgroups")
+        self.tree_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+        
+        controls = ttk.Frame(self.tree_frame)
+        controls.pack(fill=tk.X, padx=5, pady=2)
+        ttk.Label(controls, text="Rank by").pack(side=tk.LEFT)
+        self.rank_by = tk.StringVar(value="CPU")
+        rank_box = ttk.Combobox(controls, textvariable=self.rank_by, values=list(RANK_NAMES),
+                                state="readonly", width=12)
+        rank_box.pack(side=tk.LEFT, padx=5)
+        rank_box.bind("<<ComboboxSelected>>", lambda event: self.update_rows())
+        
+        self.tree = ttk.Treeview(self.tree_frame, columns=[c[0] for c in COLUMNS], style="Cgroup.Treeview")
+        self.tree.heading('#0', text="Cgroup")
+        self.tree.column('#0', width=260)
+        for key, heading, width in COLUMNS:
+            self.tree.heading(key, text=heading)
+            self.tree.column(key, width=width, anchor="e")
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.tree.bind("<<TreeviewOpen>>", self.on_open)
+        self.tree.bind("<<TreeviewClose>>", self.on_close)
+        
+        # Branches are only listed and read while open; '/' always is.
+        # Row ids are cgroup paths, and a path with a trailing slash is the
+        # placeholder that makes a closed branch expandable.
+        try:
+            self.cgroups = CgroupTree()
+        except OSError as e:
+            self.cgroups = None
+            self.tree_frame.configure(text=f"Child Cgroups: {e}")
+        self.open_paths = {'/'}
+        
+        # Widget updates go through the main-thread scheduler
+        self.scheduler = get_scheduler(self.root)
+        
+        # Subscribe to the shared collector
+        self.collector = get_collector()
+        self.subscription = self.collector.subscribe(self.update_metrics, metrics=('cgroup',))
+        
+        # Stop sampling for this window while it is hidden
+        bind_visibility(self.root, lambda visible: self.collector.set_active(self.subscription, visible))
+        
+        self.after_id = None
+        bind_close(self.root, self.close)
+        self.refresh()
+    
+    def format_bytes(self, bytes):
+        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+            if bytes < 1024.0:
+                return f"{bytes:.1f} {unit}"
+            bytes /= 1024.0
+        return f"{bytes:.1f} PB"
+    
+    def update_metrics(self, snapshot):
+        stats = snapshot.cgroup
+        if stats is None:
+            self.scheduler.configure(self.path_label, text="Cgroup: no cgroup v2 hierarchy")
+            return
+        
+        self.scheduler.configure(self.path_label, text=f"Cgroup: {stats.path}")
+        self.scheduler.configure(self.cpu_label, text=f"CPU: {stats.cpu_percent:.1f}% of {stats.cpu_limit:g} CPUs")
+        self.scheduler.configure(self.throttled_label,
+                                 text=f"Throttled: {stats.throttled_percent:.1f}% of periods, "
+                                      f"{stats.throttled_ms:.0f} ms/s")
+        self.scheduler.configure(self.memory_label,
+                                 text=f"Memory: {self.format_bytes(stats.memory_used)} of "
+                                      f"{self.format_bytes(stats.memory_max)} ({stats.memory_percent:.1f}%), "
+                                      f"{self.format_bytes(stats.memory_current)} with page cache")
+        self.scheduler.configure(self.io_label,
+                                 text=f"Disk I/O: read {self.format_bytes(stats.read_bps)}/s, "
+                                      f"write {self.format_bytes(stats.write_bps)}/s "
+                                      f"({stats.read_iops:.0f}/{stats.write_iops:.0f} IOPS)")
+    
+    def refresh(self):
+        self.update_rows()
+        self.after_id = self.root.after(self.refresh_ms, self.refresh)
+    
+    def update_rows(self):
+        if self.cgroups is None:
+            return
+        # Parents first, so a branch dropped with its parent is skipped
+        for path in sorted(self.open_paths, key=len):
+            if path in self.open_paths:
+                self.update_children(path)
+    
+    def update_children(self, parent):
+        by = RANK_NAMES[self.rank_by.get()]
+        children = self.cgroups.rank(parent, by, ROW_LIMIT)
+        parent_item = '' if parent == '/' else parent
+        
+        shown = {child.path for child in children}
+        for item in self.tree.get_children(parent_item):
+            if item not in shown:
+                self.remove(item)
+        
+        for position, child in enumerate(children):
+            values = (
+                "..." if child.cpu_percent is None else f"{child.cpu_percent:.1f}%",
+                "N/A" if child.memory is None else self.format_bytes(child.memory),
+                "..." if child.io_bps is None else f"{self.format_bytes(child.io_bps)}/s",
+                "..." if child.throttled_percent is None else f"{child.throttled_percent:.1f}%",
+            )
+            if self.tree.exists(child.path):
+                self.tree.item(child.path, values=values)
+                self.tree.move(child.path, parent_item, position)
+            else:
+                self.tree.insert(parent_item, position, iid=child.path, text=child.name, values=values)
+                self.tree.insert(child.path, tk.END, iid=child.path + '/', text="...")
+    
+    def remove(self, item):
+        # A row that left the ranking, with any open branches below it
+        if item.endswith('/'):
+            self.tree.delete(item)
+            return
+        for path in [path for path in self.open_paths if path == item or path.startswith(item + '/')]:
+            self.open_paths.discard(path)
+        self.cgroups.collapse(item)
+        self.tree.delete(item)
+    
+    def on_open(self, event):
+        item = self.tree.focus()
+        if not item or item in self.open_paths:
+            return
+        if self.tree.exists(item + '/'):
+            self.tree.delete(item + '/')
+        self.open_paths.add(item)
+        self.update_children(item)
+    
+    def on_close(self, event):
+        item = self.tree.focus()
+        if item not in self.open_paths:
+            return
+        for child in self.tree.get_children(item):
+            self.remove(child)
+        self.open_paths.discard(item)
+        self.cgroups.collapse(item)
+        self.tree.insert(item, tk.END, iid=item + '/', text="...")
+    
+    def close(self):
+        self.collector.unsubscribe(self.subscription)
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
@@ -0,0 +1,524 @@
+import os
+import psutil
+import time
+import threading
+import traceback
+from collections import namedtuple
+from gpu import NvidiaSmiStream
+from processes import ProcessTable
+from diskio import DiskIOTracker
+from network import NetworkTracker, tcp_states
+from instrument import callable_name, timed
+
+# Metric groups a subscriber can ask for
+METRICS = ('cpu', 'memory', 'disk', 'gpu', 'processes', 'net', 'tcp', 'cgroup', 'pressure')
+
+# Snapshot fields filled in by each metric group
+GROUP_FIELDS = {
+    'cpu': ('cpu_percent', 'per_core', 'cpu_freq'),
+    'memory': ('memory', 'swap'),
+    'disk': ('disk_usage', 'disk_io', 'disks', 'mounts'),
+    'gpu': ('gpus',),
+    'processes': ('processes',),
+    'net': ('nics',),
+    'tcp': ('tcp_states',),
+    'cgroup': ('cgroup',),
+    'pressure': ('pressure', 'vm'),
+}
+
+# Seconds between samples of each group, multiplied by the collector's
+# interval. Slow-changing, expensive groups are sampled less often.
+METRIC_INTERVALS = {'cpu': 1.0, 'memory': 1.0, 'disk': 1.0, 'gpu': 1.0, 'processes': 2.0, 'net': 1.0, 'tcp': 5.0,
+                    'cgroup': 1.0, 'pressure': 1.0}
+
+# While a reading is at or above its threshold the group is sampled every
+# BURST_INTERVAL seconds, until BURST_DURATION seconds after it drops again
+BURST_THRESHOLDS = {'cpu': 90.0, 'memory': 90.0, 'gpu': 90.0}
+BURST_INTERVAL = 0.1
+BURST_DURATION = 10.0
+
+# Seconds over which the collector's own overhead is measured
+OVERHEAD_WINDOW = 10.0
+
+MemoryInfo = namedtuple('MemoryInfo', ['total', 'used', 'available', 'percent'])
+SwapInfo = namedtuple('SwapInfo', ['total', 'used', 'free', 'percent'])
+DiskUsage = namedtuple('DiskUsage', ['total', 'used', 'free', 'percent'])
+DiskIO = namedtuple('DiskIO', ['read_bytes', 'write_bytes'])
+
+# Immutable view of one collector tick. Fields belonging to metric groups
+# nobody subscribed to are left as None.
+Snapshot = namedtuple('Snapshot', [
+    'timestamp',
+    'cpu_percent',
+    'per_core',
+    'cpu_freq',
+    'memory',
+    'swap',
+    'disk_usage',
+    'disk_io',
+    'disks',
+    'mounts',
+    'gpus',
+    'processes',
+    'nics',
+    'tcp_states',
+    'cgroup',
+    'pressure',
+    'vm',
+    'sampled',
+])
+
+# The collector's cost: samples/s, CPU spent sampling and notifying
+# subscribers, and CPU of the whole process, all in percent of one core
+Overhead = namedtuple('Overhead', ['samples_per_second', 'collector_cpu_percent', 'process_cpu_percent',
+                                   'active_metrics', 'bursting'])
+
+
+def snapshot_series(snapshot, groups=None):
+    # Flatten a snapshot into (series name, value) pairs for the history,
+    # skipping metric groups that were not sampled. groups limits the
+    # output further, e.g. to snapshot.sampled for only fresh readings.
+    if groups is None:
+        groups = METRICS
+    if snapshot.cpu_percent is not None and 'cpu' in groups:
+        yield 'cpu.percent', snapshot.cpu_percent
+        for i, usage in enumerate(snapshot.per_core):
+            yield f'cpu.core.{i}', usage
+        if snapshot.cpu_freq is not None:
+            yield 'cpu.freq', snapshot.cpu_freq
+
+    if snapshot.memory is not None and 'memory' in groups:
+        yield 'memory.percent', snapshot.memory.percent
+        yield 'memory.used', snapshot.memory.used
+        yield 'swap.percent', snapshot.swap.percent
+
+    if snapshot.disk_usage is not None and 'disk' in groups:
+        yield 'disk.percent', snapshot.disk_usage.percent
+        for disk in snapshot.disks:
+            for field in ('read_bps', 'write_bps', 'read_iops', 'write_iops', 'latency_ms', 'busy_percent'):
+                yield f'disk.{disk.name}.{field}', getattr(disk, field)
+        for mount in snapshot.mounts:
+            yield f'mount.{mount.mountpoint}.percent', mount.percent
+
+    if snapshot.gpus and 'gpu' in groups:
+        utilization = [gpu.utilization for gpu in snapshot.gpus if gpu.utilization is not None]
+        if utilization:
+            yield 'gpu.percent', sum(utilization) / len(utilization)
+        for gpu in snapshot.gpus:
+            for field in ('utilization', 'memory_used', 'temperature', 'power'):
+                value = getattr(gpu, field)
+                if value is not None:
+                    yield f'gpu.{gpu.index}.{field}', value
+
+    if snapshot.nics is not None and 'net' in groups:
+        yield 'net.rx_bps', sum((nic.rx_bps for nic in snapshot.nics), 0.0)
+        yield 'net.tx_bps', sum((nic.tx_bps for nic in snapshot.nics), 0.0)
+        links = [nic.link_percent for nic in snapshot.nics if nic.link_percent is not None]
+        if links:
+            yield 'net.link_percent', max(links)
+        for nic in snapshot.nics:
+            for field in ('rx_bps', 'tx_bps', 'rx_pps', 'tx_pps', 'dropin', 'dropout', 'errin', 'errout'):
+                yield f'net.{nic.name}.{field}', getattr(nic, field)
+
+    if snapshot.cgroup is not None and 'cgroup' in groups:
+        for field in ('cpu_percent', 'throttled_percent', 'throttled_ms', 'memory_percent', 'memory_used',
+                      'read_bps', 'write_bps'):
+            yield f'cgroup.{field}', getattr(snapshot.cgroup, field)
+
+    if snapshot.vm is not None and 'pressure' in groups:
+        # PSI over the last 10 s and stalled ms/s; the 60 s and 300 s
+        # averages are smoothed versions of the same history
+        for resource, info in zip(('cpu', 'memory', 'io'), snapshot.pressure or ()):
+            if info is not None:
+                yield f'pressure.{resource}.some', info.some_avg10
+                yield f'pressure.{resource}.some_ms', info.some_ms
+                if info.full_avg10 is not None:
+                    yield f'pressure.{resource}.full', info.full_avg10
+                    yield f'pressure.{resource}.full_ms', info.full_ms
+        for field, value in snapshot.vm._asdict().items():
+            yield f'vm.{field}', value
+
+
+class Sampler:
+    # Readings of this machine; see sources.py for recorded and synthetic ones
+    live = True
+    interval = 1.0
+
+    def __init__(self, backend='psutil', container=False, cgroup=None):
+        # backend 'procfs' reads CPU, memory, disk and NIC counters straight
+        # from /proc with files kept open (Linux only, see procfs.py).
+        # container=True reports CPU and memory against the limits of cgroup
+        # (by default this process's) instead of the whole host; raises
+        # OSError without cgroup v2 (see cgroup.py).
+        self.proc = None
+        if backend == 'procfs':
+            from procfs import ProcReader
+            self.proc = ProcReader()
+            self.proc.cpu_percent()
+        elif backend == 'psutil':
+            # Prime psutil's cpu_percent state so the first reading is meaningful
+            psutil.cpu_percent()
+            psutil.cpu_percent(percpu=True)
+        else:
+            raise ValueError(f"Unknown sampling backend {backend!r}: expected psutil or procfs")
+        
+        # Started on first use; nvidia-smi keeps running and streams to us
+        self.gpu_stream = None
+        self.process_table = None
+        self.disk_tracker = None
+        self.network_tracker = None
+        
+        self.container = container
+        self.cgroup = cgroup
+        self.cgroup_tracker = None
+        self.cgroup_missing = False
+        self.pressure_tracker = None
+        self.pressure_missing = False
+        if container:
+            from cgroup import CgroupTracker
+            self.cgroup_tracker = CgroupTracker(cgroup)
+
+    def sample_cgroup(self):
+        # None where there is no cgroup v2, from then on without retrying
+        if self.cgroup_tracker is None and not self.cgroup_missing:
+            from cgroup import CgroupTracker
+            try:
+                self.cgroup_tracker = CgroupTracker(self.cgroup)
+            except OSError:
+                self.cgroup_missing = True
+        if self.cgroup_tracker is None:
+            return None
+        with timed('cgroup.stats'):
+            return self.cgroup_tracker.sample()
+
+    def sample(self, metrics):
+        values = dict.fromkeys(Snapshot._fields)
+        values['timestamp'] = time.time()
+        values['sampled'] = frozenset(metrics)
+
+        if 'cgroup' in metrics or (self.container and ('cpu' in metrics or 'memory' in metrics)):
+            values['cgroup'] = self.sample_cgroup()
+        cgroup = values['cgroup'] if self.container else None
+        if 'cgroup' not in metrics:
+            values['cgroup'] = None
+
+        if 'pressure' in metrics:
+            if self.pressure_tracker is None and not self.pressure_missing:
+                from pressure import PressureTracker
+                try:
+                    self.pressure_tracker = PressureTracker()
+                except OSError:
+                    # Not Linux: the group stays empty
+                    self.pressure_missing = True
+            if self.pressure_tracker is not None:
+                with timed('pressure.stats'):
+                    values['pressure'], values['vm'] = self.pressure_tracker.sample()
+
+        if 'cpu' in metrics:
+            if self.proc is not None:
+                with timed('procfs.stat'):
+                    values['cpu_percent'], values['per_core'] = self.proc.cpu_percent()
+            else:
+                with timed('psutil.cpu_percent'):
+                    values['cpu_percent'] = psutil.cpu_percent()
+                with timed('psutil.cpu_percent(percpu)'):
+                    values['per_core'] = tuple(psutil.cpu_percent(percpu=True))
+            with timed('psutil.cpu_freq'):
+                freq = psutil.cpu_freq()
+            values['cpu_freq'] = freq.current if freq else None
+            if cgroup is not None:
+                # Percent of the CPUs the container may use; the heatmap
+                # still shows the host's cores
+                values['cpu_percent'] = cgroup.cpu_percent
+
+        if 'memory' in metrics:
+            if self.proc is not None:
+                with timed('procfs.meminfo'):
+                    values['memory'], values['swap'] = self.proc.memory()
+            else:
+                with timed('psutil.virtual_memory'):
+                    ram = psutil.virtual_memory()
+                values['memory'] = MemoryInfo(ram.total, ram.used, ram.available, ram.percent)
+                with timed('psutil.swap_memory'):
+                    swap = psutil.swap_memory()
+                values['swap'] = SwapInfo(swap.total, swap.used, swap.free, swap.percent)
+            if cgroup is not None:
+                values['memory'] = MemoryInfo(cgroup.memory_max, cgroup.memory_used,
+                                              max(cgroup.memory_max - cgroup.memory_used, 0), cgroup.memory_percent)
+
+        if 'disk' in metrics:
+            with timed('psutil.disk_usage'):
+                usage = psutil.disk_usage('/')
+            values['disk_usage'] = DiskUsage(usage.total, usage.used, usage.free, usage.percent)
+            if self.disk_tracker is None:
+                self.disk_tracker = DiskIOTracker(self.proc and self.proc.disk_counters)
+            with timed('disk.devices'):
+                values['disks'] = self.disk_tracker.sample_devices()
+            values['disk_io'] = DiskIO(int(self.disk_tracker.read_bytes), int(self.disk_tracker.write_bytes))
+            with timed('disk.mounts'):
+                values['mounts'] = self.disk_tracker.sample_mounts()
+
+        if 'gpu' in metrics:
+            if self.gpu_stream is None:
+                self.gpu_stream = NvidiaSmiStream()
+                self.gpu_stream.start()
+            values['gpus'] = self.gpu_stream.samples()
+
+        if 'processes' in metrics:
+            if self.process_table is None:
+                self.process_table = ProcessTable()
+            with timed('processes.top'):
+                values['processes'] = self.process_table.top()
+
+        if 'net' in metrics:
+            if self.network_tracker is None:
+                self.network_tracker = NetworkTracker(counters=self.proc and self.proc.net_counters)
+            with timed('net.nics'):
+                values['nics'] = self.network_tracker.sample()
+
+        if 'tcp' in metrics:
+            with timed('net.tcp_states'):
+                values['tcp_states'] = tcp_states()
+
+        return Snapshot(**values)
+
+    def release(self, metrics):
+        # Nobody subscribes to metrics any more: stop what sampling them
+        # started, such as the nvidia-smi process
+        if 'gpu' in metrics and self.gpu_stream is not None:
+            self.gpu_stream.stop()
+            self.gpu_stream = None
+        if 'processes' in metrics:
+            self.process_table = None
+
+    def cpu_count(self, logical=True):
+        return psutil.cpu_count(logical=logical)
+
+    def topology(self):
+        from hardware import get_inventory
+        return list(get_inventory().topology)
+
+
+def burst_value(snapshot, metric):
+    # The reading compared against BURST_THRESHOLDS, or None
+    if metric == 'cpu':
+        return snapshot.cpu_percent
+    if metric == 'memory':
+        return snapshot.memory.percent
+    if metric == 'gpu':
+        utilization = [gpu.utilization for gpu in snapshot.gpus if gpu.utilization is not None]
+        return max(utilization) if utilization else None
+    return None
+
+
+class MetricsCollector:
+    def __init__(self, interval=1.0, intervals=None, source=None):
+        self.interval = interval
+        self.intervals = {metric: seconds * interval for metric, seconds in METRIC_INTERVALS.items()}
+        self.intervals.update(intervals or {})
+        self.source = source if source is not None else Sampler()
+
+        # Every wanted group, with groups not due this tick carried over
+        # from the tick that last sampled them
+        self.latest = None
+
+        # token -> [callback, metrics, active]
+        self.subscribers = {}
+        self.next_token = 0
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+
+        # Monotonic time each group is next due, and the end of its burst.
+        # present holds the groups that latest has values for.
+        self.next_due = {}
+        self.burst_until = {}
+        self.present = set()
+
+        # Groups whose last subscriber left, released on the collector thread
+        self.released = set()
+
+        self.overhead = Overhead(0.0, 0.0, 0.0, (), ())
+        self.window_start = None
+        self.window_samples = 0
+        self.window_busy = 0.0
+
+    def subscribe(self, callback, metrics=METRICS):
+        # Subscribing with metrics=() receives every snapshot without asking
+        # the collector to sample anything extra
+        unknown = set(metrics) - set(METRICS)
+        if unknown:
+            raise ValueError(f"Unknown metrics: {', '.join(sorted(unknown))}")
+
+        with self.lock:
+            token = self.next_token
+            self.next_token += 1
+            self.subscribers[token] = [callback, frozenset(metrics), True]
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='collector', daemon=True)
+                self.thread.start()
+
+        # Sample right away so a new window does not wait a full tick
+        self.wakeup.set()
+        return token
+
+    def unsubscribe(self, token):
+        with self.lock:
+            subscriber = self.subscribers.pop(token, None)
+            if subscriber is None:
+                return
+            self.released |= subscriber[1]
+        self.wakeup.set()
+
+    def take_released(self):
+        # Released groups nobody, visible or hidden, has subscribed to since
+        with self.lock:
+            subscribed = set()
+            for _, metrics, _ in self.subscribers.values():
+                subscribed |= metrics
+            released = self.released - subscribed
+            self.released = set()
+            return released
+
+    def set_active(self, token, active):
+        # Inactive subscribers (hidden windows) neither receive snapshots
+        # nor keep their metric groups sampled
+        with self.lock:
+            subscriber = self.subscribers.get(token)
+            if subscriber is None or subscriber[2] == active:
+                return
+            subscriber[2] = active
+        if active:
+            self.wakeup.set()
+
+    def set_interval(self, metric, seconds):
+        self.intervals[metric] = seconds
+        self.wakeup.set()
+
+    def wanted_metrics(self):
+        with self.lock:
+            wanted = set()
+            for _, metrics, active in self.subscribers.values():
+                if active:
+                    wanted |= metrics
+            return wanted
+
+    def interval_for(self, metric, now):
+        if now < self.burst_until.get(metric, 0.0):
+            return min(BURST_INTERVAL, self.intervals[metric])
+        return self.intervals[metric]
+
+    def run(self):
+        while True:
+            now = time.monotonic()
+            wanted = self.wanted_metrics()
+            released = self.take_released()
+            if released:
+                self.source.release(released)
+            # A little slack so groups on the same schedule share one tick
+            due = {metric for metric in wanted
+                   if self.next_due.get(metric, 0.0) <= now + 0.01 or metric not in self.present}
+            if due:
+                started = time.thread_time()
+                for metric in due:
+                    # Stay on a fixed grid; skip ticks instead of bursting after a stall
+                    next_due = self.next_due.get(metric, now) + self.interval_for(metric, now)
+                    self.next_due[metric] = next_due if next_due > now else now + self.interval_for(metric, now)
+                with timed('collector.sample'):
+                    snapshot = self.source.sample(due)
+                self.check_bursts(snapshot, snapshot.sampled, now)
+                self.latest = self.merge(snapshot, wanted)
+                self.present = {metric for metric in wanted
+                                if metric in snapshot.sampled or metric in self.present}
+                self.publish(self.latest)
+                self.window_busy += time.thread_time() - started
+                self.window_samples += 1
+            self.measure_overhead(now, wanted)
+
+            # Sleep until the next group is due, or until a subscriber
+            # arrives or a window becomes visible again
+            upcoming = [self.next_due[metric] for metric in wanted if metric in self.next_due]
+            wait = min(upcoming, default=now + OVERHEAD_WINDOW) - time.monotonic()
+            self.wakeup.wait(min(max(wait, 0), OVERHEAD_WINDOW))
+            self.wakeup.clear()
+
+    def check_bursts(self, snapshot, sampled, now):
+        for metric, threshold in BURST_THRESHOLDS.items():
+            if metric not in sampled:
+                continue
+            value = burst_value(snapshot, metric)
+            if value is not None and value >= threshold:
+                if now >= self.burst_until.get(metric, 0.0):
+                    # Entering a burst: the next sample is due right away
+                    self.next_due[metric] = now + BURST_INTERVAL
+                self.burst_until[metric] = now + BURST_DURATION
+
+    def merge(self, snapshot, wanted):
+        # Groups not sampled this tick keep their last values; groups nobody
+        # wants any more are dropped
+        values = snapshot._asdict()
+        for metric in wanted - snapshot.sampled:
+            for field in GROUP_FIELDS[metric]:
+                values[field] = getattr(self.latest, field, None)
+        return Snapshot(**values)
+
+    def measure_overhead(self, now, wanted):
+        if self.window_start is None:
+            self.window_start = (now, time.process_time())
+            return
+        start, process_start = self.window_start
+        elapsed = now - start
+        if elapsed < OVERHEAD_WINDOW:
+            return
+        process_time = time.process_time()
+        self.overhead = Overhead(self.window_samples / elapsed,
+                                 self.window_busy / elapsed * 100,
+                                 (process_time - process_start) / elapsed * 100,
+                                 tuple(sorted(wanted)),
+                                 tuple(sorted(m for m, until in self.burst_until.items() if now < until)))
+        self.window_start = (now, process_time)
+        self.window_samples = 0
+        self.window_busy = 0.0
+
+    def publish(self, snapshot):
+        with self.lock:
+            subscribers = list(self.subscribers.values())
+        present = self.present
+
+        for callback, metrics, active in subscribers:
+            # Windows only hear about ticks that refreshed one of their
+            # groups, and only once all of their groups have values: one
+            # that subscribed or came back after this tick was planned waits
+            # for the next
+            if not active or (metrics and not (metrics & snapshot.sampled and metrics <= present)):
+                continue
+            try:
+                with timed(f'subscriber {callable_name(callback)}'):
+                    callback(snapshot)
+            except Exception:
+                # One broken window must not stop the others from updating
+                traceback.print_exc()
+
+
+_collector = None
+_collector_lock = threading.Lock()
+_source_spec = None
+
+
+def configure_source(spec):
+    # Data source of the shared collector, e.g. 'replay:big-host.jsonl.gz@10'
+    # or 'synthetic:cores=256,disks=48'; must be called before the first
+    # get_collector(). Defaults to $DASHBOARD_SOURCE, then this machine.
+    global _source_spec
+    _source_spec = spec
+
+
+def get_collector():
+    # All dashboards in the process share one collector
+    global _collector
+    with _collector_lock:
+        if _collector is None:
+            from sources import open_source
+            source = open_source(_source_spec or os.environ.get('DASHBOARD_SOURCE') or 'live')
+            _collector = MetricsCollector(source.interval, source=source)
+        return _collector
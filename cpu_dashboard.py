@@ -1,18 +1,26 @@
-import psutil
-import time
 import tkinter as tk
 from tkinter import ttk
-import matplotlib.pyplot as plt
+import matplotlib.style
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import numpy as np
-import threading
-import platform
+from collector import get_collector
+from render_scheduler import get_scheduler, bind_close, bind_visibility
+from gauge import UsageGauge
+from alerts import get_alerts
+from history import get_history
+from trend_chart import TrendChart
+from stats_view import StatsView
+from process_view import ProcessView
+from heatmap import CoreHeatmap
+from hardware import describe_caches, describe_topology, get_inventory, group_usage
+from pressure import describe_pressure
 
 class CpuDashboard:
     def __init__(self, root):
         self.root = root
         self.root.title("CPU Performance Dashboard")
-        self.root.geometry("400x600")
+        self.root.geometry("500x1000")
         
         # Configure dark theme colors
         self.bg_color = "#1E1E1E"  # Dark background
@@ -48,6 +56,12 @@ class CpuDashboard:
         self.cpu_freq_label = ttk.Label(self.info_frame, text="Frequency: Loading...")
         self.cpu_freq_label.pack(pady=2)
         
+        self.cpu_topology_label = ttk.Label(self.info_frame, text="Topology: Loading...")
+        self.cpu_topology_label.pack(pady=2)
+        
+        self.cpu_cache_label = ttk.Label(self.info_frame, text="", wraplength=440)
+        self.cpu_cache_label.pack(pady=2)
+        
         # Create usage frame
         self.usage_frame = ttk.LabelFrame(self.main_frame, text="Current Usage")
         self.usage_frame.pack(fill=tk.X, pady=10)
@@ -56,95 +70,136 @@ class CpuDashboard:
         self.cpu_usage_label = ttk.Label(self.usage_frame, text="CPU Usage: 0%")
         self.cpu_usage_label.pack(pady=2)
         
+        # Rolling 1/5/15 minute statistics next to the current value
+        self.stats_view = StatsView(self.usage_frame, 'cpu.percent', frame_bg=self.frame_bg, fg_color=self.fg_color)
+        self.stats_view.pack(fill=tk.X, padx=5, pady=5)
+        
+        # Share of time runnable tasks waited for a CPU (PSI)
+        self.cpu_pressure_label = ttk.Label(self.usage_frame, text="Pressure: N/A", wraplength=440)
+        self.cpu_pressure_label.pack(pady=2)
+        
         self.cpu_per_core_frame = ttk.LabelFrame(self.usage_frame, text="Per Core Usage")
         self.cpu_per_core_frame.pack(fill=tk.X, pady=5)
         
+        # One image for all cores instead of a label per core, sized for
+        # the host the collector reads (this one, a recording or synthetic)
+        self.collector = get_collector()
+        self.topology = self.collector.source.topology() or get_inventory().topology
+        self.core_heatmap = CoreHeatmap(self.cpu_per_core_frame, self.collector.source.cpu_count(),
+                                        topology=self.topology, frame_bg=self.frame_bg)
+        self.core_heatmap.pack(fill=tk.X, padx=5)
+        
+        # Mean usage per NUMA node and socket: one busy node next to idle
+        # ones points at a badly pinned workload
+        self.node_of = [t.node for t in self.topology]
+        self.socket_of = [t.package for t in self.topology]
+        self.node_usage_label = ttk.Label(self.cpu_per_core_frame, text="", wraplength=440)
+        self.node_usage_label.pack(anchor="w", padx=5, pady=2)
+        
+        # Create top processes view
+        self.process_view = ProcessView(self.main_frame, sort='cpu', frame_bg=self.frame_bg, fg_color=self.fg_color)
+        self.process_view.pack(fill=tk.X, pady=10)
+        
         # Create graph frame
         self.graph_frame = ttk.LabelFrame(self.main_frame, text="Usage Gauge")
         self.graph_frame.pack(fill=tk.BOTH, expand=True, pady=10)
         
         # Create matplotlib figure with dark theme
-        plt.style.use('dark_background')
-        self.fig, self.ax = plt.subplots(figsize=(4, 4), facecolor=self.frame_bg)
+        matplotlib.style.use('dark_background')
+        self.fig = Figure(figsize=(4, 4), facecolor=self.frame_bg)
+        self.ax = self.fig.add_subplot()
         self.canvas = FigureCanvasTkAgg(self.fig, master=self.graph_frame)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.gauge = UsageGauge(self.ax, 'CPU Usage', self.fg_color, self.accent_color,
+                                color=get_alerts().colorizer('cpu.percent'))
+        
+        # Create trend frame fed from the shared history
+        self.trend_frame = ttk.LabelFrame(self.main_frame, text="Usage Trend")
+        self.trend_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+        
+        self.trend_fig = Figure(figsize=(4, 2), facecolor=self.frame_bg)
+        self.trend_ax = self.trend_fig.add_subplot()
+        self.trend_canvas = FigureCanvasTkAgg(self.trend_fig, master=self.trend_frame)
+        self.trend_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.history = get_history()
+        self.trend = TrendChart(self.trend_ax, self.history, 'cpu.percent', 'CPU Usage Trend', self.fg_color, self.accent_color)
+        self.trend_fig.tight_layout()
+        
+        # Widget updates go through the main-thread scheduler
+        self.scheduler = get_scheduler(self.root)
         
         # Initialize data
         self.usage = 0
-        self.core_labels = []
         self.update_cpu_info()
         self.update_gauge()
         
-        # Start update thread
-        self.update_thread = threading.Thread(target=self.update_metrics, daemon=True)
-        self.update_thread.start()
+        # Subscribe to the shared collector
+        self.subscription = self.collector.subscribe(self.update_metrics, metrics=('cpu', 'processes', 'pressure'))
+        
+        # Stop sampling and rendering for this window while it is hidden
+        bind_visibility(self.root, lambda visible: self.collector.set_active(self.subscription, visible))
+        
+        # Stop sampling for this window and free its figures once it is closed
+        bind_close(self.root, self.close)
     
-    def get_color(self, usage):
-        if usage < 60:
-            return '#00FF9D'  # Neon green
-        elif usage < 80:
-            return '#FFD700'  # Gold
-        else:
-            return '#FF4444'  # Bright red
+    def close(self):
+        self.collector.unsubscribe(self.subscription)
+        for figure in (self.fig, self.trend_fig):
+            figure.clear()
     
     def update_cpu_info(self):
-        # Get CPU information
-        cpu_info = platform.processor()
-        cpu_count = psutil.cpu_count(logical=False)
-        cpu_freq = psutil.cpu_freq()
+        # Static details come from the cached hardware inventory; the
+        # frequency is refreshed from every snapshot
+        source = self.collector.source
+        if source.live:
+            inventory = get_inventory()
+            cpu_info = inventory.model
+            self.cpu_cache_label.config(text=f"Cache: {describe_caches(inventory.caches) or 'unknown'}")
+        else:
+            cpu_info = type(source).__name__
+        cpu_count = source.cpu_count(logical=False)
         
         # Update labels
         self.cpu_name_label.config(text=f"CPU: {cpu_info}")
-        self.cpu_cores_label.config(text=f"Cores: {cpu_count} Physical, {psutil.cpu_count()} Logical")
-        self.cpu_freq_label.config(text=f"Frequency: {cpu_freq.current:.1f} MHz")
-        
-        # Create per-core usage labels
-        for i in range(psutil.cpu_count()):
-            label = ttk.Label(self.cpu_per_core_frame, text=f"Core {i}: 0%")
-            label.pack(pady=1)
-            self.core_labels.append(label)
+        self.cpu_cores_label.config(text=f"Cores: {cpu_count} Physical, {source.cpu_count()} Logical")
+        self.cpu_topology_label.config(text=f"Topology: {describe_topology(self.topology)}")
     
-    def update_metrics(self):
-        while True:
-            # Get CPU usage
-            self.usage = psutil.cpu_percent()
-            self.cpu_usage_label.config(text=f"CPU Usage: {self.usage}%")
-            
-            # Get per-core usage
-            per_core = psutil.cpu_percent(percpu=True)
-            for i, usage in enumerate(per_core):
-                self.core_labels[i].config(text=f"Core {i}: {usage}%")
-            
-            self.update_gauge()
-            time.sleep(1)
+    def update_frequency(self, freq):
+        self.cpu_freq_label.config(text=f"Frequency: {freq:.1f} MHz" if freq is not None else "Frequency: N/A")
+    
+    def update_node_usage(self, per_core):
+        nodes = group_usage(per_core, self.node_of)
+        sockets = group_usage(per_core, self.socket_of)
+        lines = []
+        if len(nodes) > 1:
+            lines.append("NUMA: " + "  ".join(f"node {node} {usage:.0f}%" for node, usage in nodes))
+        if len(sockets) > 1:
+            lines.append("Sockets: " + "  ".join(f"socket {socket} {usage:.0f}%" for socket, usage in sockets))
+        self.node_usage_label.config(text="\n".join(lines) or "Single socket, single NUMA node")
+    
+    def update_metrics(self, snapshot):
+        # Get CPU usage
+        self.usage = snapshot.cpu_percent
+        self.scheduler.configure(self.cpu_usage_label, text=f"CPU Usage: {self.usage}%")
+        
+        # Get per-core usage
+        self.scheduler.call(self.core_heatmap.update, snapshot.per_core)
+        self.scheduler.call(self.update_node_usage, snapshot.per_core)
+        self.scheduler.call(self.update_frequency, snapshot.cpu_freq)
+        if snapshot.vm is not None:
+            cpu = snapshot.pressure.cpu if snapshot.pressure is not None else None
+            self.scheduler.configure(self.cpu_pressure_label,
+                                     text=f"Pressure: {describe_pressure(cpu)}" if cpu is not None
+                                     else "Pressure: N/A (no PSI on this kernel)")
+        
+        self.scheduler.call(self.process_view.update, snapshot.processes)
+        self.scheduler.call(self.stats_view.update)
+        self.scheduler.call(self.update_gauge)
+        self.scheduler.call(self.update_trend)
     
     def update_gauge(self):
-        # Clear previous plot
-        self.ax.clear()
-        
-        # Create pie chart
-        sizes = [self.usage, 100 - self.usage]
-        colors = [self.get_color(self.usage), '#3D3D3D']  # Dark gray for unused portion
-        
-        # Draw the pie chart
-        wedges, texts = self.ax.pie(sizes, 
-                                   colors=colors,
-                                   startangle=90,
-                                   counterclock=False,
-                                   wedgeprops=dict(width=0.3))
-        
-        # Add percentage text in the center
-        self.ax.text(0, 0, f'{self.usage}%', 
-                    ha='center', 
-                    va='center', 
-                    fontsize=20,
-                    color=self.fg_color)
-        
-        # Set aspect ratio to be equal
-        self.ax.axis('equal')
-        
-        # Remove labels
-        self.ax.set_title('CPU Usage', color=self.accent_color)
-        
-        # Update canvas
-        self.canvas.draw()
\ No newline at end of file
+        # Only the wedge and centre text are repainted, and only on change
+        self.gauge.update(self.usage)
+    
+    def update_trend(self):
+        self.trend.update()
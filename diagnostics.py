@@ -0,0 +1,105 @@
+import tkinter as tk
+from tkinter import ttk
+from instrument import instruments
+from render_scheduler import bind_close
+
+COLUMNS = (
+    ('name', "Operation", 260),
+    ('per_second', "Calls/s", 70),
+    ('mean_ms', "Mean ms", 70),
+    ('p50_ms', "p50 ms", 70),
+    ('p95_ms', "p95 ms", 70),
+    ('p99_ms', "p99 ms", 70),
+    ('max_ms', "Max ms", 70),
+    ('busy_percent', "Busy %", 70),
+)
+
+
+class DiagnosticsDashboard:
+    def __init__(self, root, refresh_ms=1000):
+        # Hidden panel (Ctrl+Shift+D in the main window): what the suite
+        # itself spends on every psutil call, nvidia-smi, gauge and Tk update
+        self.root = root
+        self.root.title("Diagnostics")
+        self.root.geometry("820x520")
+        self.refresh_ms = refresh_ms
+        
+        # Configure dark theme colors
+        self.bg_color = "#1E1E1E"  # Dark background
+        self.fg_color = "#FFFFFF"  # White text
+        self.accent_color = "#00FF9D"  # Neon green accent
+        self.frame_bg = "#2D2D2D"  # Slightly lighter background for frames
+        
+        # Configure root window
+        self.root.configure(bg=self.bg_color)
+        
+        # Configure ttk styles
+        self.style = ttk.Style()
+        self.style.configure("TFrame", background=self.bg_color)
+        self.style.configure("TLabelframe", background=self.frame_bg, foreground=self.fg_color)
+        self.style.configure("TLabelframe.Label", background=self.frame_bg, foreground=self.accent_color)
+        self.style.configure("TLabel", background=self.frame_bg, foreground=self.fg_color)
+        self.style.configure("Diagnostics.Treeview", background=self.frame_bg, fieldbackground=self.frame_bg,
+                             foreground=self.fg_color, rowheight=20)
+        
+        # Create main frame
+        self.main_frame = ttk.Frame(root)
+        self.main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+        
+        # Create timings frame
+        self.timings_frame = ttk.LabelFrame(self.main_frame, text="Time Spent by the Dashboard")
+        self.timings_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+        
+        controls = ttk.Frame(self.timings_frame)
+        controls.pack(fill=tk.X, padx=5, pady=2)
+        self.summary_label = ttk.Label(controls, text="")
+        self.summary_label.pack(side=tk.LEFT)
+        ttk.Button(controls, text="Reset", command=self.reset).pack(side=tk.RIGHT)
+        
+        self.tree = ttk.Treeview(self.timings_frame, columns=[c[0] for c in COLUMNS], show="headings",
+                                 style="Diagnostics.Treeview")
+        for key, heading, width in COLUMNS:
+            self.tree.heading(key, text=heading)
+            self.tree.column(key, width=width, anchor="w" if key == 'name' else "e")
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        # name -> row id; rows are reused and only re-ordered
+        self.items = {}
+        self.after_id = None
+        bind_close(self.root, self.close)
+        self.refresh()
+    
+    def reset(self):
+        instruments.reset()
+        for item in self.items.values():
+            self.tree.delete(item)
+        self.items = {}
+        self.update_rows()
+    
+    def refresh(self):
+        self.update_rows()
+        self.after_id = self.root.after(self.refresh_ms, self.refresh)
+    
+    def update_rows(self):
+        summaries = instruments.summaries()
+        for position, summary in enumerate(summaries):
+            values = (summary.name, f"{summary.per_second:.2f}", f"{summary.mean_ms:.3f}",
+                      f"{summary.p50_ms:.3f}", f"{summary.p95_ms:.3f}", f"{summary.p99_ms:.3f}",
+                      f"{summary.max_ms:.3f}", f"{summary.busy_percent:.3f}")
+            item = self.items.get(summary.name)
+            if item is None:
+                item = self.items[summary.name] = self.tree.insert("", tk.END, values=values)
+            else:
+                self.tree.item(item, values=values)
+            self.tree.move(item, "", position)
+        
+        # Timed operations nest (a Tk call includes its gauge update), so
+        # only the collector's sampling total is shown, not a sum of rows
+        sampling = sum(s.busy_percent for s in summaries if s.name == 'collector.sample')
+        self.summary_label.config(text=f"{len(summaries)} operations, sampling {sampling:.2f}% of one core")
+    
+    def close(self):
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+
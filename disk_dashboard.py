@@ -1,18 +1,24 @@
-import psutil
-import time
 import tkinter as tk
 from tkinter import ttk
-import matplotlib.pyplot as plt
+import matplotlib.style
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import numpy as np
-import threading
 import platform
+from collector import get_collector
+from render_scheduler import get_scheduler, bind_close, bind_visibility
+from gauge import UsageGauge
+from alerts import get_alerts
+from history import get_history
+from trend_chart import TrendChart
+from stats_view import StatsView
+from pressure import describe_pressure
 
 class DiskDashboard:
     def __init__(self, root):
         self.root = root
         self.root.title("Disk Performance Dashboard")
-        self.root.geometry("400x600")
+        self.root.geometry("650x1000")
         
         # Configure dark theme colors
         self.bg_color = "#1E1E1E"  # Dark background
@@ -56,6 +62,10 @@ class DiskDashboard:
         self.disk_usage_label = ttk.Label(self.usage_frame, text="Disk Usage: 0.00%")
         self.disk_usage_label.pack(pady=2)
         
+        # Rolling 1/5/15 minute statistics next to the current value
+        self.stats_view = StatsView(self.usage_frame, 'disk.percent', frame_bg=self.frame_bg, fg_color=self.fg_color)
+        self.stats_view.pack(fill=tk.X, padx=5, pady=5)
+        
         self.total_space_label = ttk.Label(self.usage_frame, text="Total Space: 0 GB")
         self.total_space_label.pack(pady=2)
         
@@ -75,35 +85,84 @@ class DiskDashboard:
         self.write_speed_label = ttk.Label(self.io_frame, text="Write Speed: 0 MB/s")
         self.write_speed_label.pack(pady=2)
         
+        # Share of time tasks waited for I/O (PSI): some of them, or all
+        self.io_pressure_label = ttk.Label(self.io_frame, text="I/O Pressure: N/A")
+        self.io_pressure_label.pack(pady=2)
+        
+        self.io_full_label = ttk.Label(self.io_frame, text="All Stalled: N/A")
+        self.io_full_label.pack(pady=2)
+        
+        # Dark rows for the device and mount tables
+        self.style.configure("Disk.Treeview", background=self.frame_bg, fieldbackground=self.frame_bg,
+                             foreground=self.fg_color, rowheight=18)
+        
+        # Create per-device I/O frame
+        self.devices_frame = ttk.LabelFrame(self.main_frame, text="Devices")
+        self.devices_frame.pack(fill=tk.X, pady=10)
+        self.devices_tree = self.create_table(self.devices_frame, [
+            ('device', "Device", 80), ('read', "Read", 80), ('write', "Write", 80),
+            ('read_iops', "R IOPS", 60), ('write_iops', "W IOPS", 60),
+            ('latency', "Latency", 70), ('queue', "Queue", 55), ('busy', "Busy", 55),
+        ])
+        
+        # Create per-mount usage frame
+        self.mounts_frame = ttk.LabelFrame(self.main_frame, text="Mounts")
+        self.mounts_frame.pack(fill=tk.X, pady=10)
+        self.mounts_tree = self.create_table(self.mounts_frame, [
+            ('mount', "Mount", 160), ('device', "Device", 120), ('fstype', "Type", 60),
+            ('used', "Used", 80), ('total', "Total", 80), ('percent', "Usage", 60),
+        ])
+        
+        # Table rows by key, reused between updates
+        self.device_rows = {}
+        self.mount_rows = {}
+        
         # Create graph frame
         self.graph_frame = ttk.LabelFrame(self.main_frame, text="Usage Gauge")
         self.graph_frame.pack(fill=tk.BOTH, expand=True, pady=10)
         
         # Create matplotlib figure with dark theme
-        plt.style.use('dark_background')
-        self.fig, self.ax = plt.subplots(figsize=(4, 4), facecolor=self.frame_bg)
+        matplotlib.style.use('dark_background')
+        self.fig = Figure(figsize=(4, 4), facecolor=self.frame_bg)
+        self.ax = self.fig.add_subplot()
         self.canvas = FigureCanvasTkAgg(self.fig, master=self.graph_frame)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.gauge = UsageGauge(self.ax, 'Disk Usage', self.fg_color, self.accent_color, decimals=2,
+                                color=get_alerts().colorizer('disk.percent'))
+        
+        # Create trend frame fed from the shared history
+        self.trend_frame = ttk.LabelFrame(self.main_frame, text="Usage Trend")
+        self.trend_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+        
+        self.trend_fig = Figure(figsize=(4, 2), facecolor=self.frame_bg)
+        self.trend_ax = self.trend_fig.add_subplot()
+        self.trend_canvas = FigureCanvasTkAgg(self.trend_fig, master=self.trend_frame)
+        self.trend_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.history = get_history()
+        self.trend = TrendChart(self.trend_ax, self.history, 'disk.percent', 'Disk Usage Trend', self.fg_color, self.accent_color)
+        self.trend_fig.tight_layout()
+        
+        # Widget updates go through the main-thread scheduler
+        self.scheduler = get_scheduler(self.root)
         
         # Initialize data
         self.usage = 0
-        self.last_read_bytes = 0
-        self.last_write_bytes = 0
-        self.last_time = time.time()
-        self.update_disk_info()
         self.update_gauge()
         
-        # Start update thread
-        self.update_thread = threading.Thread(target=self.update_metrics, daemon=True)
-        self.update_thread.start()
+        # Subscribe to the shared collector
+        self.collector = get_collector()
+        self.subscription = self.collector.subscribe(self.update_metrics, metrics=('disk', 'pressure'))
+        
+        # Stop sampling and rendering for this window while it is hidden
+        bind_visibility(self.root, lambda visible: self.collector.set_active(self.subscription, visible))
+        
+        # Stop sampling for this window and free its figures once it is closed
+        bind_close(self.root, self.close)
     
-    def get_color(self, usage):
-        if usage < 60:
-            return '#00FF9D'  # Neon green
-        elif usage < 80:
-            return '#FFD700'  # Gold
-        else:
-            return '#FF4444'  # Bright red
+    def close(self):
+        self.collector.unsubscribe(self.subscription)
+        for figure in (self.fig, self.trend_fig):
+            figure.clear()
     
     def format_bytes(self, bytes_value):
         gb = bytes_value / (1024**3)
@@ -113,74 +172,98 @@ class DiskDashboard:
         mb = bytes_value / (1024**2)
         return f"{mb:.2f} MB/s"
     
-    def update_disk_info(self):
-        # Get disk information for the main drive
-        partitions = psutil.disk_partitions()
-        main_partition = partitions[0]  # Usually the main drive
+    def create_table(self, parent, columns):
+        tree = ttk.Treeview(parent, columns=[c[0] for c in columns], show="headings",
+                            height=4, style="Disk.Treeview")
+        for key, heading, width in columns:
+            tree.heading(key, text=heading)
+            tree.column(key, width=width, anchor="w" if key in ('device', 'mount', 'fstype') else "e")
+        tree.pack(fill=tk.X, padx=5, pady=5)
+        return tree
+    
+    def update_table(self, tree, rows, new_rows):
+        # Update rows in place; add and remove only what changed
+        for key in list(rows):
+            if key not in new_rows:
+                tree.delete(rows.pop(key))
+        for key, values in new_rows.items():
+            if key in rows:
+                tree.item(rows[key], values=values)
+            else:
+                rows[key] = tree.insert("", tk.END, values=values)
+    
+    def update_disk_info(self, mounts):
+        # Describe the device mounted at / (or the first mount there is)
+        main_mount = next((m for m in mounts if m.mountpoint in ('/', 'C:\\')), mounts[0] if mounts else None)
+        if main_mount is None:
+            return
         
         # Update labels
-        self.disk_name_label.config(text=f"Disk: {main_partition.device}")
-        self.disk_type_label.config(text=f"Type: {main_partition.fstype}")
-        self.disk_fs_label.config(text=f"File System: {main_partition.fstype}")
+        self.disk_name_label.config(text=f"Disk: {main_mount.device}")
+        self.disk_type_label.config(text=f"Type: {main_mount.fstype}")
+        self.disk_fs_label.config(text=f"File System: {main_mount.fstype}")
+    
+    def update_devices(self, disks):
+        self.update_table(self.devices_tree, self.device_rows, {
+            disk.name: (disk.name,
+                        self.format_speed(disk.read_bps),
+                        self.format_speed(disk.write_bps),
+                        f"{disk.read_iops:.0f}",
+                        f"{disk.write_iops:.0f}",
+                        f"{disk.latency_ms:.2f} ms",
+                        f"{disk.queue_depth:.2f}",
+                        f"{disk.busy_percent:.0f}%")
+            for disk in disks
+        })
+    
+    def update_mounts(self, mounts):
+        self.update_disk_info(mounts)
+        self.update_table(self.mounts_tree, self.mount_rows, {
+            mount.mountpoint: (mount.mountpoint,
+                               mount.device,
+                               mount.fstype,
+                               self.format_bytes(mount.used),
+                               self.format_bytes(mount.total),
+                               f"{mount.percent:.1f}%")
+            for mount in mounts
+        })
     
-    def update_metrics(self):
-        while True:
-            # Get disk usage
-            disk_usage = psutil.disk_usage('/')
-            self.usage = disk_usage.percent
-            
-            # Update usage labels
-            self.disk_usage_label.config(text=f"Disk Usage: {self.usage:.2f}%")
-            self.total_space_label.config(text=f"Total Space: {self.format_bytes(disk_usage.total)}")
-            self.used_space_label.config(text=f"Used Space: {self.format_bytes(disk_usage.used)}")
-            self.free_space_label.config(text=f"Free Space: {self.format_bytes(disk_usage.free)}")
-            
-            # Get disk I/O
-            current_time = time.time()
-            time_diff = current_time - self.last_time
-            
-            disk_io = psutil.disk_io_counters()
-            read_speed = (disk_io.read_bytes - self.last_read_bytes) / time_diff
-            write_speed = (disk_io.write_bytes - self.last_write_bytes) / time_diff
-            
-            self.read_speed_label.config(text=f"Read Speed: {self.format_speed(read_speed)}")
-            self.write_speed_label.config(text=f"Write Speed: {self.format_speed(write_speed)}")
-            
-            # Update last values
-            self.last_read_bytes = disk_io.read_bytes
-            self.last_write_bytes = disk_io.write_bytes
-            self.last_time = current_time
-            
-            self.update_gauge()
-            time.sleep(1)
+    def update_metrics(self, snapshot):
+        # Get disk usage
+        disk_usage = snapshot.disk_usage
+        self.usage = disk_usage.percent
+        
+        # Update usage labels
+        self.scheduler.configure(self.disk_usage_label, text=f"Disk Usage: {self.usage:.2f}%")
+        self.scheduler.configure(self.total_space_label, text=f"Total Space: {self.format_bytes(disk_usage.total)}")
+        self.scheduler.configure(self.used_space_label, text=f"Used Space: {self.format_bytes(disk_usage.used)}")
+        self.scheduler.configure(self.free_space_label, text=f"Free Space: {self.format_bytes(disk_usage.free)}")
+        
+        # Per-device rates come from the collector's counter engine and are
+        # empty on the very first tick
+        if snapshot.disks:
+            read_speed = sum(disk.read_bps for disk in snapshot.disks)
+            write_speed = sum(disk.write_bps for disk in snapshot.disks)
+            self.scheduler.configure(self.read_speed_label, text=f"Read Speed: {self.format_speed(read_speed)}")
+            self.scheduler.configure(self.write_speed_label, text=f"Write Speed: {self.format_speed(write_speed)}")
+            self.scheduler.call(self.update_devices, snapshot.disks)
+        self.scheduler.call(self.update_mounts, snapshot.mounts)
+        
+        if snapshot.vm is not None:
+            io = snapshot.pressure.io if snapshot.pressure is not None else None
+            if io is not None:
+                self.scheduler.configure(self.io_pressure_label, text=f"I/O Pressure: {describe_pressure(io)}")
+                self.scheduler.configure(self.io_full_label, text=f"All Stalled: {describe_pressure(io, 'full')}")
+            else:
+                self.scheduler.configure(self.io_pressure_label, text="I/O Pressure: N/A (no PSI on this kernel)")
+        
+        self.scheduler.call(self.stats_view.update)
+        self.scheduler.call(self.update_gauge)
+        self.scheduler.call(self.update_trend)
     
     def update_gauge(self):
-        # Clear previous plot
-        self.ax.clear()
-        
-        # Create pie chart
-        sizes = [self.usage, 100 - self.usage]
-        colors = [self.get_color(self.usage), '#3D3D3D']  # Dark gray for unused portion
-        
-        # Draw the pie chart
-        wedges, texts = self.ax.pie(sizes, 
-                                   colors=colors,
-                                   startangle=90,
-                                   counterclock=False,
-                                   wedgeprops=dict(width=0.3))
-        
-        # Add percentage text in the center
-        self.ax.text(0, 0, f'{self.usage:.2f}%', 
-                    ha='center', 
-                    va='center', 
-                    fontsize=20,
-                    color=self.fg_color)
-        
-        # Set aspect ratio to be equal
-        self.ax.axis('equal')
-        
-        # Remove labels
-        self.ax.set_title('Disk Usage', color=self.accent_color)
-        
-        # Update canvas
-        self.canvas.draw()
\ No newline at end of file
+        # Only the wedge and centre text are repainted, and only on change
+        self.gauge.update(self.usage)
+    
+    def update_trend(self):
+        self.trend.update()
@@ -0,0 +1,124 @@
+import os
+import time
+import select
+from collections import namedtuple
+
+import psutil
+
+from rates import CounterRates
+
+# Counter columns taken from psutil's per-disk tuples; missing ones read as 0
+COUNTER_FIELDS = ('read_count', 'write_count', 'read_bytes', 'write_bytes',
+                  'read_time', 'write_time', 'busy_time')
+
+DiskDevice = namedtuple('DiskDevice', ['name', 'read_bps', 'write_bps', 'read_iops', 'write_iops',
+                                       'latency_ms', 'queue_depth', 'busy_percent'])
+MountUsage = namedtuple('MountUsage', ['device', 'mountpoint', 'fstype', 'total', 'used', 'free', 'percent'])
+
+
+def is_physical(name):
+    # Whole disks have an entry in /sys/block; partitions, loop and ram
+    # devices are skipped. Elsewhere every device psutil reports is kept.
+    if not os.path.isdir('/sys/block'):
+        return True
+    if name.startswith(('loop', 'ram', 'zram')):
+        return False
+    return os.path.exists(os.path.join('/sys/block', name))
+
+
+class MountWatcher:
+    def __init__(self, rescan_interval=30.0):
+        # On Linux the kernel flags /proc/self/mounts with POLLPRI when the
+        # mount table changes; elsewhere fall back to a periodic rescan
+        self.rescan_interval = rescan_interval
+        self.partitions = None
+        self.last_scan = 0.0
+        self.poller = None
+        self.mounts_file = None
+        try:
+            self.mounts_file = open('/proc/self/mounts')
+            self.poller = select.poll()
+            self.poller.register(self.mounts_file, select.POLLPRI | select.POLLERR)
+        except (OSError, AttributeError):
+            self.poller = None
+
+    def changed(self):
+        if self.partitions is None:
+            return True
+        if self.poller is not None:
+            return bool(self.poller.poll(0))
+        return time.monotonic() - self.last_scan >= self.rescan_interval
+
+    def get_partitions(self):
+        if self.changed():
+            if self.mounts_file is not None:
+                # Reading to the end re-arms the POLLPRI notification
+                self.mounts_file.seek(0)
+                self.mounts_file.read()
+            self.partitions = tuple(psutil.disk_partitions())
+            self.last_scan = time.monotonic()
+        return self.partitions
+
+
+class DiskIOTracker:
+    def __init__(self, counters=None):
+        # counters: in place of psutil, a function returning every device's
+        # names and a (devices, COUNTER_FIELDS) array, e.g. procfs's reader
+        self.counters = counters
+        self.mounts = MountWatcher()
+        self.physical = {}
+        self.rates = CounterRates()
+        self.read_bytes = 0
+        self.write_bytes = 0
+
+    def read_counters(self):
+        if self.counters is not None:
+            names, values = self.counters()
+            self.check_physical(names)
+            order = sorted((name, i) for i, name in enumerate(names) if self.physical[name])
+            return [name for name, _ in order], values[[i for _, i in order]]
+
+        counters = psutil.disk_io_counters(perdisk=True) or {}
+        self.check_physical(counters)
+        names = sorted(name for name in counters if self.physical[name])
+        values = [[getattr(counters[name], field, 0) for field in COUNTER_FIELDS] for name in names]
+        return names, values
+
+    def check_physical(self, names):
+        for name in names:
+            if name not in self.physical:
+                self.physical[name] = is_physical(name)
+
+    def sample_devices(self):
+        names, current = self.read_counters()
+
+        # Totals over physical devices, so callers need no second counter read
+        self.read_bytes = sum(row[2] for row in current)
+        self.write_bytes = sum(row[3] for row in current)
+
+        # All devices in one pass through the rate engine. Devices without a
+        # previous reading (the first tick, or newly attached) are left out
+        # instead of showing a spike computed from zero.
+        devices = []
+        for name, rates in self.rates.known_rows(names, current):
+            read_count, write_count, read_bytes, write_bytes, read_time, write_time, busy_time = rates
+
+            # Times are in ms of I/O per second of wall time
+            ops = read_count + write_count
+            io_time = read_time + write_time
+            latency = io_time / ops if ops > 0 else 0.0
+            devices.append(DiskDevice(name, read_bytes, write_bytes, read_count, write_count,
+                                      latency, io_time / 1000, min(busy_time / 10, 100.0)))
+        return tuple(devices)
+
+    def sample_mounts(self):
+        mounts = []
+        for partition in self.mounts.get_partitions():
+            try:
+                usage = psutil.disk_usage(partition.mountpoint)
+            except OSError:
+                # Unmounted or inaccessible since the last rescan
+                continue
+            mounts.append(MountUsage(partition.device, partition.mountpoint, partition.fstype,
+                                     usage.total, usage.used, usage.free, usage.percent))
+        return tuple(mounts)
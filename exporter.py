@@ -0,0 +1,216 @@
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from collector import MetricsCollector
+
+# Needs neither tkinter, matplotlib nor NumPy, so it runs on bare servers:
+#     python exporter.py --port 9101 --max-age 5
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+EXPORTED_METRICS = ('cpu', 'memory', 'disk', 'gpu')
+
+MIB = 1024 ** 2
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_value(value):
+    value = float(value)
+    if value != value:
+        return 'NaN'
+    if value in (float('inf'), float('-inf')):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(value)
+
+
+def format_sample(name, labels, value):
+    if labels:
+        label_text = ','.join(f'{key}="{escape_label(label)}"' for key, label in labels.items())
+        name = f'{name}{{{label_text}}}'
+    return f'{name} {format_value(value)}'
+
+
+class OpenMetricsWriter:
+    def __init__(self):
+        self.lines = []
+
+    def family(self, name, kind, help_text, samples, unit=None):
+        # samples: iterable of (labels dict, value); None values are skipped
+        samples = [(labels, value) for labels, value in samples if value is not None]
+        if not samples:
+            return
+        self.lines.append(f'# TYPE {name} {kind}')
+        if unit:
+            self.lines.append(f'# UNIT {name} {unit}')
+        self.lines.append(f'# HELP {name} {help_text}')
+        sample_name = name + '_total' if kind == 'counter' else name
+        for labels, value in samples:
+            self.lines.append(format_sample(sample_name, labels, value))
+
+    def gauge(self, name, help_text, value, unit=None):
+        self.family(name, 'gauge', help_text, [({}, value)], unit)
+
+    def text(self):
+        return '\n'.join(self.lines + ['# EOF']) + '\n'
+
+
+def render_openmetrics(snapshot, now, overhead=None):
+    out = OpenMetricsWriter()
+    out.gauge('system_snapshot_timestamp_seconds', "Wall-clock time the served values were sampled.",
+              snapshot.timestamp, 'seconds')
+    out.gauge('system_snapshot_age_seconds', "Age of the served values when they were rendered for scraping.",
+              max(now - snapshot.timestamp, 0.0), 'seconds')
+
+    if snapshot.cpu_percent is not None:
+        out.gauge('system_cpu_usage_percent', "CPU usage over all cores.", snapshot.cpu_percent)
+        out.family('system_cpu_core_usage_percent', 'gauge', "CPU usage per logical core.",
+                   (({'core': i}, usage) for i, usage in enumerate(snapshot.per_core)))
+        out.gauge('system_cpu_frequency_mhz', "Current CPU frequency.", snapshot.cpu_freq)
+
+    if snapshot.memory is not None:
+        memory, swap = snapshot.memory, snapshot.swap
+        out.family('system_memory_bytes', 'gauge', "Physical memory by state.",
+                   (({'state': 'total'}, memory.total), ({'state': 'used'}, memory.used),
+                    ({'state': 'available'}, memory.available)), 'bytes')
+        out.gauge('system_memory_usage_percent', "Physical memory in use.", memory.percent)
+        out.family('system_swap_bytes', 'gauge', "Swap space by state.",
+                   (({'state': 'total'}, swap.total), ({'state': 'used'}, swap.used),
+                    ({'state': 'free'}, swap.free)), 'bytes')
+        out.gauge('system_swap_usage_percent', "Swap space in use.", swap.percent)
+
+    if snapshot.disk_io is not None:
+        out.family('system_disk_read_bytes', 'counter', "Bytes read from physical disks.",
+                   [({}, snapshot.disk_io.read_bytes)], 'bytes')
+        out.family('system_disk_written_bytes', 'counter', "Bytes written to physical disks.",
+                   [({}, snapshot.disk_io.write_bytes)], 'bytes')
+    disks = snapshot.disks or ()
+    for field, name, help_text in (
+            ('read_bps', 'system_disk_read_bytes_per_second', "Read throughput per device."),
+            ('write_bps', 'system_disk_write_bytes_per_second', "Write throughput per device."),
+            ('read_iops', 'system_disk_read_iops', "Completed reads per second per device."),
+            ('write_iops', 'system_disk_write_iops', "Completed writes per second per device."),
+            ('latency_ms', 'system_disk_latency_milliseconds', "Average time per I/O per device."),
+            ('queue_depth', 'system_disk_queue_depth', "Average I/Os in flight per device."),
+            ('busy_percent', 'system_disk_busy_percent', "Share of time the device was busy.")):
+        out.family(name, 'gauge', help_text, (({'device': d.name}, getattr(d, field)) for d in disks))
+    mounts = snapshot.mounts or ()
+    mount_labels = [{'mountpoint': m.mountpoint, 'device': m.device, 'fstype': m.fstype} for m in mounts]
+    out.family('system_filesystem_size_bytes', 'gauge', "Filesystem size per mount.",
+               zip(mount_labels, (m.total for m in mounts)), 'bytes')
+    out.family('system_filesystem_used_bytes', 'gauge', "Filesystem space used per mount.",
+               zip(mount_labels, (m.used for m in mounts)), 'bytes')
+    out.family('system_filesystem_usage_percent', 'gauge', "Filesystem space used per mount.",
+               zip(mount_labels, (m.percent for m in mounts)))
+
+    gpus = snapshot.gpus or ()
+    gpu_labels = [{'gpu': g.index, 'name': g.name} for g in gpus]
+    out.family('system_gpu_utilization_percent', 'gauge', "GPU utilization.",
+               zip(gpu_labels, (g.utilization for g in gpus)))
+    out.family('system_gpu_memory_used_bytes', 'gauge', "GPU memory in use.",
+               zip(gpu_labels, (None if g.memory_used is None else g.memory_used * MIB for g in gpus)), 'bytes')
+    out.family('system_gpu_memory_total_bytes', 'gauge', "GPU memory size.",
+               zip(gpu_labels, (None if g.memory_total is None else g.memory_total * MIB for g in gpus)), 'bytes')
+    out.family('system_gpu_temperature_celsius', 'gauge', "GPU temperature.",
+               zip(gpu_labels, (g.temperature for g in gpus)), 'celsius')
+    out.family('system_gpu_power_watts', 'gauge', "GPU power draw.",
+               zip(gpu_labels, (g.power for g in gpus)), 'watts')
+
+    if overhead is not None:
+        out.gauge('system_dashboard_samples_per_second', "Collector ticks per second.",
+                  overhead.samples_per_second)
+        out.gauge('system_dashboard_collector_cpu_percent', "CPU spent sampling and notifying subscribers.",
+                  overhead.collector_cpu_percent)
+        out.gauge('system_dashboard_process_cpu_percent', "CPU used by the whole monitoring process.",
+                  overhead.process_cpu_percent)
+
+    return out.text()
+
+
+class SnapshotExporter:
+    def __init__(self, collector, max_age=5.0):
+        # Scrapes only ever read collector.latest; sampling stays on the
+        # collector's own schedule however many scrapers there are
+        self.collector = collector
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.rendered_snapshot = None
+        self.body = None
+
+    def render(self):
+        # Returns (status, body). The text is rendered once per snapshot and
+        # shared by every scrape until the next one arrives.
+        snapshot = self.collector.latest
+        now = time.time()
+        if snapshot is None:
+            return 503, b"no snapshot yet\n"
+        if now - snapshot.timestamp > self.max_age:
+            return 503, f"latest snapshot is {now - snapshot.timestamp:.1f}s old\n".encode()
+
+        with self.lock:
+            if snapshot is not self.rendered_snapshot:
+                self.body = render_openmetrics(snapshot, now, self.collector.overhead).encode()
+                self.rendered_snapshot = snapshot
+            return 200, self.body
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    exporter = None
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        status, body = self.exporter.render()
+        self.send_response(status)
+        self.send_header('Content-Type', CONTENT_TYPE if status == 200 else 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapers poll constantly; keep stderr quiet
+        pass
+
+
+def start_exporter(collector, host='127.0.0.1', port=9101, max_age=5.0, metrics=EXPORTED_METRICS):
+    # Serves /metrics from a daemon thread; returns the server so the
+    # caller can shut it down
+    collector.subscribe(lambda snapshot: None, metrics=metrics)
+    handler = type('Handler', (MetricsHandler,), {'exporter': SnapshotExporter(collector, max_age)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve system metrics in OpenMetrics format")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on")
+    parser.add_argument('--port', type=int, default=9101)
+    parser.add_argument('--interval', type=float, default=1.0, help="seconds between samples")
+    parser.add_argument('--max-age', type=float, default=5.0,
+                        help="answer 503 instead of serving a snapshot older than this many seconds")
+    parser.add_argument('--metrics', default=','.join(EXPORTED_METRICS),
+                        help="comma-separated metric groups: cpu, memory, disk, gpu")
+    args = parser.parse_args(argv)
+
+    metrics = tuple(m.strip() for m in args.metrics.split(',') if m.strip())
+    unknown = set(metrics) - set(EXPORTED_METRICS)
+    if unknown:
+        parser.error(f"unknown metrics: {', '.join(sorted(unknown))}")
+    if args.interval <= 0:
+        parser.error("--interval must be positive")
+
+    server = start_exporter(MetricsCollector(args.interval), args.host, args.port, args.max_age, metrics)
+    print(f"Serving metrics on http://{args.host}:{server.server_address[1]}/metrics")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
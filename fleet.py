@@ -0,0 +1,380 @@
+import math
+import time
+import errno
+import socket
+import struct
+import argparse
+import selectors
+import threading
+from collections import deque, namedtuple
+from collector import Sampler
+
+# Wire format: every frame is a 3-byte header (payload length, frame type)
+# followed by the payload. An agent sends one HELLO, then one SAMPLE per tick.
+HEADER = struct.Struct('!HB')
+HELLO = 1
+SAMPLE = 2
+PROTOCOL_VERSION = 1
+
+# timestamp, then cpu/memory/disk/gpu percent and network bytes/s as
+# float32; 31 bytes per host per tick including the header
+SAMPLE_PAYLOAD = struct.Struct('!d5f')
+
+# Agents are unauthenticated, so the collector only listens on this host
+# unless told otherwise (--fleet-host / --host)
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 9102
+
+# Hosts tracked at once; a new host beyond this replaces the host that has
+# been offline longest, or is turned away when every host is connected
+MAX_HOSTS = 1024
+AGENT_METRICS = ('cpu', 'memory', 'disk', 'gpu', 'net')
+
+# Percentages, NaN when a host has no such resource (e.g. no GPU)
+FleetSample = namedtuple('FleetSample', ['timestamp', 'cpu', 'memory', 'disk', 'gpu', 'net_bps'])
+HostSummary = namedtuple('HostSummary', ['name', 'address', 'connected', 'last_seen', 'sample',
+                                         'cpu_history', 'memory_history'])
+
+RESOURCES = ('cpu', 'memory', 'disk', 'gpu')
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def encode_hello(name):
+    payload = bytes([PROTOCOL_VERSION]) + name.encode('utf-8')[:255]
+    return HEADER.pack(len(payload), HELLO) + payload
+
+
+def encode_sample(sample):
+    return HEADER.pack(SAMPLE_PAYLOAD.size, SAMPLE) + SAMPLE_PAYLOAD.pack(*sample)
+
+
+def hottest(sample):
+    # (resource, percent) of the busiest resource; NaN readings are ignored
+    readings = [(getattr(sample, r), r) for r in RESOURCES if not math.isnan(getattr(sample, r))]
+    if not readings:
+        return None, 0.0
+    value, resource = max(readings)
+    return resource, value
+
+
+def fleet_sample(snapshot):
+    gpus = [gpu.utilization for gpu in snapshot.gpus or () if gpu.utilization is not None]
+    net = sum(nic.rx_bps + nic.tx_bps for nic in snapshot.nics or ())
+    return FleetSample(snapshot.timestamp,
+                       snapshot.cpu_percent,
+                       snapshot.memory.percent,
+                       snapshot.disk_usage.percent,
+                       sum(gpus) / len(gpus) if gpus else math.nan,
+                       net)
+
+
+class _Connection:
+    __slots__ = ('sock', 'address', 'buffer', 'name')
+
+    def __init__(self, sock, address):
+        self.sock = sock
+        self.address = address
+        self.buffer = bytearray()
+        self.name = None
+
+
+class _Host:
+    __slots__ = ('name', 'address', 'connections', 'last_seen', 'sample', 'cpu_history', 'memory_history')
+
+    def __init__(self, name, history):
+        self.name = name
+        self.address = None
+        self.connections = 0
+        self.last_seen = None
+        self.sample = None
+        self.cpu_history = deque(maxlen=history)
+        self.memory_history = deque(maxlen=history)
+
+
+class FleetCollector:
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, history=60, notify_interval=1.0, max_hosts=MAX_HOSTS):
+        # One thread and one selector for every agent, so hundreds of hosts
+        # cost a few sockets, not hundreds of threads
+        self.selector = selectors.DefaultSelector()
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind((host, port))
+        self.server.listen(128)
+        self.server.setblocking(False)
+        self.selector.register(self.server, selectors.EVENT_READ)
+        self.address = self.server.getsockname()
+
+        self.history = history
+        self.max_hosts = max_hosts
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+        # Listeners are told at most once per notify_interval that hosts changed
+        self.listeners = []
+        self.notify_interval = notify_interval
+        self.changed = False
+        self.last_notify = 0.0
+
+        self.stopped = False
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def add_listener(self, callback):
+        with self.lock:
+            self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self.lock:
+            if callback in self.listeners:
+                self.listeners.remove(callback)
+
+    def run(self):
+        while not self.stopped:
+            for key, _ in self.selector.select(timeout=self.notify_interval):
+                if key.fileobj is self.server:
+                    self.accept()
+                else:
+                    self.read(key.data)
+            self.notify()
+
+    def accept(self):
+        while True:
+            try:
+                sock, address = self.server.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                # Out of file descriptors: leave the rest in the backlog
+                if e.errno in (errno.EMFILE, errno.ENFILE):
+                    return
+                raise
+            sock.setblocking(False)
+            self.selector.register(sock, selectors.EVENT_READ, _Connection(sock, address))
+
+    def read(self, connection):
+        try:
+            data = connection.sock.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self.close(connection)
+            return
+
+        connection.buffer += data
+        try:
+            self.parse(connection)
+        except ProtocolError:
+            self.close(connection)
+
+    def parse(self, connection):
+        buffer = connection.buffer
+        offset = 0
+        while len(buffer) - offset >= HEADER.size:
+            length, kind = HEADER.unpack_from(buffer, offset)
+            end = offset + HEADER.size + length
+            if end > len(buffer):
+                break
+            payload = bytes(buffer[offset + HEADER.size:end])
+            offset = end
+
+            if kind == HELLO:
+                if not payload or payload[0] != PROTOCOL_VERSION or connection.name is not None:
+                    raise ProtocolError("bad hello")
+                name = payload[1:].decode('utf-8', 'replace') or str(connection.address[0])
+                self.host_connected(name, connection.address[0])
+                connection.name = name
+            elif kind == SAMPLE:
+                if connection.name is None or length != SAMPLE_PAYLOAD.size:
+                    raise ProtocolError("bad sample")
+                self.host_sample(connection.name, FleetSample(*SAMPLE_PAYLOAD.unpack(payload)))
+            else:
+                raise ProtocolError(f"unknown frame type {kind}")
+        del buffer[:offset]
+
+    def host_connected(self, name, address):
+        with self.lock:
+            host = self.hosts.get(name)
+            if host is None:
+                if len(self.hosts) >= self.max_hosts:
+                    offline = [h for h in self.hosts.values() if h.connections == 0]
+                    if not offline:
+                        raise ProtocolError("too many hosts")
+                    del self.hosts[min(offline, key=lambda h: h.last_seen or 0.0).name]
+                host = self.hosts[name] = _Host(name, self.history)
+            host.address = address
+            host.connections += 1
+            self.changed = True
+
+    def host_sample(self, name, sample):
+        with self.lock:
+            host = self.hosts[name]
+            host.last_seen = time.time()
+            host.sample = sample
+            host.cpu_history.append(sample.cpu)
+            host.memory_history.append(sample.memory)
+            self.changed = True
+
+    def close(self, connection):
+        self.selector.unregister(connection.sock)
+        connection.sock.close()
+        if connection.name is not None:
+            with self.lock:
+                # Disconnected hosts stay listed, marked as offline
+                self.hosts[connection.name].connections -= 1
+                self.changed = True
+
+    def notify(self):
+        now = time.monotonic()
+        with self.lock:
+            if not self.changed or now - self.last_notify < self.notify_interval:
+                return
+            self.changed = False
+            self.last_notify = now
+            listeners = list(self.listeners)
+        for callback in listeners:
+            callback()
+
+    def summaries(self):
+        # Copies, safe to use after the lock is released
+        with self.lock:
+            return [HostSummary(h.name, h.address, h.connections > 0, h.last_seen, h.sample,
+                                tuple(h.cpu_history), tuple(h.memory_history))
+                    for h in self.hosts.values() if h.sample is not None]
+
+    def stop(self):
+        self.stopped = True
+        if self.thread is not None:
+            self.thread.join()
+        for key in list(self.selector.get_map().values()):
+            key.fileobj.close()
+        self.selector.close()
+
+
+_fleet = None
+_fleet_lock = threading.Lock()
+_fleet_address = (DEFAULT_HOST, DEFAULT_PORT)
+
+
+def configure_fleet(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    # Address the shared collector listens on, e.g. '0.0.0.0' to accept
+    # agents from other machines; must be called before the first
+    # get_fleet_collector()
+    global _fleet_address
+    _fleet_address = (host, port)
+
+
+def get_fleet_collector():
+    # One listening collector per process
+    global _fleet
+    with _fleet_lock:
+        if _fleet is None:
+            _fleet = FleetCollector(*_fleet_address)
+            _fleet.start()
+        return _fleet
+
+
+def run_agent(server, port=DEFAULT_PORT, interval=1.0, name=None, count=1, retry_delay=5.0, source=None):
+    # Streams this machine's samples to a fleet collector. count > 1 opens
+    # that many connections named name-1..name-N, to try a fleet on localhost;
+    # source is a sources.open_source spec to stream instead of this machine.
+    name = name or socket.gethostname()
+    names = [name] if count == 1 else [f"{name}-{i}" for i in range(1, count + 1)]
+    if source:
+        from sources import open_source
+        sampler = open_source(source)
+    else:
+        sampler = Sampler()
+    sockets = {}
+
+    next_tick = time.monotonic()
+    while True:
+        for agent_name in names:
+            if agent_name not in sockets:
+                try:
+                    sock = socket.create_connection((server, port), timeout=retry_delay)
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                    sock.sendall(encode_hello(agent_name))
+                    sockets[agent_name] = sock
+                except OSError:
+                    continue
+
+        frame = encode_sample(fleet_sample(sampler.sample(AGENT_METRICS)))
+        for agent_name, sock in list(sockets.items()):
+            try:
+                sock.sendall(frame)
+            except OSError:
+                # Collector went away; reconnect on a later tick
+                sock.close()
+                del sockets[agent_name]
+
+        next_tick += interval
+        now = time.monotonic()
+        if next_tick < now:
+            next_tick = now + interval - (now - next_tick) % interval
+        if not sockets:
+            # Nothing connected: try again after retry_delay, not every tick
+            next_tick = max(next_tick, now + retry_delay)
+        time.sleep(next_tick - now)
+
+
+def print_fleet(collector, interval=2.0):
+    # Headless collector: a plain-text table sorted by hottest resource
+    while True:
+        time.sleep(interval)
+        rows = sorted(collector.summaries(), key=lambda h: hottest(h.sample)[1], reverse=True)
+        print(f"{len(rows)} hosts")
+        for host in rows:
+            resource, value = hottest(host.sample)
+            status = "up" if host.connected else "offline"
+            print(f"  {host.name:<24} {status:<8} cpu {host.sample.cpu:5.1f}%  mem {host.sample.memory:5.1f}%  "
+                  f"hottest {resource} {value:.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fleet agent and collector")
+    sub = parser.add_subparsers(dest='mode', required=True)
+
+    agent = sub.add_parser('agent', help="stream this machine's metrics to a collector")
+    agent.add_argument('--server', default='127.0.0.1', help="collector address")
+    agent.add_argument('--port', type=int, default=DEFAULT_PORT)
+    agent.add_argument('--interval', type=float, default=1.0, help="seconds between samples")
+    agent.add_argument('--name', help="host name to report (default: this machine's)")
+    agent.add_argument('--count', type=int, default=1,
+                       help="simulate this many agents from one process, for testing")
+    agent.add_argument('--source', help="stream a recording or synthetic host instead of this machine: "
+                                        "replay:PATH[@SPEED] or synthetic[:cores=N,...]")
+
+    collector = sub.add_parser('collector', help="receive agents and print the fleet without a GUI")
+    collector.add_argument('--host', default=DEFAULT_HOST,
+                           help="address to listen on; 0.0.0.0 accepts agents from other machines")
+    collector.add_argument('--port', type=int, default=DEFAULT_PORT)
+    collector.add_argument('--max-hosts', type=int, default=MAX_HOSTS, help="hosts tracked at once")
+
+    args = parser.parse_args(argv)
+    try:
+        if args.mode == 'agent':
+            if args.interval <= 0 or args.count < 1:
+                parser.error("--interval and --count must be positive")
+            run_agent(args.server, args.port, args.interval, args.name, args.count, source=args.source)
+        else:
+            if args.max_hosts < 1:
+                parser.error("--max-hosts must be positive")
+            fleet = FleetCollector(args.host, args.port, max_hosts=args.max_hosts)
+            fleet.start()
+            print(f"Listening for agents on {args.host}:{args.port}")
+            print_fleet(fleet)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import math
+import time
+import tkinter as tk
+from tkinter import ttk
+from render_scheduler import get_scheduler, bind_close
+from alerts import SEVERITY_COLORS, get_alerts
+from fleet import RESOURCES, get_fleet_collector, hottest
+
+SORT_LABELS = {'hottest': "Hottest resource", 'cpu': "CPU", 'memory': "Memory", 'disk': "Disk",
+               'gpu': "GPU", 'name': "Host name"}
+
+ROW_HEIGHT = 24
+SPARK_WIDTH = 120
+
+
+class FleetDashboard:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("Fleet Dashboard")
+        self.root.geometry("820x600")
+        
+        # Configure dark theme colors
+        self.bg_color = "#1E1E1E"  # Dark background
+        self.fg_color = "#FFFFFF"  # White text
+        self.accent_color = "#00FF9D"  # Neon green accent
+        self.frame_bg = "#2D2D2D"  # Slightly lighter background for frames
+        self.offline_color = "#777777"  # Hosts whose agent disconnected
+        self.memory_color = "#4DA6FF"  # Memory sparkline
+        
+        # Configure root window
+        self.root.configure(bg=self.bg_color)
+        
+        # Configure ttk styles
+        self.style = ttk.Style()
+        self.style.configure("TFrame", background=self.bg_color)
+        self.style.configure("TLabelframe", background=self.frame_bg, foreground=self.fg_color)
+        self.style.configure("TLabelframe.Label", background=self.frame_bg, foreground=self.accent_color)
+        self.style.configure("TLabel", background=self.frame_bg, foreground=self.fg_color)
+        
+        # Create main frame
+        self.main_frame = ttk.Frame(root)
+        self.main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+        
+        # Start listening for agents (once per process)
+        self.fleet = get_fleet_collector()
+        
+        # Create fleet frame
+        self.fleet_frame = ttk.LabelFrame(self.main_frame, text="Hosts")
+        self.fleet_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+        
+        # Sort selector and host count
+        controls = ttk.Frame(self.fleet_frame)
+        controls.pack(fill=tk.X, padx=5, pady=2)
+        ttk.Label(controls, text="Sort by:").pack(side=tk.LEFT)
+        self.sort = tk.StringVar(value=SORT_LABELS['hottest'])
+        selector = ttk.Combobox(controls, textvariable=self.sort, state="readonly",
+                                values=list(SORT_LABELS.values()), width=16)
+        selector.pack(side=tk.LEFT, padx=5)
+        selector.bind("<<ComboboxSelected>>", lambda event: self.refresh())
+        self.count_label = ttk.Label(controls, text=f"Listening on port {self.fleet.address[1]}")
+        self.count_label.pack(side=tk.RIGHT)
+        
+        # One canvas for every host: rows are canvas items that are created
+        # once and then only moved and re-coloured
+        canvas_frame = ttk.Frame(self.fleet_frame)
+        canvas_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.canvas = tk.Canvas(canvas_frame, bg=self.frame_bg, highlightthickness=0)
+        scrollbar = ttk.Scrollbar(canvas_frame, orient=tk.VERTICAL, command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        # Column x positions
+        self.columns = {'name': 5, 'hottest': 190, 'cpu': 330, 'memory': 400, 'disk': 470, 'gpu': 540,
+                        'spark': 610}
+        self.draw_header()
+        
+        # host name -> dict of canvas item ids
+        self.rows = {}
+        
+        # Hottest readings are coloured by the local alert rules' thresholds
+        self.alerts = get_alerts()
+        
+        # Widget updates go through the main-thread scheduler
+        self.scheduler = get_scheduler(self.root)
+        self.fleet.add_listener(self.on_fleet_update)
+        bind_close(self.root, self.close)
+        self.refresh()
+    
+    def draw_header(self):
+        for key, text in (('name', "Host"), ('hottest', "Hottest"), ('cpu', "CPU"), ('memory', "Mem"),
+                          ('disk', "Disk"), ('gpu', "GPU"), ('spark', "CPU / Mem (last minute)")):
+            self.canvas.create_text(self.columns[key], ROW_HEIGHT / 2, text=text, anchor="w",
+                                    fill=self.accent_color, font=('Helvetica', 9, 'bold'))
+    
+    def on_fleet_update(self):
+        # Runs on the fleet collector's thread
+        self.scheduler.call(self.refresh)
+    
+    def close(self):
+        self.fleet.remove_listener(self.on_fleet_update)
+    
+    def sort_key(self):
+        key = next(k for k, label in SORT_LABELS.items() if label == self.sort.get())
+        if key == 'name':
+            return lambda host: host.name, False
+        if key == 'hottest':
+            return lambda host: hottest(host.sample)[1], True
+        # Hosts without the resource (NaN) sort last
+        return lambda host: -1 if math.isnan(getattr(host.sample, key)) else getattr(host.sample, key), True
+    
+    def create_row(self):
+        row = {key: self.canvas.create_text(0, 0, anchor="w", fill=self.fg_color, font=('Helvetica', 9))
+               for key in ('name', 'hottest') + RESOURCES}
+        row['spark_box'] = self.canvas.create_rectangle(0, 0, 0, 0, outline="#3D3D3D")
+        row['cpu_spark'] = self.canvas.create_line(0, 0, 0, 0, fill=self.accent_color)
+        row['memory_spark'] = self.canvas.create_line(0, 0, 0, 0, fill=self.memory_color)
+        return row
+    
+    def sparkline(self, values, x, y):
+        # Flat coordinate list of a polyline scaled to 0-100% in the row box
+        if len(values) < 2:
+            values = (values[0], values[0]) if values else (0, 0)
+        step = SPARK_WIDTH / (len(values) - 1)
+        height = ROW_HEIGHT - 6
+        coords = []
+        for i, value in enumerate(values):
+            coords.append(x + i * step)
+            coords.append(y + height - min(max(value, 0), 100) / 100 * height)
+        return coords
+    
+    def refresh(self):
+        # Must run on the Tk main thread
+        hosts = self.fleet.summaries()
+        key, reverse = self.sort_key()
+        hosts.sort(key=key, reverse=reverse)
+        now = time.time()
+        
+        seen = set()
+        for i, host in enumerate(hosts):
+            seen.add(host.name)
+            row = self.rows.get(host.name)
+            if row is None:
+                row = self.rows[host.name] = self.create_row()
+        
+            y = (i + 1) * ROW_HEIGHT
+            center = y + ROW_HEIGHT / 2
+            sample = host.sample
+            online = host.connected
+            resource, value = hottest(sample)
+        
+            name = host.name if online else f"{host.name} (offline {now - host.last_seen:.0f}s)"
+            self.set_text(row['name'], self.columns['name'], center, name,
+                          self.fg_color if online else self.offline_color)
+            self.set_text(row['hottest'], self.columns['hottest'], center,
+                          f"{resource} {value:.0f}%" if resource else "-",
+                          self.hottest_color(resource, value) if online else self.offline_color)
+            for r in RESOURCES:
+                reading = getattr(sample, r)
+                self.set_text(row[r], self.columns[r], center,
+                              "-" if math.isnan(reading) else f"{reading:.0f}%",
+                              self.fg_color if online else self.offline_color)
+        
+            x = self.columns['spark']
+            self.canvas.coords(row['spark_box'], x, y + 3, x + SPARK_WIDTH, y + ROW_HEIGHT - 3)
+            self.canvas.coords(row['cpu_spark'], *self.sparkline(host.cpu_history, x, y + 3))
+            self.canvas.coords(row['memory_spark'], *self.sparkline(host.memory_history, x, y + 3))
+        
+        # Hosts only ever disappear when the collector forgets them
+        for name in list(self.rows):
+            if name not in seen:
+                for item in self.rows.pop(name).values():
+                    self.canvas.delete(item)
+        
+        online = sum(1 for host in hosts if host.connected)
+        self.count_label.config(text=f"{online} of {len(hosts)} hosts online, port {self.fleet.address[1]}")
+        self.canvas.configure(scrollregion=(0, 0, self.columns['spark'] + SPARK_WIDTH + 10,
+                                            (len(hosts) + 1) * ROW_HEIGHT))
+    
+    def hottest_color(self, resource, value):
+        if resource is None:
+            return self.fg_color
+        return SEVERITY_COLORS[self.alerts.level(f"{resource}.percent", value)]
+    
+    def set_text(self, item, x, y, text, color):
+        self.canvas.coords(item, x, y)
+        self.canvas.itemconfigure(item, text=text, fill=color)
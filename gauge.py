@@ -0,0 +1,76 @@
+from matplotlib.patches import Wedge
+from instrument import instrumented
+
+RING_WIDTH = 0.3
+TRACK_COLOR = '#3D3D3D'  # Dark gray for unused portion
+
+
+class UsageGauge:
+    def __init__(self, ax, title, fg_color, accent_color, decimals=1, color=None):
+        # color: value -> wedge colour, e.g. AlertEngine.colorizer(series);
+        # without one the wedge is drawn in the accent colour
+        self.ax = ax
+        self.canvas = ax.figure.canvas
+        self.decimals = decimals
+        self.color = color or (lambda value: accent_color)
+        self.value = None
+        self.wedge_color = None
+        self.background = None
+
+        # Static artists: drawn once and kept in the blit background
+        self.ax.set_title(title, color=accent_color)
+        self.ax.set_xlim(-1.1, 1.1)
+        self.ax.set_ylim(-1.1, 1.1)
+        self.ax.set_aspect('equal')
+        self.ax.set_frame_on(False)
+        self.ax.set_xticks([])
+        self.ax.set_yticks([])
+        self.ax.add_patch(Wedge((0, 0), 1, 0, 360, width=RING_WIDTH, color=TRACK_COLOR))
+
+        # Dynamic artists: only these are redrawn on update
+        self.wedge = Wedge((0, 0), 1, 90, 90, width=RING_WIDTH, animated=True)
+        self.ax.add_patch(self.wedge)
+        self.text = self.ax.text(0, 0, '',
+                                 ha='center',
+                                 va='center',
+                                 fontsize=20,
+                                 color=fg_color,
+                                 animated=True)
+
+        self.draw_cid = self.canvas.mpl_connect('draw_event', self.on_draw)
+
+    def on_draw(self, event):
+        # A full redraw (first show, resize) invalidates the saved background
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.draw_animated()
+
+    def draw_animated(self):
+        self.ax.draw_artist(self.wedge)
+        self.ax.draw_artist(self.text)
+
+    @instrumented('gauge.update')
+    def update(self, usage):
+        # Returns True when the gauge was actually repainted
+        value = round(usage, self.decimals)
+        color = self.color(value)
+        if value == self.value and color == self.wedge_color:
+            return False
+        self.value = value
+        self.wedge_color = color
+
+        # Same geometry as a clockwise pie starting at 12 o'clock
+        self.wedge.set_theta1(90 - 3.6 * min(max(value, 0), 100))
+        self.wedge.set_color(color)
+        self.text.set_text(f'{value:.{self.decimals}f}%')
+
+        if self.background is None:
+            # Nothing to blit onto yet; the first full draw will paint us
+            return True
+
+        self.canvas.restore_region(self.background)
+        self.draw_animated()
+        self.canvas.blit(self.ax.bbox)
+        return True
+
+    def disconnect(self):
+        self.canvas.mpl_disconnect(self.draw_cid)
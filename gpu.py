@@ -0,0 +1,145 @@
+import os
+import sys
+import time
+import shlex
+import random
+import argparse
+import threading
+import subprocess
+from collections import namedtuple
+from instrument import instruments, timed
+
+QUERY_FIELDS = [
+    'index',
+    'name',
+    'utilization.gpu',
+    'memory.used',
+    'memory.total',
+    'temperature.gpu',
+    'power.draw',
+]
+
+# memory_* in MiB, temperature in C, power in W; None when not supported
+GpuSample = namedtuple('GpuSample', ['index', 'name', 'utilization', 'memory_used',
+                                     'memory_total', 'temperature', 'power'])
+
+
+def parse_number(text):
+    # nvidia-smi prints "[N/A]" or "[Not Supported]" for missing values
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def parse_line(line):
+    parts = [part.strip() for part in line.split(',')]
+    if len(parts) != len(QUERY_FIELDS):
+        return None
+    try:
+        index = int(parts[0])
+    except ValueError:
+        return None
+    return GpuSample(index, parts[1], *(parse_number(part) for part in parts[2:]))
+
+
+class NvidiaSmiStream:
+    def __init__(self, command=None, interval_ms=1000, restart_delay=5.0):
+        # NVIDIA_SMI may hold a full command line, e.g. a fake for testing
+        if command is None:
+            command = shlex.split(os.environ.get('NVIDIA_SMI', 'nvidia-smi'))
+        self.command = list(command) + [
+            '--query-gpu=' + ','.join(QUERY_FIELDS),
+            '--format=csv,noheader,nounits',
+            f'--loop-ms={interval_ms}',
+        ]
+        self.restart_delay = restart_delay
+
+        # Readings older than this are dropped: nvidia-smi has stalled or
+        # is being restarted, and its last values would look live
+        self.max_age = 3 * interval_ms / 1000
+
+        # None until the first line or failure, then True/False
+        self.available = None
+
+        # GPU index -> (monotonic time received, GpuSample)
+        self.latest = {}
+        self.lock = threading.Lock()
+        self.process = None
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name='nvidia-smi', daemon=True)
+            self.thread.start()
+
+    def run(self):
+        while not self.stopped.is_set():
+            started = time.perf_counter()
+            try:
+                self.process = subprocess.Popen(self.command,
+                                                stdout=subprocess.PIPE,
+                                                stderr=subprocess.DEVNULL,
+                                                text=True,
+                                                bufsize=1)
+            except OSError:
+                # No nvidia-smi on this machine; nothing to restart
+                self.available = False
+                return
+            instruments.record('nvidia-smi.start', time.perf_counter() - started)
+
+            # One line per GPU per loop; parse as they arrive
+            for line in self.process.stdout:
+                with timed('nvidia-smi.parse'):
+                    sample = parse_line(line)
+                if sample is not None:
+                    with self.lock:
+                        self.latest[sample.index] = (time.monotonic(), sample)
+                    self.available = True
+
+            self.process.wait()
+            with self.lock:
+                self.latest.clear()
+            if self.available is None:
+                # Exited without ever printing a GPU
+                self.available = False
+                return
+            self.stopped.wait(self.restart_delay)
+
+    def samples(self):
+        # Never blocks: returns the most recent reading for every GPU that
+        # reported within max_age
+        oldest = time.monotonic() - self.max_age
+        with self.lock:
+            return tuple(sample for index, (received, sample) in sorted(self.latest.items()) if received >= oldest)
+
+    def stop(self):
+        self.stopped.set()
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+
+
+def fake_nvidia_smi(argv=None):
+    # Stand-in for nvidia-smi on machines without a GPU:
+    #     NVIDIA_SMI="python gpu.py --fake-gpus 2" python gpu_dashboard.py
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fake-gpus', type=int, default=1)
+    parser.add_argument('--loop-ms', type=int, default=1000)
+    args, _ = parser.parse_known_args(argv)
+
+    rng = random.Random(0)
+    usage = [rng.uniform(0, 100) for _ in range(args.fake_gpus)]
+    try:
+        while True:
+            for i in range(args.fake_gpus):
+                usage[i] = min(max(usage[i] + rng.uniform(-10, 10), 0), 100)
+                print(f"{i}, Fake GPU {i}, {usage[i]:.0f}, {int(usage[i] * 80)}, 8192, "
+                      f"{40 + usage[i] * 0.4:.0f}, {50 + usage[i] * 2:.2f}", flush=True)
+            time.sleep(args.loop_ms / 1000)
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
+
+
+if __name__ == "__main__":
+    fake_nvidia_smi(sys.argv[1:])
@@ -1,16 +1,21 @@
-import time
 import tkinter as tk
 from tkinter import ttk
-import matplotlib.pyplot as plt
+import matplotlib.style
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from monitor import get_gpu_usage
-import threading
+from collector import get_collector
+from render_scheduler import get_scheduler, bind_close, bind_visibility
+from gauge import UsageGauge
+from alerts import get_alerts
+from history import get_history
+from trend_chart import TrendChart
+from stats_view import StatsView
 
 class GpuDashboard:
     def __init__(self, root):
         self.root = root
         self.root.title("GPU Usage Dashboard")
-        self.root.geometry("400x400")
+        self.root.geometry("450x900")
         
         # Configure dark theme colors
         self.bg_color = "#1E1E1E"
@@ -40,67 +45,119 @@ class GpuDashboard:
         self.usage_label = ttk.Label(self.usage_frame, text="GPU Usage: N/A")
         self.usage_label.pack(pady=5)
         
+        # Rolling 1/5/15 minute statistics next to the current value
+        self.stats_view = StatsView(self.usage_frame, 'gpu.percent', frame_bg=self.frame_bg, fg_color=self.fg_color)
+        self.stats_view.pack(fill=tk.X, padx=5, pady=5)
+        
+        # One panel per GPU, created once the GPUs are known
+        self.gpu_frame = ttk.Frame(self.main_frame)
+        self.gpu_frame.pack(fill=tk.X)
+        self.gpu_panels = {}
+        
         # Create graph frame
         self.graph_frame = ttk.LabelFrame(self.main_frame, text="Usage Gauge")
         self.graph_frame.pack(fill=tk.BOTH, expand=True, pady=10)
         
         # Create matplotlib figure with dark theme
-        plt.style.use('dark_background')
-        self.fig, self.ax = plt.subplots(figsize=(4, 4), facecolor=self.frame_bg)
+        matplotlib.style.use('dark_background')
+        self.fig = Figure(figsize=(4, 4), facecolor=self.frame_bg)
+        self.ax = self.fig.add_subplot()
         self.canvas = FigureCanvasTkAgg(self.fig, master=self.graph_frame)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.gauge = UsageGauge(self.ax, 'GPU Usage', self.fg_color, self.accent_color,
+                                color=get_alerts().colorizer('gpu.percent'))
+        
+        # Create trend frame fed from the shared history
+        self.trend_frame = ttk.LabelFrame(self.main_frame, text="Usage Trend")
+        self.trend_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+        
+        self.trend_fig = Figure(figsize=(4, 2), facecolor=self.frame_bg)
+        self.trend_ax = self.trend_fig.add_subplot()
+        self.trend_canvas = FigureCanvasTkAgg(self.trend_fig, master=self.trend_frame)
+        self.trend_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.history = get_history()
+        self.trend = TrendChart(self.trend_ax, self.history, 'gpu.percent', 'GPU Usage Trend', self.fg_color, self.accent_color)
+        self.trend_fig.tight_layout()
+        
+        # Widget updates go through the main-thread scheduler
+        self.scheduler = get_scheduler(self.root)
         
         # Initialize data
         self.usage = 0
         self.update_gauge()
         
-        # Start update thread
-        self.update_thread = threading.Thread(target=self.update_metrics, daemon=True)
-        self.update_thread.start()
+        # Subscribe to the shared collector
+        self.collector = get_collector()
+        self.subscription = self.collector.subscribe(self.update_metrics, metrics=('gpu',))
+        
+        # Stop sampling and rendering for this window while it is hidden
+        bind_visibility(self.root, lambda visible: self.collector.set_active(self.subscription, visible))
+        
+        # Stop sampling for this window and free its figures once it is closed
+        bind_close(self.root, self.close)
+    
+    def close(self):
+        self.collector.unsubscribe(self.subscription)
+        for figure in (self.fig, self.trend_fig):
+            figure.clear()
+    
+    def format_value(self, value, unit, decimals=0):
+        if value is None:
+            return "N/A"
+        return f"{value:.{decimals}f} {unit}"
     
-    def get_color(self, usage):
-        if usage < 60:
-            return '#00FF9D'  # Neon green
-        elif usage < 80:
-            return '#FFD700'  # Gold
+    def update_metrics(self, snapshot):
+        gpus = snapshot.gpus
+        utilization = [gpu.utilization for gpu in gpus if gpu.utilization is not None]
+        if utilization:
+            # The gauge shows the average over all GPUs
+            self.usage = sum(utilization) / len(utilization)
+            self.scheduler.configure(self.usage_label, text=f"GPU Usage: {self.usage:.1f}% ({len(gpus)} GPU)")
         else:
-            return '#FF4444'  # Bright red
+            self.usage = 0
+            self.scheduler.configure(self.usage_label, text="GPU Usage: N/A")
+        
+        self.scheduler.call(self.update_gpu_panels, gpus)
+        self.scheduler.call(self.stats_view.update)
+        self.scheduler.call(self.update_gauge)
+        self.scheduler.call(self.update_trend)
+    
+    def create_gpu_panel(self, gpu):
+        frame = ttk.LabelFrame(self.gpu_frame, text=f"GPU {gpu.index}: {gpu.name}")
+        frame.pack(fill=tk.X, pady=5)
+        
+        panel = {'frame': frame}
+        for key in ('utilization', 'memory', 'temperature', 'power'):
+            panel[key] = ttk.Label(frame, text=f"{key.capitalize()}: N/A")
+            panel[key].pack(anchor="w", padx=10, pady=1)
+        return panel
     
-    def update_metrics(self):
-        while True:
-            usage_str = get_gpu_usage()
-            self.usage = float(usage_str.replace('%', '')) if usage_str != "N/A" else 0
-            self.usage_label.config(text=f"GPU Usage: {usage_str}")
-            self.update_gauge()
-            time.sleep(1)
+    def update_gpu_panels(self, gpus):
+        # GPUs without a fresh reading (nvidia-smi stalled or restarting)
+        # show N/A rather than their last values
+        current = {gpu.index for gpu in gpus}
+        for index, panel in self.gpu_panels.items():
+            if index not in current:
+                for key in ('utilization', 'memory', 'temperature', 'power'):
+                    panel[key].config(text=f"{key.capitalize()}: N/A")
+        
+        for gpu in gpus:
+            panel = self.gpu_panels.get(gpu.index)
+            if panel is None:
+                panel = self.gpu_panels[gpu.index] = self.create_gpu_panel(gpu)
+            
+            memory = "N/A"
+            if gpu.memory_used is not None and gpu.memory_total:
+                memory = f"{gpu.memory_used:.0f} / {gpu.memory_total:.0f} MiB ({gpu.memory_used / gpu.memory_total * 100:.1f}%)"
+            
+            panel['utilization'].config(text=f"Utilization: {self.format_value(gpu.utilization, '%')}")
+            panel['memory'].config(text=f"Memory: {memory}")
+            panel['temperature'].config(text=f"Temperature: {self.format_value(gpu.temperature, '°C')}")
+            panel['power'].config(text=f"Power: {self.format_value(gpu.power, 'W', 1)}")
     
     def update_gauge(self):
-        # Clear previous plot
-        self.ax.clear()
-        
-        # Create pie chart
-        sizes = [self.usage, 100 - self.usage]
-        colors = [self.get_color(self.usage), '#3D3D3D']  # Dark gray for unused portion
-        
-        # Draw the pie chart
-        wedges, texts = self.ax.pie(sizes, 
-                                   colors=colors,
-                                   startangle=90,
-                                   counterclock=False,
-                                   wedgeprops=dict(width=0.3))
-        
-        # Add percentage text in the center
-        self.ax.text(0, 0, f'{self.usage}%', 
-                    ha='center', 
-                    va='center', 
-                    fontsize=20,
-                    color=self.fg_color)
-        
-        # Set aspect ratio to be equal
-        self.ax.axis('equal')
-        
-        # Remove labels
-        self.ax.set_title('GPU Usage', color=self.accent_color)
-        
-        # Update canvas
-        self.canvas.draw()
\ No newline at end of file
+        # Only the wedge and centre text are repainted, and only on change
+        self.gauge.update(self.usage)
+    
+    def update_trend(self):
+        self.trend.update()
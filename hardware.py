@@ -0,0 +1,224 @@
+import os
+import glob
+import platform
+import threading
+from collections import namedtuple
+import psutil
+
+# What the machine is, as opposed to how busy it is: read from /proc/cpuinfo
+# and /sys/devices/system/{cpu,node} once per process and cached. Other
+# systems get psutil's counts and one socket and NUMA node.
+
+# Where each online CPU sits; CPUs missing from sysfs are core = cpu on
+# socket and node 0
+CpuTopology = namedtuple('CpuTopology', ['package', 'core', 'node'])
+
+# One kind of cache: size of one instance in bytes, and how many there are
+CacheInfo = namedtuple('CacheInfo', ['level', 'type', 'size', 'instances'])
+
+Inventory = namedtuple('Inventory', [
+    'model',
+    'vendor',
+    'logical',
+    'physical',
+    'sockets',
+    'nodes',       # node -> tuple of CPUs
+    'topology',    # tuple of CpuTopology, in per-core reading order
+    'siblings',    # tuple of SMT sibling tuples, in the same order
+    'caches',      # tuple of CacheInfo, L1 first
+    'max_mhz',
+])
+
+CACHE_TYPES = {'Data': 'd', 'Instruction': 'i', 'Unified': ''}
+
+
+def parse_cpulist(text):
+    # '0-3,8,10-11' -> (0, 1, 2, 3, 8, 10, 11)
+    cpus = []
+    for part in text.strip().split(','):
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        cpus.extend(range(int(first), int(last or first) + 1))
+    return tuple(cpus)
+
+
+def parse_size(text):
+    # sysfs cache sizes: '48K', '2048K', '105M'
+    text = text.strip()
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    if text and text[-1] in units:
+        return int(text[:-1]) * units[text[-1]]
+    return int(text)
+
+
+def read_text(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def read_cpuinfo(root='/'):
+    # Model and vendor from the first processor block of /proc/cpuinfo;
+    # x86 says 'model name', ARM 'Model' or 'Hardware', POWER 'cpu'
+    text = read_text(os.path.join(root, 'proc/cpuinfo')) or ''
+    fields = {}
+    for line in text.splitlines():
+        key, sep, value = line.partition(':')
+        if sep:
+            fields.setdefault(key.strip(), value.strip())
+    model = next((fields[key] for key in ('model name', 'Model', 'Hardware', 'cpu') if fields.get(key)), None)
+    return model, fields.get('vendor_id')
+
+
+def read_caches(cpu_dir, cpus):
+    # Each distinct cache once, skipping CPUs whose caches were already
+    # seen through another CPU's shared_cpu_list
+    seen = {}
+    for cpu in cpus:
+        for index in sorted(glob.glob(os.path.join(cpu_dir, f'cpu{cpu}', 'cache', 'index*'))):
+            level = read_text(os.path.join(index, 'level'))
+            kind = read_text(os.path.join(index, 'type'))
+            size = read_text(os.path.join(index, 'size'))
+            shared = read_text(os.path.join(index, 'shared_cpu_list'))
+            if level is None or kind is None or not size:
+                continue
+            key = (int(level), CACHE_TYPES.get(kind, kind), parse_cpulist(shared or str(cpu)))
+            seen.setdefault(key, parse_size(size))
+    instances = {}
+    for (level, kind, _), size in seen.items():
+        count = instances.get((level, kind), (size, 0))[1]
+        instances[(level, kind)] = (size, count + 1)
+    return tuple(CacheInfo(level, kind, size, count)
+                 for (level, kind), (size, count) in sorted(instances.items()))
+
+
+def read_inventory(root='/'):
+    # root is '/' except when reading a copy of another machine's files.
+    # Per-core readings list online CPUs only, in order.
+    cpu_dir = os.path.join(root, 'sys/devices/system/cpu')
+    node_dir = os.path.join(root, 'sys/devices/system/node')
+    online = parse_cpulist(read_text(os.path.join(cpu_dir, 'online')) or '')
+    if not online:
+        online = tuple(range(psutil.cpu_count() or 1))
+    logical = len(online)
+
+    model, vendor = read_cpuinfo(root)
+    if model is None:
+        # May start a subprocess, so only where /proc/cpuinfo has nothing
+        model = platform.processor() or platform.machine()
+
+    node_of = {}
+    nodes = {}
+    for path in glob.glob(os.path.join(node_dir, 'node[0-9]*')):
+        cpus = parse_cpulist(read_text(os.path.join(path, 'cpulist')) or '')
+        if cpus:
+            node = int(os.path.basename(path)[4:])
+            nodes[node] = cpus
+            node_of.update((cpu, node) for cpu in cpus)
+
+    topology = []
+    siblings = []
+    for cpu in online:
+        base = os.path.join(cpu_dir, f'cpu{cpu}', 'topology')
+        try:
+            package = int(read_text(os.path.join(base, 'physical_package_id')))
+            core = int(read_text(os.path.join(base, 'core_id')))
+        except (TypeError, ValueError):
+            package, core = 0, cpu
+        topology.append(CpuTopology(package, core, node_of.get(cpu, 0)))
+        siblings.append(parse_cpulist(read_text(os.path.join(base, 'thread_siblings_list')) or str(cpu)))
+    if not nodes:
+        nodes = {0: online}
+
+    max_khz = read_text(os.path.join(cpu_dir, 'cpu0', 'cpufreq', 'cpuinfo_max_freq'))
+    return Inventory(
+        model=model,
+        vendor=vendor,
+        logical=logical,
+        physical=len({(t.package, t.core) for t in topology}),
+        sockets=len({t.package for t in topology}),
+        nodes=dict(sorted(nodes.items())),
+        topology=tuple(topology),
+        siblings=tuple(siblings),
+        caches=read_caches(cpu_dir, online),
+        max_mhz=int(max_khz) / 1000 if max_khz else None,
+    )
+
+
+def current_frequency(root='/'):
+    # Mean current MHz over all cpufreq policies; cheap enough to poll
+    values = []
+    for path in glob.glob(os.path.join(root, 'sys/devices/system/cpu/cpufreq/policy*/scaling_cur_freq')):
+        text = read_text(path)
+        if text:
+            values.append(int(text) / 1000)
+    if values:
+        return sum(values) / len(values)
+    try:
+        freq = psutil.cpu_freq()
+    except (OSError, NotImplementedError):
+        return None
+    return freq.current if freq else None
+
+
+def format_size(size):
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if size < 1024 or unit == 'GiB':
+            return f"{size:g} {unit}"
+        size /= 1024
+
+
+def describe_caches(caches):
+    # 'L1d 48 KiB x8, L1i 32 KiB x8, L2 2 MiB x8, L3 105 MiB'
+    parts = []
+    for cache in caches:
+        count = f" x{cache.instances}" if cache.instances > 1 else ""
+        parts.append(f"L{cache.level}{cache.type} {format_size(cache.size)}{count}")
+    return ", ".join(parts)
+
+
+def describe_topology(topology):
+    # Sockets, NUMA nodes and threads per core of a topology list
+    sockets = len({t.package for t in topology})
+    nodes = len({t.node for t in topology})
+    cores = len({(t.package, t.core) for t in topology})
+    threads = len(topology) // max(cores, 1)
+    return (f"{sockets} socket{'s' if sockets != 1 else ''}, {nodes} NUMA node{'s' if nodes != 1 else ''}, "
+            f"{threads} thread{'s' if threads != 1 else ''} per core")
+
+
+def group_usage(per_core, groups):
+    # Mean usage per group: groups[cpu] is the CPU's node or socket.
+    # Returns [(group, percent), ...] sorted by group.
+    totals = {}
+    for usage, group in zip(per_core, groups):
+        total, count = totals.get(group, (0.0, 0))
+        totals[group] = (total + usage, count + 1)
+    return [(group, total / count) for group, (total, count) in sorted(totals.items())]
+
+
+_inventory = None
+_inventory_lock = threading.Lock()
+
+
+def get_inventory():
+    # Read once per process; hardware does not change while we run
+    global _inventory
+    with _inventory_lock:
+        if _inventory is None:
+            _inventory = read_inventory()
+        return _inventory
+
+
+if __name__ == "__main__":
+    inventory = get_inventory()
+    print(f"{inventory.model} ({inventory.vendor or 'unknown vendor'})")
+    print(f"{inventory.physical} cores, {inventory.logical} threads; {describe_topology(inventory.topology)}")
+    for node, cpus in inventory.nodes.items():
+        print(f"  node {node}: {len(cpus)} CPUs")
+    print(f"Caches: {describe_caches(inventory.caches) or 'unknown'}")
+    if inventory.max_mhz:
+        print(f"Max frequency: {inventory.max_mhz:.0f} MHz")
@@ -0,0 +1,141 @@
+import math
+import tkinter as tk
+from tkinter import ttk
+import numpy as np
+from instrument import instrumented
+from hardware import CpuTopology, get_inventory
+
+GROUPINGS = {'none': "None", 'socket': "Socket", 'node': "NUMA node", 'smt': "SMT sibling"}
+
+# Topology field each grouping splits rows by
+GROUP_FIELDS = {'socket': 0, 'node': 2}
+
+BACKGROUND = (0x2D, 0x2D, 0x2D)
+
+
+def build_palette():
+    # 0-100% -> 101 RGB rows: dark gray through green and gold to red,
+    # matching the gauge colours
+    stops = [(0, (0x3D, 0x3D, 0x3D)), (30, (0x00, 0xFF, 0x9D)), (70, (0xFF, 0xD7, 0x00)), (100, (0xFF, 0x44, 0x44))]
+    percent = np.arange(101)
+    xs = [stop[0] for stop in stops]
+    channels = [np.interp(percent, xs, [stop[1][c] for stop in stops]) for c in range(3)]
+    palette = np.stack(channels, axis=1).astype(np.uint8)
+    # One extra row for padding cells that are not a CPU
+    return np.vstack([palette, np.array([BACKGROUND], dtype=np.uint8)])
+
+
+def layout(cpu_count, grouping, topology, columns):
+    # Returns a (rows, columns) array of CPU indexes, -1 for padding
+    cpus = list(range(cpu_count))
+    if grouping == 'none' or topology is None:
+        groups = [cpus]
+    elif grouping in GROUP_FIELDS:
+        field = GROUP_FIELDS[grouping]
+        keys = sorted({topology[cpu][field] for cpu in cpus})
+        groups = [[cpu for cpu in cpus if topology[cpu][field] == key] for key in keys]
+    else:
+        # SMT siblings share (package, core) and end up side by side
+        groups = [sorted(cpus, key=lambda cpu: (topology[cpu][0], topology[cpu][1], cpu))]
+        siblings = max(sum(1 for t in topology if t == topology[0]), 1)
+        columns = max(columns // siblings * siblings, siblings)
+
+    rows = []
+    for group in groups:
+        # Every group starts on a fresh row
+        for start in range(0, len(group), columns):
+            row = group[start:start + columns]
+            rows.append(row + [-1] * (columns - len(row)))
+    return np.array(rows, dtype=np.intp)
+
+
+def render_image(values, grid, palette, cell):
+    # Whole-vector work in NumPy: per-CPU percentages -> RGB image
+    levels = np.clip(np.rint(values), 0, 100).astype(np.intp)
+    # Padding cells index the extra palette row
+    cells = np.where(grid < 0, len(palette) - 1, levels[grid])
+    image = palette[cells]
+
+    # Scale each cell up and leave a 1px gap between cells
+    image = np.repeat(np.repeat(image, cell, axis=0), cell, axis=1)
+    gap = np.zeros(cell, dtype=bool)
+    gap[-1] = True
+    image[np.tile(gap, grid.shape[0]), :] = BACKGROUND
+    image[:, np.tile(gap, grid.shape[1])] = BACKGROUND
+    return image
+
+
+class CoreHeatmap:
+    def __init__(self, parent, cpu_count, width=360, grouping='none', topology=None, frame_bg="#2D2D2D"):
+        # topology: CpuTopology per CPU of a host other than this one
+        self.cpu_count = cpu_count
+        self.width = width
+        self.palette = build_palette()
+        if topology is None:
+            topology = get_inventory().topology
+        # CPUs the topology does not know sit alone on socket and node 0
+        self.topology = [topology[cpu] if cpu < len(topology) else CpuTopology(0, cpu, 0)
+                         for cpu in range(cpu_count)]
+        self.values = np.zeros(cpu_count, dtype=np.float32)
+
+        self.frame = ttk.Frame(parent)
+
+        controls = ttk.Frame(self.frame)
+        controls.pack(fill=tk.X)
+        ttk.Label(controls, text="Group by:").pack(side=tk.LEFT)
+        self.grouping = tk.StringVar(value=GROUPINGS[grouping])
+        selector = ttk.Combobox(controls, textvariable=self.grouping, state="readonly",
+                                values=list(GROUPINGS.values()), width=12)
+        selector.pack(side=tk.LEFT, padx=5)
+        selector.bind("<<ComboboxSelected>>", lambda event: self.relayout())
+        self.hover_label = ttk.Label(controls, text="")
+        self.hover_label.pack(side=tk.RIGHT)
+
+        self.photo = tk.PhotoImage(width=1, height=1)
+        self.image_label = tk.Label(self.frame, image=self.photo, bg=frame_bg, borderwidth=0)
+        self.image_label.pack(pady=5)
+        self.image_label.bind("<Motion>", self.on_motion)
+        self.image_label.bind("<Leave>", lambda event: self.hover_label.config(text=""))
+
+        self.relayout()
+
+    def pack(self, **options):
+        self.frame.pack(**options)
+
+    def relayout(self):
+        key = next(k for k, label in GROUPINGS.items() if label == self.grouping.get())
+        # Aim for a grid about twice as wide as it is tall
+        columns = max(1, min(self.cpu_count, math.ceil(math.sqrt(self.cpu_count * 2))))
+        self.grid = layout(self.cpu_count, key, self.topology, columns)
+        rows, columns = self.grid.shape
+        self.cell = max(4, min(32, self.width // columns))
+        self.render()
+
+    @instrumented('heatmap.update')
+    def update(self, per_core):
+        # Must run on the Tk main thread
+        count = min(len(per_core), self.cpu_count)
+        values = np.asarray(per_core[:count], dtype=np.float32)
+        if np.array_equal(values, self.values[:count]):
+            return
+        self.values[:count] = values
+        self.render()
+
+    def render(self):
+        # One PhotoImage update no matter how many CPUs there are
+        image = render_image(self.values, self.grid, self.palette, self.cell)
+        height, width = image.shape[:2]
+        header = f"P6 {width} {height} 255 ".encode()
+        self.photo.configure(width=width, height=height, data=header + image.tobytes(), format='PPM')
+
+    def on_motion(self, event):
+        row, column = event.y // self.cell, event.x // self.cell
+        if 0 <= row < self.grid.shape[0] and 0 <= column < self.grid.shape[1]:
+            cpu = self.grid[row, column]
+            if cpu >= 0:
+                where = self.topology[cpu]
+                self.hover_label.config(
+                    text=f"CPU {cpu} (socket {where.package}, node {where.node}, core {where.core}): "
+                         f"{self.values[cpu]:.1f}%")
+                return
+        self.hover_label.config(text="")
@@ -0,0 +1,104 @@
+import threading
+import numpy as np
+from collector import get_collector, snapshot_series
+
+
+class RingBuffer:
+    def __init__(self, capacity):
+        # Preallocated once; appending never grows memory
+        self.capacity = capacity
+        self.times = np.zeros(capacity, dtype=np.float64)
+        self.values = np.zeros(capacity, dtype=np.float32)
+        self.head = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, timestamp, value):
+        self.times[self.head] = timestamp
+        self.values[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def arrays(self):
+        # Oldest-first copies, safe to use after the lock is released
+        if self.count < self.capacity:
+            return self.times[:self.count].copy(), self.values[:self.count].copy()
+        return (np.concatenate((self.times[self.head:], self.times[:self.head])),
+                np.concatenate((self.values[self.head:], self.values[:self.head])))
+
+
+class MetricHistory:
+    def __init__(self, window=3600, interval=1.0):
+        # window and interval are in seconds
+        self.window = window
+        self.capacity = int(window / interval) + 1
+        self.buffers = {}
+        self.lock = threading.Lock()
+
+    def append(self, snapshot):
+        with self.lock:
+            for name, value in snapshot_series(snapshot, snapshot.sampled):
+                buffer = self.buffers.get(name)
+                if buffer is None:
+                    buffer = self.buffers[name] = RingBuffer(self.capacity)
+                buffer.append(snapshot.timestamp, value)
+
+    def series(self, name):
+        with self.lock:
+            buffer = self.buffers.get(name)
+            if buffer is None:
+                return np.empty(0), np.empty(0, dtype=np.float32)
+            return buffer.arrays()
+
+    def names(self):
+        with self.lock:
+            return list(self.buffers)
+
+
+def lttb(x, y, threshold):
+    # Largest-Triangle-Three-Buckets: keep the first and last points and, for
+    # every bucket in between, the point forming the largest triangle with
+    # the previously kept point and the average of the next bucket
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+
+    every = (n - 2) / (threshold - 2)
+    kept = np.empty(threshold, dtype=np.intp)
+    kept[0] = 0
+    kept[-1] = n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        area = np.abs((x[a] - avg_x) * (bucket_y - y[a]) - (x[a] - bucket_x) * (avg_y - y[a]))
+
+        a = start + int(area.argmax())
+        kept[i + 1] = a
+
+    return x[kept], y[kept]
+
+
+_history = None
+_history_lock = threading.Lock()
+
+
+def get_history(window=3600):
+    # Shared history fed by the collector; window only applies on first call
+    global _history
+    with _history_lock:
+        if _history is None:
+            collector = get_collector()
+            _history = MetricHistory(window, collector.interval)
+            collector.subscribe(_history.append, metrics=())
+        return _history
@@ -0,0 +1,205 @@
+import os
+import sys
+import math
+import time
+import functools
+import threading
+from collections import Counter, namedtuple
+
+# Timings of the suite's own work: every psutil call, nvidia-smi start and
+# parse, gauge update, canvas draw and Tk update. Always on; recording one
+# timing costs a few microseconds.
+
+# Four buckets per power of two of microseconds, up to about 4.5 minutes;
+# a quantile is off by at most one bucket width (19%)
+BUCKETS_PER_DOUBLING = 4
+BUCKETS = 28 * BUCKETS_PER_DOUBLING
+
+TimingSummary = namedtuple('TimingSummary', ['name', 'count', 'per_second', 'mean_ms', 'p50_ms', 'p95_ms',
+                                             'p99_ms', 'max_ms', 'busy_percent'])
+
+
+class Histogram:
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        micros = seconds * 1e6
+        if micros >= 1:
+            bucket = min(int(math.log2(micros) * BUCKETS_PER_DOUBLING) + 1, BUCKETS - 1)
+        else:
+            bucket = 0
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        # Upper edge of the bucket holding the q-quantile, in seconds
+        rank = q * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(2 ** (bucket / BUCKETS_PER_DOUBLING) / 1e6, self.max)
+        return self.max
+
+
+class Timer:
+    __slots__ = ('registry', 'name', 'started')
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.record(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class Instrumentation:
+    def __init__(self):
+        self.histograms = {}
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+
+    def record(self, name, seconds):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(seconds)
+
+    def timed(self, name):
+        # with instruments.timed('psutil.virtual_memory'): ...
+        return Timer(self, name)
+
+    def summaries(self):
+        # One TimingSummary per name since the last reset, busiest first
+        with self.lock:
+            elapsed = max(time.monotonic() - self.started, 1e-9)
+            summaries = [TimingSummary(name, h.count, h.count / elapsed, h.total / h.count * 1000,
+                                       h.quantile(0.5) * 1000, h.quantile(0.95) * 1000,
+                                       h.quantile(0.99) * 1000, h.max * 1000, h.total / elapsed * 100)
+                         for name, h in self.histograms.items() if h.count]
+        summaries.sort(key=lambda summary: summary.busy_percent, reverse=True)
+        return summaries
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+            self.started = time.monotonic()
+
+
+instruments = Instrumentation()
+
+
+def timed(name):
+    return instruments.timed(name)
+
+
+def format_summaries(summaries):
+    # Plain-text table of TimingSummary rows
+    lines = [f"{'operation':<44} {'calls/s':>8} {'mean ms':>8} {'p50':>8} {'p95':>8} {'p99':>8} "
+             f"{'max':>8} {'busy %':>7}"]
+    for s in summaries:
+        lines.append(f"{s.name[:44]:<44} {s.per_second:8.2f} {s.mean_ms:8.3f} {s.p50_ms:8.3f} {s.p95_ms:8.3f} "
+                     f"{s.p99_ms:8.3f} {s.max_ms:8.3f} {s.busy_percent:7.3f}")
+    return "\n".join(lines)
+
+
+def instrumented(name):
+    # Decorator timing every call of a function or method under name
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with instruments.timed(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def callable_name(func):
+    # 'CpuDashboard.update_ui' for a bound method
+    return getattr(func, '__qualname__', None) or type(func).__name__
+
+
+class StackSampler:
+    def __init__(self, interval=0.005):
+        # cProfile only sees the thread that enabled it, and the suite's work
+        # is split over the Tk main loop, the collector and helper threads.
+        # Sampling every thread's stack instead gives folded stacks, the
+        # input format of flamegraph.pl and speedscope.
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name='profiler', daemon=True)
+        self.thread.start()
+
+    def run(self):
+        own = threading.get_ident()
+        while not self.stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def write_folded(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def profile_ticks(collector, ticks, path, on_done=None):
+    # Samples every thread's stack until the collector has published ticks
+    # snapshots, then writes them to path as folded stacks and prints the
+    # timing histograms:
+    #     flamegraph.pl profile.folded > profile.svg
+    sampler = StackSampler()
+    state = {'ticks': 0, 'token': None}
+
+    def count_tick(snapshot):
+        state['ticks'] += 1
+        if state['ticks'] != ticks:
+            return
+        collector.unsubscribe(state['token'])
+        sampler.stop()
+        sampler.write_folded(path)
+        print(f"Wrote {sampler.samples} stack samples over {ticks} ticks to {path}")
+        print(format_summaries(instruments.summaries()))
+        if on_done is not None:
+            on_done()
+
+    sampler.start()
+    state['token'] = collector.subscribe(count_tick, metrics=())
+    if state['ticks'] >= ticks:
+        # Finished before the token was known
+        collector.unsubscribe(state['token'])
+    return sampler
@@ -4,10 +4,7 @@ import psutil
 import platform
 import socket
 import os
-from ram_dashboard import RamDashboard
-from cpu_dashboard import CpuDashboard
-from disk_dashboard import DiskDashboard
-from gpu_dashboard import GpuDashboard
+import argparse
 
 class SystemInfoDashboard:
     def __init__(self, root):
@@ -52,6 +49,13 @@ class SystemInfoDashboard:
         self.main_frame = ttk.Frame(root)
         self.main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
         
+        # Banner for firing alerts; only packed while there are any
+        self.banner = tk.Label(self.main_frame, text="", bg="#FF4444", fg=self.bg_color,
+                               font=('Helvetica', 10, 'bold'), anchor="w", justify=tk.LEFT, padx=10, pady=5)
+        self.banner.bind("<Button-1>", lambda event: self.banner.pack_forget())
+        self.alerts = None
+        self.banner_sink = None
+        
         # Create system info frame
         self.system_frame = ttk.LabelFrame(self.main_frame, text="System Information")
         self.system_frame.pack(fill=tk.X, pady=10)
@@ -71,10 +75,86 @@ class SystemInfoDashboard:
         # Create monitoring buttons
         self.create_monitoring_buttons()
         
+        # The suite's own cost, filled in once the collector has measured it
+        self.overhead_label = ttk.Label(self.buttons_frame, text="")
+        self.overhead_label.pack(pady=(0, 5))
+        
+        # Static info and the history store are loaded once the first frame
+        # is on screen, so the window appears without waiting for them
+        self.store = None
+        self.mapped = False
+        self.static_info_loaded = False
+        self.root.bind("<Map>", self.on_first_map, add="+")
+        
+        # Open dashboard windows by kind, see open_window
+        self.windows = {}
+        
+        # Hidden diagnostics panel: the suite's own per-operation timings
+        self.root.bind("<Control-Shift-D>", lambda event: self.open_diagnostics())
+    
+    def on_first_map(self, event):
+        if event.widget is self.root and not self.mapped:
+            self.mapped = True
+            self.root.after_idle(self.load_static_info)
+    
+    def load_static_info(self):
         # Initialize labels
         self.create_system_labels()
         self.create_hardware_labels()
         self.create_storage_labels()
+        
+        # Record metrics to disk while the suite is open; replayed and
+        # synthetic hosts are kept out of this machine's history
+        from tsdb import get_store
+        from collector import get_collector
+        self.store = None
+        if get_collector().source.live:
+            try:
+                self.store = get_store()
+            except OSError as e:
+                print(f"History store disabled: {e}")
+        
+        # Check the alert rules while the suite is open; alerts at the
+        # banner's severity are shown at the top of this window
+        from alerts import get_alerts, get_banner
+        from render_scheduler import get_scheduler
+        self.alerts = get_alerts()
+        self.banner_sink = get_banner()
+        if self.banner_sink is not None:
+            self.scheduler = get_scheduler(self.root)
+            self.banner_sink.add_listener(self.on_alerts)
+        
+        self.static_info_loaded = True
+        self.update_overhead()
+    
+    def on_alerts(self, alerts):
+        # Runs on the collector thread
+        self.scheduler.call(self.update_banner)
+    
+    def update_banner(self):
+        from alerts import SEVERITIES
+        firing = [alert for alert in self.alerts.active_alerts()
+                  if SEVERITIES.index(alert.severity) >= self.banner_sink.min_rank]
+        if not firing:
+            self.banner.pack_forget()
+            return
+        lines = [f"\u26a0 {alert.message}" for alert in firing[-3:]]
+        if len(firing) > 3:
+            lines.append(f"... and {len(firing) - 3} more (see the alert log)")
+        self.banner.config(text="\n".join(lines))
+        self.banner.pack(fill=tk.X, pady=(0, 10), before=self.system_frame)
+    
+    def update_overhead(self):
+        from collector import get_collector, OVERHEAD_WINDOW
+        self.update_frequency()
+        overhead = get_collector().overhead
+        if overhead.samples_per_second:
+            bursting = f", fast sampling: {', '.join(overhead.bursting)}" if overhead.bursting else ""
+            self.overhead_label.config(
+                text=f"Monitoring overhead: {overhead.process_cpu_percent:.1f}% CPU "
+                     f"(collector {overhead.collector_cpu_percent:.2f}%, "
+                     f"{overhead.samples_per_second:.1f} samples/s{bursting})")
+        self.root.after(int(OVERHEAD_WINDOW * 1000), self.update_overhead)
     
     def create_monitoring_buttons(self):
         # Create buttons for each resource
@@ -82,35 +162,75 @@ class SystemInfoDashboard:
             ("RAM Consumption", self.open_ram_dashboard),
             ("CPU Load", self.open_cpu_dashboard),
             ("Disk Load", self.open_disk_dashboard),
-            ("GPU Load", self.open_gpu_dashboard)
+            ("GPU Load", self.open_gpu_dashboard),
+            ("Network Load", self.open_network_dashboard),
+            ("Fleet", self.open_fleet_dashboard),
+            ("Cgroups", self.open_cgroup_dashboard)
         ]
         
         # Create a frame for button layout
         button_container = ttk.Frame(self.buttons_frame)
         button_container.pack(padx=10, pady=10)
         
-        for text, command in resources:
+        # Four to a row, so the window stays narrow
+        for i, (text, command) in enumerate(resources):
             button = ttk.Button(button_container, 
                               text=text, 
                               command=command,
                               style="Custom.TButton")
-            button.pack(side=tk.LEFT, padx=10, pady=5)
+            button.grid(row=i // 4, column=i % 4, padx=10, pady=5)
     
+    def open_window(self, key, dashboard):
+        # One window per kind: pressing its button again brings the open
+        # window to the front instead of stacking a duplicate
+        window = self.windows.get(key)
+        if window is not None and window.winfo_exists():
+            window.deiconify()
+            window.lift()
+            window.focus_set()
+            return window
+        window = self.windows[key] = tk.Toplevel(self.root)
+        window.bind("<Destroy>", lambda event: self.forget_window(key, event.widget), add="+")
+        dashboard(window)
+        return window
+    
+    def forget_window(self, key, widget):
+        # Child widgets report <Destroy> through their Toplevel too
+        if self.windows.get(key) is widget:
+            del self.windows[key]
+    
+    # Dashboards pull in matplotlib and numpy, so they are imported on first use
     def open_ram_dashboard(self):
-        window = tk.Toplevel(self.root)
-        RamDashboard(window)
+        from ram_dashboard import RamDashboard
+        return self.open_window('ram', RamDashboard)
     
     def open_cpu_dashboard(self):
-        window = tk.Toplevel(self.root)
-        CpuDashboard(window)
+        from cpu_dashboard import CpuDashboard
+        return self.open_window('cpu', CpuDashboard)
     
     def open_disk_dashboard(self):
-        window = tk.Toplevel(self.root)
-        DiskDashboard(window)
+        from disk_dashboard import DiskDashboard
+        return self.open_window('disk', DiskDashboard)
     
     def open_gpu_dashboard(self):
-        window = tk.Toplevel(self.root)
-        GpuDashboard(window)
+        from gpu_dashboard import GpuDashboard
+        return self.open_window('gpu', GpuDashboard)
+    
+    def open_network_dashboard(self):
+        from network_dashboard import NetworkDashboard
+        return self.open_window('network', NetworkDashboard)
+    
+    def open_fleet_dashboard(self):
+        from fleet_dashboard import FleetDashboard
+        return self.open_window('fleet', FleetDashboard)
+    
+    def open_cgroup_dashboard(self):
+        from cgroup_dashboard import CgroupDashboard
+        return self.open_window('cgroup', CgroupDashboard)
+    
+    def open_diagnostics(self):
+        from diagnostics import DiagnosticsDashboard
+        return self.open_window('diagnostics', DiagnosticsDashboard)
     
     def format_bytes(self, bytes):
         for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
@@ -134,17 +254,30 @@ class SystemInfoDashboard:
             label.pack(anchor="w", padx=10, pady=2)
     
     def create_hardware_labels(self):
-        # CPU information
+        # CPU information from the inventory, read once per process
+        from hardware import describe_caches, describe_topology, get_inventory
+        inventory = get_inventory()
         cpu_info = {
-            "Processor": platform.processor(),
-            "Physical Cores": str(psutil.cpu_count(logical=False)),
-            "Logical Cores": str(psutil.cpu_count(logical=True)),
-            "CPU Frequency": f"{psutil.cpu_freq().current:.2f} MHz"
+            "Processor": inventory.model,
+            "Physical Cores": str(inventory.physical),
+            "Logical Cores": str(inventory.logical),
+            "Topology": describe_topology(inventory.topology),
+            "Cache": describe_caches(inventory.caches) or "Unknown"
         }
         
         for key, value in cpu_info.items():
             label = ttk.Label(self.hardware_frame, text=f"{key}: {value}")
             label.pack(anchor="w", padx=10, pady=2)
+        
+        # Refreshed with the overhead line
+        self.cpu_freq_label = ttk.Label(self.hardware_frame, text="CPU Frequency: N/A")
+        self.cpu_freq_label.pack(anchor="w", padx=10, pady=2)
+    
+    def update_frequency(self):
+        from hardware import current_frequency
+        freq = current_frequency()
+        if freq is not None:
+            self.cpu_freq_label.config(text=f"CPU Frequency: {freq:.2f} MHz")
     
     def create_storage_labels(self):
         # Memory and storage information
@@ -161,6 +294,43 @@ class SystemInfoDashboard:
             label.pack(anchor="w", padx=10, pady=2)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="System performance dashboard")
+    parser.add_argument('--profile', type=int, metavar='TICKS',
+                        help="sample every thread's stack for this many collector ticks, then write "
+                             "them as folded stacks and print the timing histograms")
+    parser.add_argument('--profile-output', default='profile.folded', help="folded stacks file")
+    parser.add_argument('--source', help="live:procfs to read /proc directly (Linux), live:cgroup[=PATH] for a "
+                                         "container's CPU and memory limits (cgroup v2), or a data source instead "
+                                         "of this machine: replay:PATH[@SPEED] (SPEED 1, 10, ... or max) or "
+                                         "synthetic[:cores=N,disks=N,nics=N,gpus=N]")
+    parser.add_argument('--record', metavar='PATH',
+                        help="record everything the open windows sample to PATH (.gz to compress)")
+    parser.add_argument('--fleet-host', default='127.0.0.1',
+                        help="address the Fleet view listens on for agents; 0.0.0.0 accepts other machines")
+    parser.add_argument('--fleet-port', type=int, default=9102)
+    args = parser.parse_args()
+    
+    from fleet import configure_fleet
+    configure_fleet(args.fleet_host, args.fleet_port)
+    
+    from collector import configure_source, get_collector
+    configure_source(args.source)
+    try:
+        get_collector()
+    except (OSError, ValueError) as e:
+        parser.error(f"--source: {e}")
+    
     root = tk.Tk()
     app = SystemInfoDashboard(root)
-    root.mainloop()
\ No newline at end of file
+    recorder = None
+    if args.record:
+        from sources import Recorder
+        recorder = Recorder(get_collector(), args.record)
+    if args.profile:
+        from instrument import profile_ticks
+        profile_ticks(get_collector(), args.profile, args.profile_output)
+    root.mainloop()
+    if recorder is not None:
+        recorder.close()
+    if app.store is not None:
+        app.store.close()
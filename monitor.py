@@ -1,35 +1,222 @@
 import psutil
 import time
 import os
+import sys
+import io
+import csv
+import json
+import argparse
 import subprocess
 
 def clear_console():
-    os.system('cls' if os.name == 'nt' else 'clear')
+    if os.name == 'nt':
+        os.system('cls')
+    else:
+        # ANSI clear instead of spawning a shell every refresh
+        print("\033[H\033[J", end="")
 
 def get_gpu_usage():
     try:
-        output = subprocess.check_output("nvidia-smi --query-gpu=utilization.gpu --format=csv,noheader,nounits", shell=True)
-        return output.decode().strip() + "%"
+        output = subprocess.check_output(["nvidia-smi", "--query-gpu=utilization.gpu",
+                                          "--format=csv,noheader,nounits"])
+        return ", ".join(line.strip() + "%" for line in output.decode().splitlines() if line.strip())
     except Exception:
         return "N/A"
 
 def monitor_system():
     try:
+        psutil.cpu_percent()
         while True:
+            time.sleep(1)
             clear_console()
-            cpu_usage = psutil.cpu_percent(interval=1)
+            cpu_usage = psutil.cpu_percent()
             ram_usage = psutil.virtual_memory().percent
             disk_usage = psutil.disk_usage('/').percent
             gpu_usage = get_gpu_usage()
-            
+
             print(f"CPU Usage: {cpu_usage}%")
             print(f"RAM Usage: {ram_usage}%")
             print(f"Disk Usage: {disk_usage}%")
             print(f"GPU Usage: {gpu_usage}")
-            
-            time.sleep(0.5)
     except KeyboardInterrupt:
         print("\nMonitoring stopped.")
 
+
+# Seconds the headless mode waits for nvidia-smi's first readings
+GPU_WAIT = 3.0
+
+
+class RotatingOutput:
+    # Buffered text output to stdout, a file, or a set of rotated files
+    def __init__(self, path=None, rotate_bytes=0, rotate_count=5, buffer_size=1 << 16):
+        self.path = path
+        self.rotate_bytes = rotate_bytes
+        self.rotate_count = rotate_count
+        self.buffer_size = buffer_size
+        self.written = 0
+        self.stream = self.open()
+
+    def open(self):
+        if self.path is None:
+            return sys.stdout
+        stream = open(self.path, 'a', buffering=self.buffer_size, newline='')
+        self.written = stream.tell()
+        return stream
+
+    def write(self, text):
+        # Returns True when a new file was started and needs a header
+        self.stream.write(text)
+        self.written += len(text)
+        if self.path is not None and self.rotate_bytes and self.written >= self.rotate_bytes:
+            self.rotate()
+            return True
+        return False
+
+    def rotate(self):
+        self.stream.close()
+        for i in range(self.rotate_count - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        if self.rotate_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.stream = self.open()
+
+    def flush(self):
+        self.stream.flush()
+
+    def close(self):
+        self.flush()
+        if self.stream is not sys.stdout:
+            self.stream.close()
+
+
+class JsonLinesWriter:
+    def __init__(self, output):
+        self.output = output
+
+    def write(self, row):
+        self.output.write(json.dumps(row, separators=(',', ':')) + "\n")
+
+
+class CsvWriter:
+    def __init__(self, output):
+        self.output = output
+        self.columns = None
+        self.known = None
+        self.needs_header = output.written == 0
+        self.buffer = io.StringIO()
+        self.csv = csv.writer(self.buffer, lineterminator="\n")
+
+    def write(self, row):
+        # Columns come from the first row. Series that show up later (a
+        # disk attached, a GPU that answered late) widen the columns: a file
+        # that rotates into kept files starts a new one with the new header,
+        # anything else gets the header again, so no rows are ever deleted.
+        if self.columns is None:
+            self.columns = list(row)
+            self.known = set(self.columns)
+        elif not self.known.issuperset(row):
+            added = [column for column in row if column not in self.known]
+            if added:
+                self.columns += added
+                self.known.update(added)
+                output = self.output
+                if output.path is not None and output.rotate_bytes and output.rotate_count and output.written:
+                    output.rotate()
+                self.needs_header = True
+        line = self.format_line([row.get(column, '') for column in self.columns])
+        if self.needs_header:
+            line = self.format_line(self.columns) + line
+        self.needs_header = self.output.write(line)
+
+    def format_line(self, values):
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        self.csv.writerow(values)
+        return self.buffer.getvalue()
+
+
+def run_headless(interval=1.0, metrics=('cpu', 'memory', 'disk'), fmt='jsonl',
+                 output=None, rotate_bytes=0, rotate_count=5, flush_interval=1.0, count=0):
+    # Imported here so the interactive monitor keeps its small import set;
+    # neither path pulls in tkinter or matplotlib
+    from collector import Sampler, snapshot_series
+
+    sampler = Sampler()
+    out = RotatingOutput(output, rotate_bytes, rotate_count)
+    writer = JsonLinesWriter(out) if fmt == 'jsonl' else CsvWriter(out)
+
+    # Rate trackers report no devices or NICs until they have a previous
+    # reading, and nvidia-smi needs a moment to print its first GPUs, so
+    # one sample is taken and thrown away before the first row
+    sampler.sample(metrics)
+    next_tick = time.monotonic() + interval
+    if 'gpu' in metrics:
+        deadline = time.monotonic() + GPU_WAIT
+        while sampler.gpu_stream.available is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+        next_tick = max(next_tick, time.monotonic())
+
+    samples = 0
+    last_flush = time.monotonic()
+    try:
+        time.sleep(max(next_tick - time.monotonic(), 0))
+        while not count or samples < count:
+            snapshot = sampler.sample(metrics)
+            row = {'timestamp': round(snapshot.timestamp, 3)}
+            row.update(snapshot_series(snapshot))
+            writer.write(row)
+            samples += 1
+
+            now = time.monotonic()
+            if now - last_flush >= flush_interval:
+                out.flush()
+                last_flush = now
+
+            # Fixed-rate schedule; skip ticks instead of bursting after a stall
+            next_tick += interval
+            if next_tick < now:
+                next_tick = now + interval - (now - next_tick) % interval
+            time.sleep(next_tick - now)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        out.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="System performance monitor")
+    parser.add_argument('--headless', action='store_true',
+                        help="stream samples as JSON Lines or CSV instead of the console view")
+    parser.add_argument('--interval', type=float, default=1.0, help="seconds between samples")
+    parser.add_argument('--metrics', default='cpu,memory,disk',
+                        help="comma-separated metric groups: cpu, memory, disk, gpu, net")
+    parser.add_argument('--format', choices=('jsonl', 'csv'), default='jsonl')
+    parser.add_argument('--output', help="file to write to (default: stdout)")
+    parser.add_argument('--rotate-bytes', type=int, default=0,
+                        help="start a new file after this many bytes (0 disables rotation)")
+    parser.add_argument('--rotate-count', type=int, default=5, help="rotated files to keep")
+    parser.add_argument('--flush-interval', type=float, default=1.0,
+                        help="seconds between output buffer flushes")
+    parser.add_argument('--count', type=int, default=0, help="stop after this many samples")
+    args = parser.parse_args(argv)
+
+    if not args.headless:
+        monitor_system()
+        return
+
+    metrics = tuple(m.strip() for m in args.metrics.split(',') if m.strip())
+    unknown = set(metrics) - {'cpu', 'memory', 'disk', 'gpu', 'net'}
+    if unknown:
+        parser.error(f"unknown metrics: {', '.join(sorted(unknown))}")
+    if args.interval <= 0:
+        parser.error("--interval must be positive")
+
+    run_headless(args.interval, metrics, args.format, args.output,
+                 args.rotate_bytes, args.rotate_count, args.flush_interval, args.count)
+
 if __name__ == "__main__":
-    monitor_system()
+    main()
@@ -0,0 +1,112 @@
+from collections import Counter, namedtuple
+
+import psutil
+
+from rates import CounterRates
+
+# Counter columns taken from psutil's per-NIC tuples
+COUNTER_FIELDS = ('bytes_recv', 'bytes_sent', 'packets_recv', 'packets_sent',
+                  'errin', 'errout', 'dropin', 'dropout')
+
+# Per-second rates; link_percent is None when the link speed is unknown
+NicRates = namedtuple('NicRates', ['name', 'rx_bps', 'tx_bps', 'rx_pps', 'tx_pps',
+                                   'errin', 'errout', 'dropin', 'dropout', 'speed_mbps', 'link_percent'])
+
+# State column of /proc/net/tcp{,6}, named like psutil's CONN_* constants
+TCP_STATES = {
+    '01': 'ESTABLISHED',
+    '02': 'SYN_SENT',
+    '03': 'SYN_RECV',
+    '04': 'FIN_WAIT1',
+    '05': 'FIN_WAIT2',
+    '06': 'TIME_WAIT',
+    '07': 'CLOSE',
+    '08': 'CLOSE_WAIT',
+    '09': 'LAST_ACK',
+    '0A': 'LISTEN',
+    '0B': 'CLOSING',
+}
+
+
+def read_proc_tcp(paths=('/proc/net/tcp', '/proc/net/tcp6')):
+    # One pass over the kernel tables; much cheaper than building a psutil
+    # connection object per socket. Raises OSError off Linux.
+    counts = Counter()
+    found = False
+    for path in paths:
+        try:
+            with open(path) as f:
+                next(f, None)
+                for line in f:
+                    fields = line.split(None, 4)
+                    if len(fields) > 3:
+                        counts[TCP_STATES.get(fields[3], 'UNKNOWN')] += 1
+            found = True
+        except FileNotFoundError:
+            # No IPv6 on this machine
+            continue
+    if not found:
+        raise OSError("no /proc/net/tcp")
+    return counts
+
+
+def tcp_states():
+    # {state: count} for all TCP sockets of the machine
+    try:
+        return dict(read_proc_tcp())
+    except OSError:
+        pass
+    try:
+        return dict(Counter(conn.status for conn in psutil.net_connections('tcp')))
+    except (psutil.AccessDenied, OSError):
+        # macOS needs root to list other processes' sockets
+        return {}
+
+
+class NetworkTracker:
+    def __init__(self, stats_interval=30.0, counters=None):
+        # counters: in place of psutil, a function returning NIC names and
+        # a (NICs, COUNTER_FIELDS) array, e.g. procfs's reader
+        self.counters = counters
+        self.rates = CounterRates()
+
+        # Link speeds rarely change, so net_if_stats is cached
+        self.stats_interval = stats_interval
+        self.speeds = {}
+        self.stats_time = None
+
+    def link_speeds(self, now):
+        if self.stats_time is None or now - self.stats_time >= self.stats_interval:
+            try:
+                stats = psutil.net_if_stats()
+            except OSError:
+                stats = {}
+            # Speed is in Mbit/s and 0 when the driver does not say
+            self.speeds = {name: s.speed for name, s in stats.items() if s.isup}
+            self.stats_time = now
+        return self.speeds
+
+    def read_counters(self):
+        if self.counters is not None:
+            names, values = self.counters()
+            order = sorted(range(len(names)), key=names.__getitem__)
+            return [names[i] for i in order], values[order]
+        counters = psutil.net_io_counters(pernic=True) or {}
+        names = sorted(counters)
+        return names, [[getattr(counters[name], field, 0) for field in COUNTER_FIELDS] for name in names]
+
+    def sample(self):
+        names, values = self.read_counters()
+        now = self.rates.clock()
+        speeds = self.link_speeds(now)
+
+        # NICs without a previous reading are left out until the next tick
+        nics = []
+        for name, row in self.rates.known_rows(names, values, now):
+            speed = speeds.get(name) or None
+            link_percent = None
+            if speed:
+                # Busiest direction against the line rate (full duplex)
+                link_percent = min(max(row[0], row[1]) * 8 / (speed * 1e6) * 100, 100.0)
+            nics.append(NicRates(name, *row, speed, link_percent))
+        return tuple(nics)
@@ -0,0 +1,211 @@
+import tkinter as tk
+from tkinter import ttk
+import matplotlib.style
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from collector import get_collector
+from render_scheduler import get_scheduler, bind_close, bind_visibility
+from gauge import UsageGauge
+from alerts import get_alerts
+from history import get_history
+from trend_chart import TrendChart
+from stats_view import StatsView
+
+class NetworkDashboard:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("Network Performance Dashboard")
+        self.root.geometry("650x1000")
+        
+        # Configure dark theme colors
+        self.bg_color = "#1E1E1E"  # Dark background
+        self.fg_color = "#FFFFFF"  # White text
+        self.accent_color = "#00FF9D"  # Neon green accent
+        self.frame_bg = "#2D2D2D"  # Slightly lighter background for frames
+        
+        # Configure root window
+        self.root.configure(bg=self.bg_color)
+        
+        # Configure ttk styles
+        self.style = ttk.Style()
+        self.style.configure("TFrame", background=self.bg_color)
+        self.style.configure("TLabelframe", background=self.frame_bg, foreground=self.fg_color)
+        self.style.configure("TLabelframe.Label", background=self.frame_bg, foreground=self.accent_color)
+        self.style.configure("TLabel", background=self.frame_bg, foreground=self.fg_color)
+        
+        # Create main frame
+        self.main_frame = ttk.Frame(root)
+        self.main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+        
+        # Create usage frame
+        self.usage_frame = ttk.LabelFrame(self.main_frame, text="Current Usage")
+        self.usage_frame.pack(fill=tk.X, pady=10)
+        
+        # Throughput labels, summed over all interfaces
+        self.receive_label = ttk.Label(self.usage_frame, text="Receive: 0 B/s")
+        self.receive_label.pack(pady=2)
+        
+        self.send_label = ttk.Label(self.usage_frame, text="Send: 0 B/s")
+        self.send_label.pack(pady=2)
+        
+        self.link_label = ttk.Label(self.usage_frame, text="Busiest Link: N/A")
+        self.link_label.pack(pady=2)
+        
+        # Rolling 1/5/15 minute statistics next to the current value
+        self.stats_view = StatsView(self.usage_frame, 'net.rx_bps', format_value=self.format_speed, frame_bg=self.frame_bg, fg_color=self.fg_color)
+        self.stats_view.pack(fill=tk.X, padx=5, pady=5)
+        
+        # Dark rows for the interface and TCP tables
+        self.style.configure("Network.Treeview", background=self.frame_bg, fieldbackground=self.frame_bg,
+                             foreground=self.fg_color, rowheight=18)
+        
+        # Create per-interface frame
+        self.interfaces_frame = ttk.LabelFrame(self.main_frame, text="Interfaces")
+        self.interfaces_frame.pack(fill=tk.X, pady=10)
+        self.interfaces_tree = self.create_table(self.interfaces_frame, [
+            ('nic', "Interface", 90), ('rx', "Receive", 85), ('tx', "Send", 85),
+            ('rx_pps', "Rx pkt/s", 65), ('tx_pps', "Tx pkt/s", 65),
+            ('drops', "Drops/s", 60), ('errors', "Errors/s", 60), ('link', "Link", 55),
+        ])
+        
+        # Create TCP connection-state frame
+        self.tcp_frame = ttk.LabelFrame(self.main_frame, text="TCP Connections")
+        self.tcp_frame.pack(fill=tk.X, pady=10)
+        self.tcp_tree = self.create_table(self.tcp_frame, [
+            ('state', "State", 160), ('count', "Connections", 100),
+        ])
+        
+        # Table rows by key, reused between updates
+        self.interface_rows = {}
+        self.tcp_rows = {}
+        
+        # Create graph frame
+        self.graph_frame = ttk.LabelFrame(self.main_frame, text="Link Usage Gauge")
+        self.graph_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+        
+        # Create matplotlib figure with dark theme
+        matplotlib.style.use('dark_background')
+        self.fig = Figure(figsize=(4, 4), facecolor=self.frame_bg)
+        self.ax = self.fig.add_subplot()
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.graph_frame)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.gauge = UsageGauge(self.ax, 'Link Usage', self.fg_color, self.accent_color,
+                                color=get_alerts().colorizer('net.link_percent'))
+        
+        # Create trend frame fed from the shared history
+        self.trend_frame = ttk.LabelFrame(self.main_frame, text="Throughput Trend")
+        self.trend_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+        
+        self.trend_fig = Figure(figsize=(4, 2), facecolor=self.frame_bg)
+        self.trend_ax = self.trend_fig.add_subplot()
+        self.trend_canvas = FigureCanvasTkAgg(self.trend_fig, master=self.trend_frame)
+        self.trend_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.history = get_history()
+        self.trend = TrendChart(self.trend_ax, self.history, 'net.rx_bps', 'Receive Bytes/s', self.fg_color, self.accent_color,
+                                ylim=None)
+        self.trend_fig.tight_layout()
+        
+        # Widget updates go through the main-thread scheduler
+        self.scheduler = get_scheduler(self.root)
+        
+        # Initialize data
+        self.usage = 0
+        self.update_gauge()
+        
+        # Subscribe to the shared collector
+        self.collector = get_collector()
+        self.subscription = self.collector.subscribe(self.update_metrics, metrics=('net', 'tcp'))
+        
+        # Stop sampling and rendering for this window while it is hidden
+        bind_visibility(self.root, lambda visible: self.collector.set_active(self.subscription, visible))
+        
+        # Stop sampling for this window and free its figures once it is closed
+        bind_close(self.root, self.close)
+    
+    def close(self):
+        self.collector.unsubscribe(self.subscription)
+        for figure in (self.fig, self.trend_fig):
+            figure.clear()
+    
+    def format_speed(self, bytes_value):
+        for unit in ['B', 'KB', 'MB', 'GB']:
+            if bytes_value < 1024:
+                return f"{bytes_value:.1f} {unit}/s"
+            bytes_value /= 1024
+        return f"{bytes_value:.1f} TB/s"
+    
+    def create_table(self, parent, columns):
+        tree = ttk.Treeview(parent, columns=[c[0] for c in columns], show="headings",
+                            height=4, style="Network.Treeview")
+        for key, heading, width in columns:
+            tree.heading(key, text=heading)
+            tree.column(key, width=width, anchor="w" if key in ('nic', 'state') else "e")
+        tree.pack(fill=tk.X, padx=5, pady=5)
+        return tree
+    
+    def update_table(self, tree, rows, new_rows):
+        # Update rows in place; add and remove only what changed
+        for key in list(rows):
+            if key not in new_rows:
+                tree.delete(rows.pop(key))
+        for key, values in new_rows.items():
+            if key in rows:
+                tree.item(rows[key], values=values)
+            else:
+                rows[key] = tree.insert("", tk.END, values=values)
+    
+    def update_interfaces(self, nics):
+        self.update_table(self.interfaces_tree, self.interface_rows, {
+            nic.name: (nic.name,
+                       self.format_speed(nic.rx_bps),
+                       self.format_speed(nic.tx_bps),
+                       f"{nic.rx_pps:.0f}",
+                       f"{nic.tx_pps:.0f}",
+                       f"{nic.dropin + nic.dropout:.0f}",
+                       f"{nic.errin + nic.errout:.0f}",
+                       "N/A" if nic.link_percent is None else f"{nic.link_percent:.0f}%")
+            for nic in nics
+        })
+    
+    def update_tcp_states(self, states):
+        self.update_table(self.tcp_tree, self.tcp_rows, {
+            state: (state, count)
+            for state, count in sorted(states.items(), key=lambda item: -item[1])
+        })
+    
+    def update_metrics(self, snapshot):
+        # Rates come from the collector's counter engine; interfaces show
+        # up from their second reading on
+        nics = snapshot.nics
+        if nics:
+            receive = sum(nic.rx_bps for nic in nics)
+            send = sum(nic.tx_bps for nic in nics)
+            self.scheduler.configure(self.receive_label, text=f"Receive: {self.format_speed(receive)}")
+            self.scheduler.configure(self.send_label, text=f"Send: {self.format_speed(send)}")
+        
+            # The gauge follows the busiest interface with a known link speed
+            busiest = max((nic for nic in nics if nic.link_percent is not None),
+                          key=lambda nic: nic.link_percent, default=None)
+            if busiest is not None:
+                self.usage = busiest.link_percent
+                self.scheduler.configure(self.link_label,
+                                         text=f"Busiest Link: {busiest.name} at {busiest.speed_mbps} Mbit/s")
+            else:
+                self.usage = 0
+                self.scheduler.configure(self.link_label, text="Busiest Link: N/A (link speed unknown)")
+        
+            self.scheduler.call(self.update_interfaces, nics)
+        
+        if snapshot.tcp_states is not None:
+            self.scheduler.call(self.update_tcp_states, snapshot.tcp_states)
+        
+        self.scheduler.call(self.stats_view.update)
+        self.scheduler.call(self.update_gauge)
+        self.scheduler.call(self.update_trend)
+    
+    def update_gauge(self):
+        # Only the wedge and centre text are repainted, and only on change
+        self.gauge.update(self.usage)
+    
+    def update_trend(self):
+        self.trend.update()
@@ -0,0 +1,135 @@
+import os
+from collections import namedtuple
+from hardware import read_text
+from rates import CounterRates
+
+# Whether the machine is stalling, as opposed to how full it is: pressure
+# stall information (PSI) from /proc/pressure, page reclaim and swap
+# activity from /proc/vmstat, and dirty, writeback and slab memory from
+# /proc/meminfo. PSI needs Linux 4.20+ with CONFIG_PSI and without psi=0 on
+# the kernel command line; without it only the VM readings are reported.
+
+RESOURCES = ('cpu', 'memory', 'io')
+
+# /proc/vmstat counters per VmActivity field; the reclaim counters are
+# split by who reclaimed. pgscan_direct_throttle counts throttling events,
+# not pages, and pgscan_anon/pgscan_file split the same pages again.
+VMSTAT_COUNTERS = {
+    'major_faults': ('pgmajfault',),
+    'swap_in': ('pswpin',),
+    'swap_out': ('pswpout',),
+    'scanned': ('pgscan_kswapd', 'pgscan_direct', 'pgscan_khugepaged', 'pgscan_proactive'),
+    'stolen': ('pgsteal_kswapd', 'pgsteal_direct', 'pgsteal_khugepaged', 'pgsteal_proactive'),
+}
+
+# /proc/meminfo lines per VmActivity field, in kB there
+MEMINFO_FIELDS = {'dirty': 'Dirty', 'writeback': 'Writeback', 'slab': 'Slab'}
+
+# One resource's PSI: the share of time some or all non-idle tasks were
+# stalled over 10 s, 60 s and 300 s, in percent, and stalled milliseconds
+# per second since the previous sample. The full line is None where the
+# kernel has none (CPU before Linux 5.13).
+PressureInfo = namedtuple('PressureInfo', ['some_avg10', 'some_avg60', 'some_avg300', 'some_ms',
+                                           'full_avg10', 'full_avg60', 'full_avg300', 'full_ms'])
+
+# PressureInfo per resource, or None without PSI
+Pressure = namedtuple('Pressure', ['cpu', 'memory', 'io'])
+
+# Pages per second for the counters and bytes for the rest. Reclaim that
+# scans much more than it steals is struggling to find memory to free.
+VmActivity = namedtuple('VmActivity', ['major_faults', 'swap_in', 'swap_out', 'scanned', 'stolen',
+                                       'dirty', 'writeback', 'slab'])
+
+
+def parse_psi(text):
+    # 'some avg10=0.12 avg60=0.05 avg300=0.01 total=123456' lines ->
+    # {'some': (avg10, avg60, avg300, total microseconds), ...}
+    lines = {}
+    for line in text.splitlines():
+        kind, *pairs = line.split()
+        values = dict(pair.split('=', 1) for pair in pairs)
+        lines[kind] = (float(values['avg10']), float(values['avg60']), float(values['avg300']),
+                       int(values['total']))
+    return lines
+
+
+def read_psi(path):
+    # None where the file is missing, or present but disabled (psi=0 makes
+    # reads fail with EOPNOTSUPP)
+    try:
+        with open(path) as f:
+            return parse_psi(f.read())
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def parse_vmstat(text):
+    # 'name value' lines -> {name: int}
+    values = {}
+    for line in text.splitlines():
+        name, _, value = line.partition(' ')
+        values[name] = int(value)
+    return values
+
+
+class PressureTracker:
+    def __init__(self, root='/proc'):
+        # root is '/proc' except for a copy of another machine's files.
+        # Raises OSError without /proc/vmstat, i.e. off Linux.
+        self.root = root
+        if read_text(os.path.join(root, 'vmstat')) is None:
+            raise OSError(f"No {os.path.join(root, 'vmstat')}")
+
+        # Resources with PSI, checked once; kernels do not gain it later
+        self.resources = tuple(r for r in RESOURCES if read_psi(self.psi_path(r)) is not None)
+        self.rates = CounterRates()
+
+        # Primed here so the first sample already has rates
+        self.sample()
+
+    def psi_path(self, resource):
+        return os.path.join(self.root, 'pressure', resource)
+
+    def sample(self):
+        # (Pressure or None, VmActivity)
+        psi = {}
+        for resource in self.resources:
+            lines = read_psi(self.psi_path(resource))
+            if lines is not None:
+                psi[resource] = lines
+        vmstat = parse_vmstat(read_text(os.path.join(self.root, 'vmstat')) or '')
+        meminfo = {}
+        for line in (read_text(os.path.join(self.root, 'meminfo')) or '').splitlines():
+            name, _, rest = line.partition(':')
+            if rest:
+                meminfo[name] = int(rest.split()[0]) * 1024
+
+        # One row of cumulative counters: stall totals, then vmstat; rates
+        # are zero on the first reading and after a resource went missing
+        keys = [(resource, kind) for resource, lines in psi.items() for kind in ('some', 'full') if kind in lines]
+        counters = [psi[resource][kind][3] for resource, kind in keys]
+        counters += [sum(vmstat.get(name, 0) for name in names) for names in VMSTAT_COUNTERS.values()]
+        rates = dict(self.rates.known_rows([tuple(keys)], [counters])).get(tuple(keys)) or [0.0] * len(counters)
+        stalls = dict(zip(keys, rates))
+
+        pressure = None
+        if psi:
+            infos = {}
+            for resource, lines in psi.items():
+                some, full = lines['some'], lines.get('full')
+                infos[resource] = PressureInfo(
+                    *some[:3], stalls[(resource, 'some')] / 1000,
+                    *(full[:3] if full else (None,) * 3),
+                    stalls[(resource, 'full')] / 1000 if full else None)
+            pressure = Pressure(*(infos.get(resource) for resource in RESOURCES))
+
+        activity = VmActivity(*rates[len(keys):], *(meminfo.get(name, 0) for name in MEMINFO_FIELDS.values()))
+        return pressure, activity
+
+
+def describe_pressure(info, kind='some'):
+    # '1.3% / 0.9% / 1.0% over 10s/1m/5m, 12 ms/s' for the some or full line
+    avg10, avg60, avg300, ms = (getattr(info, f'{kind}_{field}') for field in ('avg10', 'avg60', 'avg300', 'ms'))
+    if avg10 is None:
+        return "N/A"
+    return f"{avg10:.1f}% / {avg60:.1f}% / {avg300:.1f}% over 10s/1m/5m, {ms:.0f} ms/s"
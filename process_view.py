@@ -0,0 +1,79 @@
+import tkinter as tk
+from tkinter import ttk
+from instrument import instrumented
+
+COLUMNS = (
+    ('pid', "PID", 60),
+    ('name', "Name", 140),
+    ('cpu', "CPU %", 60),
+    ('rss', "RSS", 80),
+    ('io', "I/O", 80),
+)
+
+SORT_LABELS = {'cpu': "CPU", 'rss': "Memory (RSS)", 'io': "Disk I/O"}
+
+
+def format_size(bytes_value):
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if bytes_value < 1024.0:
+            return f"{bytes_value:.1f} {unit}"
+        bytes_value /= 1024.0
+    return f"{bytes_value:.1f} TB"
+
+
+class ProcessView:
+    def __init__(self, parent, sort='cpu', rows=10, frame_bg="#2D2D2D", fg_color="#FFFFFF"):
+        self.sort = tk.StringVar(value=SORT_LABELS[sort])
+        self.top = None
+
+        self.frame = ttk.LabelFrame(parent, text="Top Processes")
+
+        # Ranking selector
+        controls = ttk.Frame(self.frame)
+        controls.pack(fill=tk.X, padx=5, pady=2)
+        ttk.Label(controls, text="Rank by:").pack(side=tk.LEFT)
+        selector = ttk.Combobox(controls, textvariable=self.sort, state="readonly",
+                                values=list(SORT_LABELS.values()), width=14)
+        selector.pack(side=tk.LEFT, padx=5)
+        selector.bind("<<ComboboxSelected>>", lambda event: self.refresh())
+        self.total_label = ttk.Label(controls, text="")
+        self.total_label.pack(side=tk.RIGHT)
+
+        style = ttk.Style()
+        style.configure("Process.Treeview", background=frame_bg, fieldbackground=frame_bg,
+                        foreground=fg_color, rowheight=18)
+
+        self.tree = ttk.Treeview(self.frame, columns=[c[0] for c in COLUMNS], show="headings",
+                                 height=rows, style="Process.Treeview")
+        for key, heading, width in COLUMNS:
+            self.tree.heading(key, text=heading)
+            self.tree.column(key, width=width, anchor="w" if key == 'name' else "e")
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        # Rows are created once and only their values change afterwards
+        self.items = [self.tree.insert("", tk.END, values=("",) * len(COLUMNS)) for _ in range(rows)]
+
+    def pack(self, **options):
+        self.frame.pack(**options)
+
+    @instrumented('process_view.update')
+    def update(self, top):
+        # Must run on the Tk main thread
+        self.top = top
+        self.refresh()
+
+    def refresh(self):
+        if self.top is None:
+            return
+        key = next(k for k, label in SORT_LABELS.items() if label == self.sort.get())
+        ranked = getattr(self.top, key)
+
+        for i, item in enumerate(self.items):
+            if i < len(ranked):
+                p = ranked[i]
+                values = (p.pid, p.name, f"{p.cpu_percent:.1f}", format_size(p.rss),
+                          format_size(p.io_rate) + "/s")
+            else:
+                values = ("",) * len(COLUMNS)
+            self.tree.item(item, values=values)
+        self.total_label.config(text=f"{self.top.total} processes")
@@ -0,0 +1,98 @@
+import heapq
+import time
+from collections import namedtuple
+
+import psutil
+
+# io_rate is read + write bytes per second since the previous refresh
+ProcessInfo = namedtuple('ProcessInfo', ['pid', 'name', 'cpu_percent', 'rss', 'io_rate'])
+ProcessTop = namedtuple('ProcessTop', ['cpu', 'rss', 'io', 'total'])
+
+SORT_KEYS = {
+    'cpu': lambda p: p.cpu_percent,
+    'rss': lambda p: p.rss,
+    'io': lambda p: p.io_rate,
+}
+
+
+class _Entry:
+    __slots__ = ('proc', 'name', 'rss', 'io_time', 'io_bytes')
+
+    def __init__(self, proc, name):
+        self.proc = proc
+        self.name = name
+        self.rss = 0
+        self.io_time = None
+        self.io_bytes = 0
+
+
+class ProcessTable:
+    def __init__(self, top_n=10, full_refresh_every=10):
+        self.top_n = top_n
+
+        # Idle processes cannot do I/O and rarely change RSS, so their memory
+        # and I/O counters are only re-read every full_refresh_every ticks,
+        # staggered by PID so no single tick pays for all of them
+        self.full_refresh_every = full_refresh_every
+        self.ticks = 0
+
+        # pid -> _Entry. The Process object tells a reused PID apart from
+        # the process that used to have it.
+        self.entries = {}
+
+    def read_counters(self, entry, now):
+        # Returns the I/O rate since the counters were last read
+        proc = entry.proc
+        io_rate = 0.0
+        with proc.oneshot():
+            entry.rss = proc.memory_info().rss
+            try:
+                io = proc.io_counters()
+            except (psutil.AccessDenied, AttributeError):
+                # Other users' processes, or no per-process I/O on this OS
+                return io_rate
+        io_bytes = io.read_bytes + io.write_bytes
+        if entry.io_time is not None and now > entry.io_time:
+            io_rate = max(io_bytes - entry.io_bytes, 0) / (now - entry.io_time)
+        entry.io_time = now
+        entry.io_bytes = io_bytes
+        return io_rate
+
+    def refresh(self):
+        # psutil.process_iter keeps its Process objects between calls and
+        # only creates new ones for PIDs that appeared, so cpu_percent is
+        # measured since the previous refresh without any extra waiting
+        now = time.monotonic()
+        self.ticks += 1
+
+        rows = []
+        entries = {}
+        for proc in psutil.process_iter():
+            pid = proc.pid
+            try:
+                cpu = proc.cpu_percent()
+                entry = self.entries.get(pid)
+                if entry is None or entry.proc is not proc:
+                    # Started since the last tick: the only time its name is read
+                    entry = _Entry(proc, proc.name())
+                    io_rate = self.read_counters(entry, now)
+                elif cpu > 0 or (pid + self.ticks) % self.full_refresh_every == 0:
+                    io_rate = self.read_counters(entry, now)
+                else:
+                    io_rate = 0.0
+            except psutil.Error:
+                # Exited or inaccessible while being read
+                continue
+
+            entries[pid] = entry
+            rows.append(ProcessInfo(pid, entry.name, cpu, entry.rss, io_rate))
+
+        # Processes that exited simply drop out here
+        self.entries = entries
+        return rows
+
+    def top(self):
+        rows = self.refresh()
+        return ProcessTop(*(tuple(heapq.nlargest(self.top_n, rows, key=SORT_KEYS[key]))
+                            for key in ('cpu', 'rss', 'io')),
+                          total=len(rows))
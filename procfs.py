@@ -0,0 +1,161 @@
+import os
+import numpy as np
+import psutil
+from collector import MemoryInfo, SwapInfo
+
+# Linux-only fast path for the readings the collector takes on every tick.
+# psutil opens, reads and parses /proc/stat, /proc/meminfo, /proc/diskstats
+# and /proc/net/dev again on each call, twice for cpu_percent and meminfo.
+# Here each file stays open and is re-read from offset 0 with preadv into a
+# buffer that is kept between ticks, and parsed in one pass. The results
+# match psutil's (see benchmarks/bench_procfs.py --check).
+
+# psutil always counts diskstats sectors as 512 bytes
+SECTOR_SIZE = 512
+
+# /proc/stat CPU columns up to steal; guest and guest_nice are already part
+# of user and nice, which is why psutil subtracts them from the total
+TOTAL_COLUMNS = 8
+IDLE, IOWAIT = 3, 4
+
+# /proc/diskstats columns for diskio.COUNTER_FIELDS: reads, writes, sectors
+# read, sectors written, ms reading, ms writing, ms busy
+DISK_COLUMNS = (3, 7, 5, 9, 6, 10, 12)
+
+# /proc/net/dev columns after the name for network.COUNTER_FIELDS
+NET_COLUMNS = (0, 8, 1, 9, 2, 10, 3, 11)
+
+
+def parse_ints(text):
+    # Whitespace-separated integers -> int64 array, parsed in C
+    return np.fromstring(text, dtype=np.int64, sep=' ')
+
+
+class ProcFile:
+    def __init__(self, path, size=8192):
+        self.path = path
+        self.fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+        self.buffer = bytearray(size)
+
+    def read(self):
+        # The whole file, read again from the start; the buffer doubles
+        # until a read fits (the kernel regenerates /proc files per read)
+        while True:
+            size = os.preadv(self.fd, [self.buffer], 0)
+            if size < len(self.buffer):
+                return bytes(memoryview(self.buffer)[:size])
+            self.buffer = bytearray(len(self.buffer) * 2)
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class ProcReader:
+    def __init__(self, root='/proc'):
+        # root is '/proc' except for a copy of another machine's files.
+        # Raises OSError where there is no procfs.
+        self.root = root
+        self.files = {}
+        self.previous_cpu = None
+        self.stat_file = self.open('stat')
+
+    def open(self, name):
+        # Files are opened on first use and then kept open
+        proc_file = self.files.get(name)
+        if proc_file is None:
+            proc_file = self.files[name] = ProcFile(os.path.join(self.root, name))
+        return proc_file
+
+    def cpu_times(self):
+        # (CPUs + 1, columns) jiffies; row 0 is the 'cpu' total line. The
+        # cpu lines come first and all have the same number of columns, so
+        # with the labels turned into numbers NumPy parses them in one call.
+        data = self.stat_file.read()
+        end = data.find(b'\nintr')
+        block = data[:end] if end >= 0 else data
+        width = len(block.partition(b'\n')[0].split())
+        values = parse_ints(b'-1' + block[3:].replace(b'cpu', b' '))
+        return values.reshape(-1, width)[:, 1:]
+
+    def cpu_percent(self):
+        # (total percent, per-CPU percents) since the previous call, rounded
+        # like psutil.cpu_percent; the first call primes the counters
+        times = self.cpu_times()
+        previous = self.previous_cpu
+        self.previous_cpu = times
+        if previous is None or previous.shape != times.shape:
+            return 0.0, (0.0,) * (len(times) - 1)
+        delta = np.maximum(times - previous, 0)[:, :TOTAL_COLUMNS]
+        total = delta.sum(axis=1)
+        busy = total - delta[:, IDLE] - delta[:, IOWAIT]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            percent = np.where(total > 0, busy / total * 100, 0.0)
+        percent = np.round(percent, 1).tolist()
+        return percent[0], tuple(percent[1:])
+
+    def meminfo(self):
+        # {b'MemTotal': bytes, ...}
+        values = {}
+        for line in self.open('meminfo').read().split(b'\n'):
+            name, _, rest = line.partition(b':')
+            if rest:
+                values[name] = int(rest.split()[0]) * 1024
+        return values
+
+    def memory(self):
+        # (MemoryInfo, SwapInfo) from one read, computed the way
+        # psutil.virtual_memory and swap_memory do
+        mems = self.meminfo()
+        total = mems[b'MemTotal']
+        free = mems[b'MemFree']
+        available = mems.get(b'MemAvailable', 0)
+        if not available:
+            # Kernels before 3.14: psutil estimates it from the LRU lists
+            ram = psutil.virtual_memory()
+            memory = MemoryInfo(ram.total, ram.used, ram.available, ram.percent)
+        else:
+            if available > total:
+                # Distorted inside some containers
+                available = free
+            memory = MemoryInfo(total, total - available, available, round((total - available) / total * 100, 1))
+
+        swap_total = mems.get(b'SwapTotal', 0)
+        swap_free = mems.get(b'SwapFree', 0)
+        swap_used = swap_total - swap_free
+        swap = SwapInfo(swap_total, swap_used, swap_free,
+                        round(swap_used / swap_total * 100, 1) if swap_total else 0.0)
+        return memory, swap
+
+    def disk_counters(self):
+        # (names, (devices, 7) counters) for every /proc/diskstats line,
+        # in diskio.COUNTER_FIELDS order
+        names = []
+        numbers = []
+        for line in self.open('diskstats').read().split(b'\n'):
+            fields = line.split()
+            if len(fields) == 14 or len(fields) >= 18:
+                names.append(fields[2].decode())
+                numbers.extend(fields[i] for i in DISK_COLUMNS)
+        values = parse_ints(b' '.join(numbers)).reshape(len(names), len(DISK_COLUMNS))
+        values[:, 2:4] *= SECTOR_SIZE
+        return names, values
+
+    def net_counters(self):
+        # (names, (NICs, 8) counters) in network.COUNTER_FIELDS order
+        names = []
+        numbers = []
+        # Two header lines
+        for line in self.open('net/dev').read().split(b'\n')[2:]:
+            name, _, rest = line.partition(b':')
+            if rest:
+                names.append(name.strip().decode())
+                fields = rest.split()
+                numbers.extend(fields[i] for i in NET_COLUMNS)
+        return names, parse_ints(b' '.join(numbers)).reshape(len(names), len(NET_COLUMNS))
+
+    def close(self):
+        for proc_file in self.files.values():
+            proc_file.close()
+        self.files = {}
@@ -1,17 +1,24 @@
-import psutil
-import time
 import tkinter as tk
 from tkinter import ttk
-import matplotlib.pyplot as plt
+import matplotlib.style
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import numpy as np
-import threading
+from collector import get_collector
+from render_scheduler import get_scheduler, bind_close, bind_visibility
+from gauge import UsageGauge
+from alerts import get_alerts
+from history import get_history
+from trend_chart import TrendChart
+from stats_view import StatsView
+from process_view import ProcessView
+from pressure import describe_pressure
 
 class RamDashboard:
     def __init__(self, root):
         self.root = root
         self.root.title("RAM Consumption Dashboard")
-        self.root.geometry("400x600")
+        self.root.geometry("500x1200")
         
         # Configure dark theme colors
         self.bg_color = "#1E1E1E"  # Dark background
@@ -41,6 +48,10 @@ class RamDashboard:
         self.usage_label = ttk.Label(self.usage_frame, text="RAM Usage: 0%")
         self.usage_label.pack(pady=5)
         
+        # Rolling 1/5/15 minute statistics next to the current value
+        self.stats_view = StatsView(self.usage_frame, 'memory.percent', frame_bg=self.frame_bg, fg_color=self.fg_color)
+        self.stats_view.pack(fill=tk.X, padx=5, pady=5)
+        
         self.total_ram_label = ttk.Label(self.usage_frame, text="Total RAM: 0 GB")
         self.total_ram_label.pack(pady=2)
         
@@ -63,84 +74,139 @@ class RamDashboard:
         self.swap_free_label = ttk.Label(self.swap_frame, text="Free Swap: 0 GB")
         self.swap_free_label.pack(pady=2)
         
+        # Create memory pressure frame: stalls, reclaim and dirty pages
+        self.pressure_frame = ttk.LabelFrame(self.main_frame, text="Memory Pressure")
+        self.pressure_frame.pack(fill=tk.X, pady=10)
+        
+        self.pressure_some_label = ttk.Label(self.pressure_frame, text="Some Stalled: N/A")
+        self.pressure_some_label.pack(pady=2)
+        
+        self.pressure_full_label = ttk.Label(self.pressure_frame, text="All Stalled: N/A")
+        self.pressure_full_label.pack(pady=2)
+        
+        self.faults_label = ttk.Label(self.pressure_frame, text="Major Faults: N/A")
+        self.faults_label.pack(pady=2)
+        
+        self.reclaim_label = ttk.Label(self.pressure_frame, text="Reclaim: N/A")
+        self.reclaim_label.pack(pady=2)
+        
+        self.dirty_label = ttk.Label(self.pressure_frame, text="Dirty: N/A")
+        self.dirty_label.pack(pady=2)
+        
+        # Stalls over time; switched to major faults on kernels without PSI.
+        # The dark theme applies to figures created after this.
+        matplotlib.style.use('dark_background')
+        self.pressure_fig = Figure(figsize=(4, 1.6), facecolor=self.frame_bg)
+        self.pressure_ax = self.pressure_fig.add_subplot()
+        self.pressure_canvas = FigureCanvasTkAgg(self.pressure_fig, master=self.pressure_frame)
+        self.pressure_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.pressure_trend = TrendChart(self.pressure_ax, get_history(), 'pressure.memory.some',
+                                         'Memory Stalls (%, 10s)', self.fg_color, self.accent_color, ylim=None)
+        self.pressure_fig.tight_layout()
+        
+        # Create top processes view
+        self.process_view = ProcessView(self.main_frame, sort='rss', frame_bg=self.frame_bg, fg_color=self.fg_color)
+        self.process_view.pack(fill=tk.X, pady=10)
+        
         # Create graph frame
         self.graph_frame = ttk.LabelFrame(self.main_frame, text="Usage Gauge")
         self.graph_frame.pack(fill=tk.BOTH, expand=True, pady=10)
         
         # Create matplotlib figure with dark theme
-        plt.style.use('dark_background')
-        self.fig, self.ax = plt.subplots(figsize=(4, 4), facecolor=self.frame_bg)
+        self.fig = Figure(figsize=(4, 4), facecolor=self.frame_bg)
+        self.ax = self.fig.add_subplot()
         self.canvas = FigureCanvasTkAgg(self.fig, master=self.graph_frame)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.gauge = UsageGauge(self.ax, 'RAM Usage', self.fg_color, self.accent_color,
+                                color=get_alerts().colorizer('memory.percent'))
+        
+        # Create trend frame fed from the shared history
+        self.trend_frame = ttk.LabelFrame(self.main_frame, text="Usage Trend")
+        self.trend_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+        
+        self.trend_fig = Figure(figsize=(4, 2), facecolor=self.frame_bg)
+        self.trend_ax = self.trend_fig.add_subplot()
+        self.trend_canvas = FigureCanvasTkAgg(self.trend_fig, master=self.trend_frame)
+        self.trend_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.history = get_history()
+        self.trend = TrendChart(self.trend_ax, self.history, 'memory.percent', 'RAM Usage Trend', self.fg_color, self.accent_color)
+        self.trend_fig.tight_layout()
+        
+        # Widget updates go through the main-thread scheduler
+        self.scheduler = get_scheduler(self.root)
         
         # Initialize data
         self.usage = 0
         self.update_gauge()
         
-        # Start update thread
-        self.update_thread = threading.Thread(target=self.update_metrics, daemon=True)
-        self.update_thread.start()
+        # Subscribe to the shared collector
+        self.collector = get_collector()
+        self.subscription = self.collector.subscribe(self.update_metrics, metrics=('memory', 'processes', 'pressure'))
+        
+        # Stop sampling and rendering for this window while it is hidden
+        bind_visibility(self.root, lambda visible: self.collector.set_active(self.subscription, visible))
+        
+        # Stop sampling for this window and free its figures once it is closed
+        bind_close(self.root, self.close)
     
-    def get_color(self, usage):
-        if usage < 60:
-            return '#00FF9D'  # Neon green
-        elif usage < 80:
-            return '#FFD700'  # Gold
-        else:
-            return '#FF4444'  # Bright red
+    def close(self):
+        self.collector.unsubscribe(self.subscription)
+        for figure in (self.pressure_fig, self.fig, self.trend_fig):
+            figure.clear()
     
     def format_bytes(self, bytes_value):
         gb = bytes_value / (1024**3)
         return f"{gb:.2f} GB"
     
-    def update_metrics(self):
-        while True:
-            # Get RAM information
-            ram = psutil.virtual_memory()
-            self.usage = ram.percent
-            
-            # Update RAM labels
-            self.usage_label.config(text=f"RAM Usage: {self.usage}%")
-            self.total_ram_label.config(text=f"Total RAM: {self.format_bytes(ram.total)}")
-            self.used_ram_label.config(text=f"Used RAM: {self.format_bytes(ram.used)}")
-            self.available_ram_label.config(text=f"Available RAM: {self.format_bytes(ram.available)}")
-            
-            # Get swap information
-            swap = psutil.swap_memory()
-            self.swap_total_label.config(text=f"Total Swap: {self.format_bytes(swap.total)}")
-            self.swap_used_label.config(text=f"Used Swap: {self.format_bytes(swap.used)}")
-            self.swap_free_label.config(text=f"Free Swap: {self.format_bytes(swap.free)}")
-            
-            self.update_gauge()
-            time.sleep(1)
+    def update_metrics(self, snapshot):
+        # Get RAM information
+        ram = snapshot.memory
+        self.usage = ram.percent
+        
+        # Update RAM labels
+        self.scheduler.configure(self.usage_label, text=f"RAM Usage: {self.usage}%")
+        self.scheduler.configure(self.total_ram_label, text=f"Total RAM: {self.format_bytes(ram.total)}")
+        self.scheduler.configure(self.used_ram_label, text=f"Used RAM: {self.format_bytes(ram.used)}")
+        self.scheduler.configure(self.available_ram_label, text=f"Available RAM: {self.format_bytes(ram.available)}")
+        
+        # Get swap information
+        swap = snapshot.swap
+        self.scheduler.configure(self.swap_total_label, text=f"Total Swap: {self.format_bytes(swap.total)}")
+        self.scheduler.configure(self.swap_used_label, text=f"Used Swap: {self.format_bytes(swap.used)}")
+        self.scheduler.configure(self.swap_free_label, text=f"Free Swap: {self.format_bytes(swap.free)}")
+        
+        if snapshot.vm is not None:
+            self.scheduler.call(self.update_pressure, snapshot.pressure, snapshot.vm)
+        
+        self.scheduler.call(self.process_view.update, snapshot.processes)
+        self.scheduler.call(self.stats_view.update)
+        self.scheduler.call(self.update_gauge)
+        self.scheduler.call(self.update_trend)
+    
+    def update_pressure(self, pressure, vm):
+        memory = pressure.memory if pressure is not None else None
+        if memory is not None:
+            self.pressure_some_label.config(text=f"Some Stalled: {describe_pressure(memory)}")
+            self.pressure_full_label.config(text=f"All Stalled: {describe_pressure(memory, 'full')}")
+        elif self.pressure_trend.series != 'vm.major_faults':
+            self.pressure_some_label.config(text="Some Stalled: N/A (no PSI on this kernel)")
+            self.pressure_full_label.config(text="All Stalled: N/A")
+            self.pressure_trend.series = 'vm.major_faults'
+            self.pressure_ax.set_title('Major Faults/s', color=self.accent_color)
+            self.pressure_canvas.draw_idle()
+        
+        self.faults_label.config(text=f"Major Faults: {vm.major_faults:.0f}/s, "
+                                      f"Swap In/Out: {vm.swap_in:.0f}/{vm.swap_out:.0f} pages/s")
+        efficiency = f" ({vm.stolen / vm.scanned * 100:.0f}% reclaimed)" if vm.scanned else ""
+        self.reclaim_label.config(text=f"Reclaim: {vm.scanned:.0f} pages/s scanned, "
+                                       f"{vm.stolen:.0f} stolen{efficiency}")
+        self.dirty_label.config(text=f"Dirty: {vm.dirty / 2 ** 20:.1f} MB, Writeback: {vm.writeback / 2 ** 20:.1f} MB, "
+                                     f"Slab: {vm.slab / 2 ** 20:.0f} MB")
+        self.pressure_trend.update()
     
     def update_gauge(self):
-        # Clear previous plot
-        self.ax.clear()
-        
-        # Create pie chart
-        sizes = [self.usage, 100 - self.usage]
-        colors = [self.get_color(self.usage), '#3D3D3D']  # Dark gray for unused portion
-        
-        # Draw the pie chart
-        wedges, texts = self.ax.pie(sizes, 
-                                   colors=colors,
-                                   startangle=90,
-                                   counterclock=False,
-                                   wedgeprops=dict(width=0.3))
-        
-        # Add percentage text in the center
-        self.ax.text(0, 0, f'{self.usage}%', 
-                    ha='center', 
-                    va='center', 
-                    fontsize=20,
-                    color=self.fg_color)
-        
-        # Set aspect ratio to be equal
-        self.ax.axis('equal')
-        
-        # Remove labels
-        self.ax.set_title('RAM Usage', color=self.accent_color)
-        
-        # Update canvas
-        self.canvas.draw()
\ No newline at end of file
+        # Only the wedge and centre text are repainted, and only on change
+        self.gauge.update(self.usage)
+    
+    def update_trend(self):
+        self.trend.update()
@@ -0,0 +1,112 @@
+import math
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    # The headless monitor and the exporter run without NumPy; rates are
+    # then computed row by row in plain Python
+    np = None
+
+WRAP_32 = 2 ** 32
+
+
+def counter_delta(previous, current):
+    # Element-wise increase of cumulative counters. A counter that went
+    # backwards either wrapped at 32 bits (old kernels, some NIC drivers) or
+    # was reset, e.g. a device that was removed and added again; after a
+    # reset everything it counts happened since it restarted from zero.
+    delta = current - previous
+    backwards = delta < 0
+    if backwards.any():
+        wrapped = current + WRAP_32 - previous
+        is_wrap = backwards & (previous < WRAP_32) & (wrapped < WRAP_32 // 2)
+        delta = np.where(is_wrap, wrapped, np.where(backwards, current, delta))
+    return delta
+
+
+def scalar_delta(previous, current):
+    # counter_delta for a single pair of counter values
+    delta = current - previous
+    if delta >= 0:
+        return delta
+    wrapped = current + WRAP_32 - previous
+    if previous < WRAP_32 and wrapped < WRAP_32 // 2:
+        return wrapped
+    return current
+
+
+class CounterRates:
+    def __init__(self, clock=time.monotonic):
+        # A monotonic clock, so wall-clock jumps never produce bogus rates
+        self.clock = clock
+        self.keys = []
+        self.index = {}
+        self.values = None
+        self.previous_time = None
+
+    def update(self, keys, current, now=None):
+        # keys: one name per row; current: (rows, fields) counter values.
+        # Returns per-second rates with the same shape; rows seen for the
+        # first time (and every row on the first call) are NaN. The result
+        # is an array with NumPy installed and a list of lists without.
+        now = self.clock() if now is None else now
+        if np is None:
+            rates = self.update_lists(keys, current, now)
+        else:
+            rates = self.update_array(keys, current, now)
+
+        if keys != self.keys:
+            self.keys = list(keys)
+            self.index = {key: i for i, key in enumerate(self.keys)}
+        self.previous_time = now
+        return rates
+
+    def update_array(self, keys, current, now):
+        current = np.asarray(current, dtype=np.float64)
+        if current.ndim != 2:
+            current = current.reshape(len(keys), -1 if len(keys) else 0)
+        rates = np.full(current.shape, np.nan)
+
+        previous_values = self.values
+        if (previous_values is not None and now > self.previous_time
+                and previous_values.shape[1] == current.shape[1]):
+            if keys == self.keys:
+                previous = previous_values
+                found = np.ones(len(keys), dtype=bool)
+            else:
+                rows = np.array([self.index.get(key, -1) for key in keys], dtype=np.intp)
+                found = rows >= 0
+                previous = previous_values[np.maximum(rows, 0)] if len(previous_values) else current
+
+            delta = counter_delta(previous, current)
+            rates[found] = delta[found] / (now - self.previous_time)
+
+        self.values = current
+        return rates
+
+    def update_lists(self, keys, current, now):
+        current = [[float(value) for value in row] for row in current]
+        rates = [[math.nan] * len(row) for row in current]
+
+        if self.values is not None and now > self.previous_time:
+            elapsed = now - self.previous_time
+            for i, key in enumerate(keys):
+                j = self.index.get(key)
+                if j is not None and len(self.values[j]) == len(current[i]):
+                    rates[i] = [scalar_delta(p, c) / elapsed for p, c in zip(self.values[j], current[i])]
+
+        self.values = current
+        return rates
+
+    def known_rows(self, keys, current, now=None):
+        # [(key, rates as a list)] for keys that already had a previous reading
+        rates = self.update(keys, current, now)
+        if np is not None:
+            rates = rates.tolist()
+        return [(key, row) for key, row in zip(keys, rates) if not any(map(math.isnan, row))]
+
+    def update_dict(self, counters, now=None):
+        # counters: {key: sequence of counter values} -> {key: rates}
+        keys = list(counters)
+        return dict(self.known_rows(keys, [counters[key] for key in keys], now))
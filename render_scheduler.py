@@ -0,0 +1,159 @@
+import queue
+import time
+import traceback
+import tkinter as tk
+from instrument import callable_name, instruments, timed
+
+
+class RenderScheduler:
+    def __init__(self, root, frame_interval=50, frame_budget=12, idle_interval=250, idle_frames=10):
+        # frame_interval, frame_budget and idle_interval are in milliseconds.
+        # After idle_frames frames without work (all windows hidden, or
+        # between collector ticks) frames slow down to idle_interval.
+        self.root = root
+        self.frame_interval = frame_interval
+        self.frame_budget = frame_budget / 1000
+        self.idle_interval = idle_interval
+        self.idle_frames = idle_frames
+        self.idle_count = 0
+
+        # Filled from any thread, drained on the Tk main loop
+        self.queue = queue.SimpleQueue()
+
+        # Work waiting for the next frame; newer values replace older ones
+        self.pending_configs = {}
+        self.pending_calls = {}
+        self.pending_draws = {}
+
+        self.after_id = self.root.after(self.frame_interval, self.run_frame)
+
+    def configure(self, widget, **options):
+        # Thread-safe replacement for widget.config(...)
+        self.queue.put(('configure', widget, options))
+
+    def call(self, func, *args):
+        # Run func on the main thread; only the latest args per func are used
+        self.queue.put(('call', func, args))
+
+    def request_draw(self, canvas):
+        # Redraw a FigureCanvasTkAgg at most once per frame
+        self.queue.put(('draw', canvas, None))
+
+    def drain(self):
+        while True:
+            try:
+                kind, key, value = self.queue.get_nowait()
+            except queue.Empty:
+                return
+
+            if kind == 'configure':
+                self.pending_configs.setdefault(key, {}).update(value)
+            elif kind == 'call':
+                self.pending_calls[key] = value
+            else:
+                self.pending_draws[key] = None
+
+    def run_frame(self):
+        started = time.perf_counter()
+        self.drain()
+        if self.pending_configs or self.pending_calls or self.pending_draws:
+            self.idle_count = 0
+        else:
+            self.idle_count += 1
+
+        # Widget options are cheap, apply all of them
+        configs = self.pending_configs
+        self.pending_configs = {}
+        for widget, options in configs.items():
+            with timed('tk.configure'):
+                self.run_safely(widget.config, **options)
+
+        # Calls and redraws are expensive; stop once the frame budget is
+        # spent and carry the rest over to the next frame
+        work_done = False
+        while self.pending_calls:
+            if work_done and time.perf_counter() - started > self.frame_budget:
+                break
+            func = next(iter(self.pending_calls))
+            args = self.pending_calls.pop(func)
+            with timed(f'tk.call {callable_name(func)}'):
+                self.run_safely(func, *args)
+            work_done = True
+
+        # Pick up redraws requested by the calls above
+        self.drain()
+
+        while self.pending_draws:
+            if work_done and time.perf_counter() - started > self.frame_budget:
+                break
+            canvas = next(iter(self.pending_draws))
+            del self.pending_draws[canvas]
+            with timed('canvas.draw'):
+                self.run_safely(canvas.draw)
+            work_done = True
+
+        if work_done or configs:
+            instruments.record('tk.frame', time.perf_counter() - started)
+        interval = self.idle_interval if self.idle_count >= self.idle_frames else self.frame_interval
+        self.after_id = self.root.after(interval, self.run_frame)
+
+    def run_safely(self, func, *args, **kwargs):
+        try:
+            func(*args, **kwargs)
+        except tk.TclError:
+            # The widget was destroyed after the update was queued
+            pass
+        except Exception:
+            traceback.print_exc()
+
+
+_schedulers = {}
+
+
+def get_scheduler(widget, **options):
+    # One scheduler per Tk interpreter; must be first called on the main thread
+    root = widget._root()
+    scheduler = _schedulers.get(root)
+    if scheduler is None:
+        scheduler = RenderScheduler(root, **options)
+        _schedulers[root] = scheduler
+    return scheduler
+
+
+def bind_visibility(window, callback):
+    # Calls callback(visible) when a Toplevel is mapped, unmapped (closed,
+    # iconified, moved to another workspace) or completely covered
+    state = {'visible': True}
+
+    def update(event, visible):
+        # Bindings on a Toplevel also fire for every child widget
+        if event.widget is window and visible != state['visible']:
+            state['visible'] = visible
+            callback(visible)
+
+    window.bind("<Map>", lambda event: update(event, True), add="+")
+    window.bind("<Unmap>", lambda event: update(event, False), add="+")
+    window.bind("<Visibility>", lambda event: update(event, event.state != 'VisibilityFullyObscured'), add="+")
+
+
+def bind_close(window, callback):
+    # Calls callback() once when a Toplevel goes away, whether the user
+    # closed it (WM_DELETE_WINDOW) or it was destroyed with its parent
+    state = {'closed': False}
+
+    def close():
+        if not state['closed']:
+            state['closed'] = True
+            callback()
+
+    def on_delete():
+        close()
+        window.destroy()
+
+    def on_destroy(event):
+        # Bindings on a Toplevel also fire for every child widget
+        if event.widget is window:
+            close()
+
+    window.protocol("WM_DELETE_WINDOW", on_delete)
+    window.bind("<Destroy>", on_destroy, add="+")
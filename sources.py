@@ -0,0 +1,431 @@
+import os
+import gzip
+import json
+import time
+import random
+import argparse
+import threading
+from cgroup import CgroupStats
+from collector import (GROUP_FIELDS, METRICS, DiskIO, DiskUsage, MemoryInfo, MetricsCollector, Sampler,
+                       Snapshot, SwapInfo)
+from diskio import DiskDevice, MountUsage
+from gpu import GpuSample
+from hardware import CpuTopology
+from network import NicRates
+from pressure import Pressure, PressureInfo, VmActivity
+from processes import ProcessInfo, ProcessTop
+
+# Data sources the collector can sample instead of this machine:
+#     live[:procfs][,cgroup[=PATH]]          psutil (default) or /proc, and nvidia-smi;
+#                                            cgroup reports a container's limits
+#     replay:PATH[@SPEED]                    a recording, at 1x, 10x, ... or max
+#     synthetic[:cores=256,disks=48,...]     a generated host of any size
+# Every source has sample(metrics) -> Snapshot, release(metrics) for groups
+# nobody subscribes to any more, cpu_count(logical), topology() and an
+# interval hint for the collector.
+
+FORMAT = 'system-dashboard-recording'
+VERSION = 1
+
+# Replay at max speed still yields now and then so Tk keeps up
+MAX_SPEED_INTERVAL = 0.001
+
+# Snapshot fields holding one namedtuple, and lists of them
+RECORD_TYPES = {'memory': MemoryInfo, 'swap': SwapInfo, 'disk_usage': DiskUsage, 'disk_io': DiskIO,
+                'cgroup': CgroupStats, 'vm': VmActivity}
+LIST_TYPES = {'disks': DiskDevice, 'mounts': MountUsage, 'gpus': GpuSample, 'nics': NicRates}
+
+GIB = 1024 ** 3
+
+
+def open_file(path, mode):
+    # Recordings ending in .gz are compressed
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def encode_snapshot(snapshot):
+    # One JSON line; namedtuples become lists in field order
+    values = snapshot._asdict()
+    values['sampled'] = sorted(snapshot.sampled)
+    return json.dumps(values, separators=(',', ':'))
+
+
+def decode_snapshot(record):
+    values = dict.fromkeys(Snapshot._fields)
+    values.update((field, record[field]) for field in Snapshot._fields if field in record)
+    for field, cls in RECORD_TYPES.items():
+        if values[field] is not None:
+            values[field] = cls(*values[field])
+    for field, cls in LIST_TYPES.items():
+        if values[field] is not None:
+            values[field] = tuple(cls(*row) for row in values[field])
+    if values['per_core'] is not None:
+        values['per_core'] = tuple(values['per_core'])
+    if values['processes'] is not None:
+        *tops, total = values['processes']
+        values['processes'] = ProcessTop(*(tuple(ProcessInfo(*row) for row in top) for top in tops), total)
+    if values['pressure'] is not None:
+        values['pressure'] = Pressure(*(PressureInfo(*info) if info else None for info in values['pressure']))
+    values['sampled'] = frozenset(values['sampled'] or ())
+    return Snapshot(**values)
+
+
+def snapshot_groups(snapshot):
+    # Metric groups a recorded snapshot has values for
+    return frozenset(metric for metric in METRICS if getattr(snapshot, GROUP_FIELDS[metric][0]) is not None)
+
+
+class Recorder:
+    def __init__(self, collector, path, flush_interval=1.0):
+        # Appends every snapshot the collector publishes to path as JSON
+        # lines, after a header describing the host. Snapshots are the
+        # merged ones the dashboards see, so every line is complete for the
+        # groups that were open at the time.
+        self.collector = collector
+        self.path = path
+        self.flush_interval = flush_interval
+        self.file = open_file(path, 'w')
+        self.lock = threading.Lock()
+        self.last_flush = time.monotonic()
+        self.count = 0
+
+        source = collector.source
+        header = {
+            'format': FORMAT,
+            'version': VERSION,
+            'interval': collector.interval,
+            'cpu_count': source.cpu_count(),
+            'physical_cores': source.cpu_count(logical=False),
+            'topology': source.topology(),
+            'fields': list(Snapshot._fields),
+        }
+        self.file.write(json.dumps(header) + '\n')
+        self.token = collector.subscribe(self.write, metrics=())
+
+    def write(self, snapshot):
+        # Runs on the collector thread
+        with self.lock:
+            if self.file is None:
+                return
+            self.file.write(encode_snapshot(snapshot) + '\n')
+            self.count += 1
+            now = time.monotonic()
+            if now - self.last_flush >= self.flush_interval:
+                self.file.flush()
+                self.last_flush = now
+
+    def close(self):
+        self.collector.unsubscribe(self.token)
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+class ReplaySource:
+    live = False
+
+    def __init__(self, path, speed=1.0, loop=True):
+        # speed is a multiple of real time, or None for as fast as the
+        # collector can go: then every sample() returns the next record
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.file = None
+        self.header = self.open()
+        self.interval = (self.header.get('interval', 1.0) / speed) if speed else MAX_SPEED_INTERVAL
+
+        # Replay clock: recorded time = first + (monotonic - started) * speed
+        self.current = None
+        self.pending = None
+        self.first = None
+        self.started = None
+
+    def open(self):
+        if self.file is not None:
+            self.file.close()
+        self.file = open_file(self.path, 'r')
+        header = json.loads(self.file.readline() or 'null')
+        if not isinstance(header, dict) or header.get('format') != FORMAT:
+            raise ValueError(f"{self.path} is not a dashboard recording")
+        if header.get('version', 0) > VERSION:
+            raise ValueError(f"{self.path} was written by a newer version (format {header['version']})")
+        return header
+
+    def read(self):
+        # Next record, rewinding at the end when looping; None at the end
+        line = self.file.readline()
+        if not line and self.loop and self.current is not None:
+            self.open()
+            self.first = self.started = None
+            line = self.file.readline()
+        if not line:
+            return None
+        return decode_snapshot(json.loads(line))
+
+    def advance(self):
+        if self.speed is None:
+            snapshot = self.read()
+            if snapshot is not None:
+                self.current = snapshot
+            return
+
+        # Move to the last record at or before the replay clock
+        now = time.monotonic()
+        while True:
+            if self.pending is None:
+                self.pending = self.read()
+                if self.pending is None:
+                    return
+            if self.first is None:
+                self.first, self.started = self.pending.timestamp, now
+            if self.current is not None and \
+                    self.pending.timestamp - self.first > (now - self.started) * self.speed:
+                return
+            self.current, self.pending = self.pending, None
+
+    def sample(self, metrics):
+        self.advance()
+        values = dict.fromkeys(Snapshot._fields)
+        values['timestamp'] = time.time()
+        if self.current is None:
+            values['sampled'] = frozenset()
+            return Snapshot(**values)
+        sampled = frozenset(metrics) & snapshot_groups(self.current)
+        for metric in sampled:
+            for field in GROUP_FIELDS[metric]:
+                values[field] = getattr(self.current, field)
+        values['sampled'] = sampled
+        return Snapshot(**values)
+
+    def release(self, metrics):
+        # Nothing runs in the background
+        pass
+
+    def cpu_count(self, logical=True):
+        if logical:
+            return self.header.get('cpu_count')
+        return self.header.get('physical_cores')
+
+    def topology(self):
+        topology = self.header.get('topology')
+        return [CpuTopology(*entry) for entry in topology] if topology else None
+
+
+class SyntheticSource:
+    live = False
+
+    def __init__(self, cores=8, disks=2, nics=1, gpus=0, processes=300, sockets=None, smt=2,
+                 interval=1.0, seed=0):
+        # A made-up host whose readings do bounded random walks. CPUs are
+        # numbered like Linux does: the SMT siblings of the first half of
+        # the CPUs are the second half.
+        self.rng = random.Random(seed)
+        self.cores = cores
+        self.smt = smt if cores % smt == 0 else 1
+        self.sockets = sockets or (2 if cores >= 32 else 1)
+        self.interval = interval
+        self.memory_total = max(cores * 4, 16) * GIB
+
+        rng = self.rng
+        self.per_core = [rng.uniform(0, 60) for _ in range(cores)]
+        self.memory_percent = rng.uniform(30, 60)
+        self.disk_names = [f"nvme{i}n1" for i in range(disks)]
+        self.disk_busy = [rng.uniform(0, 50) for _ in range(disks)]
+        self.disk_totals = [0, 0]
+        self.nic_names = [f"eth{i}" for i in range(nics)]
+        self.nic_load = [rng.uniform(0, 30) for _ in range(nics)]
+        self.gpu_usage = [rng.uniform(0, 80) for _ in range(gpus)]
+        self.process_pool = [ProcessInfo(pid, f"synthetic-{pid}", 0.0, rng.randrange(1, 2048) * 2 ** 20, 0.0)
+                             for pid in range(1000, 1000 + processes)]
+        self.last_time = None
+
+    def walk(self, value, step, low=0.0, high=100.0):
+        return min(max(value + self.rng.uniform(-step, step), low), high)
+
+    def sample(self, metrics):
+        values = dict.fromkeys(Snapshot._fields)
+        now = values['timestamp'] = time.time()
+        values['sampled'] = frozenset(metrics)
+        elapsed = max(now - self.last_time, 1e-3) if self.last_time is not None else self.interval
+        self.last_time = now
+        walk = self.walk
+
+        if 'cpu' in metrics:
+            self.per_core = [walk(usage, 8.0) for usage in self.per_core]
+            values['per_core'] = tuple(round(usage, 1) for usage in self.per_core)
+            values['cpu_percent'] = round(sum(self.per_core) / max(self.cores, 1), 1)
+            values['cpu_freq'] = round(walk(2400.0, 300.0, 800.0, 3600.0), 1)
+
+        if 'memory' in metrics:
+            self.memory_percent = walk(self.memory_percent, 2.0, 5.0, 99.0)
+            used = int(self.memory_total * self.memory_percent / 100)
+            values['memory'] = MemoryInfo(self.memory_total, used, self.memory_total - used,
+                                          round(self.memory_percent, 1))
+            values['swap'] = SwapInfo(8 * GIB, GIB, 7 * GIB, 12.5)
+
+        if 'disk' in metrics:
+            values['disk_usage'] = DiskUsage(1000 * GIB, 400 * GIB, 600 * GIB, 40.0)
+            devices = []
+            for i, name in enumerate(self.disk_names):
+                busy = self.disk_busy[i] = walk(self.disk_busy[i], 10.0)
+                read_bps, write_bps = busy * 4e6, busy * 2e6
+                self.disk_totals[0] += read_bps * elapsed
+                self.disk_totals[1] += write_bps * elapsed
+                devices.append(DiskDevice(name, read_bps, write_bps, busy * 40, busy * 20,
+                                          0.1 + busy / 50, busy / 25, busy))
+            values['disks'] = tuple(devices)
+            values['disk_io'] = DiskIO(int(self.disk_totals[0]), int(self.disk_totals[1]))
+            values['mounts'] = (MountUsage('/dev/root', '/', 'ext4', 100 * GIB, 40 * GIB, 60 * GIB, 40.0),) + tuple(
+                MountUsage(f"/dev/{name}p1", f"/data/{name}", 'xfs', 4000 * GIB, 2000 * GIB, 2000 * GIB, 50.0)
+                for name in self.disk_names)
+
+        if 'gpu' in metrics:
+            self.gpu_usage = [walk(usage, 10.0) for usage in self.gpu_usage]
+            values['gpus'] = tuple(GpuSample(i, "Synthetic GPU", round(usage), round(usage * 160), 16384.0,
+                                             round(35 + usage / 2), round(50 + usage * 2.5, 1))
+                                   for i, usage in enumerate(self.gpu_usage))
+
+        if 'processes' in metrics:
+            # A few processes change load on every sample, like a real host
+            pool = self.process_pool
+            for _ in range(min(len(pool), 20)):
+                i = self.rng.randrange(len(pool))
+                pool[i] = pool[i]._replace(cpu_percent=round(self.rng.expovariate(0.2), 1),
+                                           io_rate=self.rng.choice((0.0, self.rng.uniform(0, 5e7))))
+            values['processes'] = ProcessTop(
+                tuple(sorted(pool, key=lambda p: p.cpu_percent, reverse=True)[:10]),
+                tuple(sorted(pool, key=lambda p: p.rss, reverse=True)[:10]),
+                tuple(sorted(pool, key=lambda p: p.io_rate, reverse=True)[:10]),
+                len(pool))
+
+        if 'net' in metrics:
+            nics = []
+            for i, name in enumerate(self.nic_names):
+                load = self.nic_load[i] = walk(self.nic_load[i], 5.0)
+                rx_bps, tx_bps = load * 1.25e7, load * 0.6e7
+                nics.append(NicRates(name, rx_bps, tx_bps, rx_bps / 800, tx_bps / 1200,
+                                     0.0, 0.0, 0.0, 0.0, 10000, round(load, 1)))
+            values['nics'] = tuple(nics)
+
+        if 'tcp' in metrics:
+            values['tcp_states'] = {'ESTABLISHED': 40 * self.cores, 'LISTEN': 30,
+                                    'TIME_WAIT': self.rng.randrange(0, 10 * self.cores + 1)}
+
+        if 'pressure' in metrics:
+            # Tasks start stalling once a resource runs hot
+            cpu = max(sum(self.per_core) / max(self.cores, 1) - 70.0, 0.0)
+            memory = max(self.memory_percent - 85.0, 0.0) * 3
+            io = max(sum(self.disk_busy) / max(len(self.disk_busy), 1) - 40.0, 0.0)
+            values['pressure'] = Pressure(*(PressureInfo(some, some * 0.8, some * 0.6, some * 10, some / 2,
+                                                         some * 0.4, some * 0.3, some * 5)
+                                            for some in (cpu, memory, io)))
+            values['vm'] = VmActivity(memory * 20, memory * 5, memory * 10, memory * 2000, memory * 1500,
+                                      64 * 2 ** 20, 0, self.memory_total // 50)
+
+        return Snapshot(**values)
+
+    def release(self, metrics):
+        # Nothing runs in the background
+        pass
+
+    def cpu_count(self, logical=True):
+        return self.cores if logical else self.cores // self.smt
+
+    def topology(self):
+        # One NUMA node per socket
+        physical = self.cores // self.smt
+        per_socket = max(physical // self.sockets, 1)
+        topology = []
+        for cpu in range(self.cores):
+            package = min((cpu % physical) // per_socket, self.sockets - 1)
+            topology.append(CpuTopology(package, cpu % physical, package))
+        return topology
+
+
+def parse_options(text):
+    # 'cores=256,disks=48' -> {'cores': 256, 'disks': 48}
+    options = {}
+    for item in filter(None, text.split(',')):
+        key, _, value = item.partition('=')
+        try:
+            options[key.strip()] = float(value) if key.strip() == 'interval' else int(value)
+        except ValueError:
+            raise ValueError(f"Bad synthetic option {item!r}: expected name=number")
+    return options
+
+
+def parse_speed(text):
+    # '10', '10x' or 'max' (None)
+    text = text.strip().lower()
+    if text == 'max':
+        return None
+    try:
+        speed = float(text[:-1] if text.endswith('x') else text)
+    except ValueError:
+        raise ValueError(f"Bad replay speed {text!r}: expected a number or max")
+    if speed <= 0:
+        raise ValueError(f"Replay speed must be positive, not {text}")
+    return speed
+
+
+def open_live(options):
+    # 'procfs,cgroup=/system.slice/app.service' -> Sampler
+    backend = 'psutil'
+    container = False
+    cgroup = None
+    for option in filter(None, options.split(',')):
+        name, _, value = option.partition('=')
+        if name == 'cgroup':
+            container = True
+            cgroup = value or None
+        else:
+            backend = option
+    return Sampler(backend, container, cgroup)
+
+
+def open_source(spec):
+    # Source for a --source / DASHBOARD_SOURCE spec; raises ValueError
+    kind, _, rest = (spec or 'live').partition(':')
+    if kind == 'live':
+        return open_live(rest)
+    if kind == 'replay':
+        path, _, speed = rest.rpartition('@')
+        if not path:
+            path, speed = rest, '1'
+        return ReplaySource(path, parse_speed(speed))
+    if kind == 'synthetic':
+        return SyntheticSource(**parse_options(rest))
+    raise ValueError(f"Unknown data source {spec!r}: expected live[:procfs][,cgroup], replay:PATH[@SPEED] "
+                     f"or synthetic[:OPTIONS]")
+
+
+def record(path, seconds, metrics=METRICS, interval=1.0):
+    # Record this machine from the command line, no windows needed
+    collector = MetricsCollector(interval)
+    recorder = Recorder(collector, path)
+    token = collector.subscribe(lambda snapshot: None, metrics=metrics)
+    try:
+        time.sleep(seconds)
+    except KeyboardInterrupt:
+        pass
+    collector.unsubscribe(token)
+    recorder.close()
+    return recorder.count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record this machine for replaying in the dashboards")
+    parser.add_argument('path', help="recording to write; compressed if it ends in .gz")
+    parser.add_argument('--seconds', type=float, default=60.0)
+    parser.add_argument('--interval', type=float, default=1.0)
+    parser.add_argument('--metrics', default=','.join(METRICS), help="comma-separated metric groups")
+    args = parser.parse_args()
+    count = record(args.path, args.seconds, tuple(m for m in args.metrics.split(',') if m), args.interval)
+    print(f"Wrote {count} snapshots to {os.path.abspath(args.path)}")
+
+
+if __name__ == "__main__":
+    main()
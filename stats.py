@@ -0,0 +1,145 @@
+import math
+import threading
+from collections import deque, namedtuple
+from collector import get_collector, snapshot_series
+
+# Window name -> length in seconds, like the 1/5/15 minute load averages
+WINDOWS = (('1m', 60), ('5m', 300), ('15m', 900))
+
+# Each window is split into this many panes; the oldest pane is dropped as a
+# whole, so a window covers between PANES-1 and PANES pane lengths
+PANES = 15
+
+Summary = namedtuple('Summary', ['window', 'ewma', 'min', 'max', 'p50', 'p95', 'p99', 'count'])
+
+
+class QuantileSketch:
+    def __init__(self, relative_accuracy=0.01):
+        # Log-spaced buckets (as in DDSketch): any quantile is returned within
+        # relative_accuracy of a value that was really seen. The bucket count
+        # only depends on the range of the values, never on how many there are.
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        # Metrics are never negative; zero and below share one bucket
+        if value > 1e-9:
+            key = math.ceil(math.log(value) / self.log_gamma)
+            self.buckets[key] = self.buckets.get(key, 0) + 1
+        else:
+            self.zero_count += 1
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q):
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return max(self.min, 0.0)
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                # Middle of the bucket, clamped to what was actually seen
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+
+class WindowStats:
+    def __init__(self, length, panes=PANES):
+        self.length = length
+        self.pane_length = length / panes
+        # (pane id, sketch), oldest first
+        self.panes = deque(maxlen=panes)
+        self.ewma = None
+        self.last_time = None
+
+    def add(self, timestamp, value):
+        pane_id = int(timestamp // self.pane_length)
+        if not self.panes or self.panes[-1][0] != pane_id:
+            self.panes.append((pane_id, QuantileSketch()))
+        self.panes[-1][1].add(value)
+
+        # Time-weighted, so a burst of fast samples counts for its duration
+        # rather than its number of samples
+        if self.ewma is None:
+            self.ewma = value
+        elif timestamp > self.last_time:
+            alpha = 1 - math.exp(-(timestamp - self.last_time) / self.length)
+            self.ewma += alpha * (value - self.ewma)
+        self.last_time = timestamp
+
+    def summary(self, name, now):
+        # Panes older than the window are skipped even before a newer
+        # pane pushes them out
+        oldest = int(now // self.pane_length) - self.panes.maxlen + 1
+        merged = QuantileSketch()
+        for pane_id, pane in self.panes:
+            if pane_id >= oldest:
+                merged.merge(pane)
+        if merged.count == 0:
+            return None
+        return Summary(name, self.ewma, merged.min, merged.max,
+                       merged.quantile(0.5), merged.quantile(0.95), merged.quantile(0.99), merged.count)
+
+
+class MetricStats:
+    def __init__(self, windows=WINDOWS):
+        self.windows = windows
+        # series name -> [WindowStats per window]
+        self.series = {}
+        self.last_time = None
+        self.lock = threading.Lock()
+
+    def append(self, snapshot):
+        with self.lock:
+            self.last_time = snapshot.timestamp
+            for name, value in snapshot_series(snapshot, snapshot.sampled):
+                stats = self.series.get(name)
+                if stats is None:
+                    stats = self.series[name] = [WindowStats(length) for _, length in self.windows]
+                for window in stats:
+                    window.add(snapshot.timestamp, value)
+
+    def summaries(self, name):
+        # One Summary per window that has samples, shortest window first
+        with self.lock:
+            stats = self.series.get(name)
+            if stats is None:
+                return []
+            summaries = (window.summary(label, self.last_time)
+                         for (label, _), window in zip(self.windows, stats))
+            return [summary for summary in summaries if summary is not None]
+
+
+_stats = None
+_stats_lock = threading.Lock()
+
+
+def get_stats():
+    # Shared statistics fed by the collector
+    global _stats
+    with _stats_lock:
+        if _stats is None:
+            _stats = MetricStats()
+            get_collector().subscribe(_stats.append, metrics=())
+        return _stats
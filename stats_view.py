@@ -0,0 +1,53 @@
+import tkinter as tk
+from tkinter import ttk
+from stats import WINDOWS, get_stats
+from instrument import instrumented
+
+COLUMNS = (
+    ('window', "Window", 55),
+    ('ewma', "EWMA", 65),
+    ('min', "Min", 65),
+    ('p50', "p50", 65),
+    ('p95', "p95", 65),
+    ('p99', "p99", 65),
+    ('max', "Max", 65),
+)
+
+
+def format_percent(value):
+    return f"{value:.1f}%"
+
+
+class StatsView:
+    def __init__(self, parent, series, format_value=format_percent, frame_bg="#2D2D2D", fg_color="#FFFFFF"):
+        # Rolling statistics of one history series, shown under its current value
+        self.series = series
+        self.format_value = format_value
+        self.stats = get_stats()
+
+        style = ttk.Style()
+        style.configure("Stats.Treeview", background=frame_bg, fieldbackground=frame_bg,
+                        foreground=fg_color, rowheight=18)
+
+        self.tree = ttk.Treeview(parent, columns=[c[0] for c in COLUMNS], show="headings",
+                                 height=len(WINDOWS), style="Stats.Treeview")
+        for key, heading, width in COLUMNS:
+            self.tree.heading(key, text=heading)
+            self.tree.column(key, width=width, anchor="w" if key == 'window' else "e")
+
+        # One row per window, created once
+        self.items = {name: self.tree.insert("", tk.END, values=(name,) + ("",) * (len(COLUMNS) - 1))
+                      for name, _ in WINDOWS}
+
+    def pack(self, **options):
+        self.tree.pack(**options)
+
+    @instrumented('stats_view.update')
+    def update(self):
+        # Must run on the Tk main thread
+        for summary in self.stats.summaries(self.series):
+            self.tree.item(self.items[summary.window], values=(
+                summary.window,
+                *(self.format_value(value) for value in (summary.ewma, summary.min, summary.p50,
+                                                         summary.p95, summary.p99, summary.max)),
+            ))
@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+import alerts
+from collector import MetricsCollector, Snapshot
+from sources import SyntheticSource
+
+
+@pytest.fixture
+def shared_engine(monkeypatch):
+    # A fresh shared engine on a collector of a made-up host
+    collector = MetricsCollector(source=SyntheticSource(gpus=1, interval=0.05))
+    monkeypatch.setattr(alerts, 'get_collector', lambda: collector)
+    monkeypatch.setattr(alerts, '_alerts', None)
+    monkeypatch.setattr(alerts, '_banner', None)
+    return collector
+
+
+def write_rules(path, rules, **sinks):
+    path.write_text(json.dumps({'rules': rules, 'sinks': dict(sinks, log=None, banner=None)}))
+    return str(path)
+
+
+def write_config(path, **sinks):
+    return write_rules(path, [{'name': 'gpu-hot', 'series': 'gpu.*.temperature', 'above': 85, 'clear': 80}],
+                       **sinks)
+
+
+def test_shared_engine_samples_nothing_of_its_own(shared_engine, tmp_path):
+    # Opening any window must not start nvidia-smi or NIC sampling for the rules
+    alerts.get_alerts(write_config(tmp_path / 'alerts.json'))
+    assert shared_engine.wanted_metrics() == set()
+
+
+def test_background_alerting_samples_the_configured_groups(shared_engine, tmp_path):
+    alerts.get_alerts(write_config(tmp_path / 'alerts.json', background=True))
+    assert shared_engine.wanted_metrics() == {'gpu'}
+
+
+def cpu_snapshot(timestamp, percent):
+    values = dict.fromkeys(Snapshot._fields)
+    values.update(timestamp=timestamp, sampled=frozenset(('cpu',)), cpu_percent=percent, per_core=())
+    return Snapshot(**values)
+
+
+def test_hysteresis_sends_one_firing_and_one_resolve(tmp_path):
+    server, received = alerts.start_webhook_stub()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/"
+        rules, _ = alerts.load_config(write_rules(tmp_path / 'alerts.json', [
+            {'name': 'cpu-hot', 'series': 'cpu.percent', 'type': 'sustained', 'above': 80, 'clear': 70,
+             'for': 2, 'severity': 'critical'}]))
+        engine = alerts.AlertEngine(rules, [alerts.WebhookSink(url)])
+
+        # Over for less than the hold time, hovering between clear and the
+        # threshold, then back under clear
+        readings = [50, 85, 90, 60, 85, 90, 95, 75, 85, 72, 65, 75, 60]
+        transitions = []
+        for second, percent in enumerate(readings):
+            transitions += [alert.state for alert in engine.evaluate(cpu_snapshot(1000.0 + second, percent))]
+        assert transitions == ['firing', 'resolved']
+
+        posts = [received.get(timeout=5), received.get(timeout=5)]
+        assert [[alert['state'] for alert in post] for post in posts] == [['firing'], ['resolved']]
+        assert posts[0][0]['value'] == 95
+        assert received.empty()
+    finally:
+        server.shutdown()
@@ -0,0 +1,85 @@
+import time
+
+import pytest
+
+from cgroup import CgroupTracker, CgroupTree, cpu_limit, find_root
+
+
+def write(directory, **files):
+    # cpu_max='...' writes cpu.max
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, text in files.items():
+        (directory / name.replace('_', '.', 1)).write_text(text)
+
+
+def cpu_stat(usage_usec, periods, throttled, throttled_usec):
+    return (f"usage_usec {usage_usec}\nuser_usec 0\nsystem_usec 0\nnr_periods {periods}\n"
+            f"nr_throttled {throttled}\nthrottled_usec {throttled_usec}\n")
+
+
+@pytest.fixture
+def cgroupfs(tmp_path, monkeypatch):
+    # A container limited to 1.5 CPUs by its parent and to 1 GiB itself
+    monkeypatch.delenv('DASHBOARD_CGROUP_ROOT', raising=False)
+    write(tmp_path, cgroup_controllers="cpu memory io", cpu_max="max 100000")
+    write(tmp_path / 'pods', cpu_max="150000 100000", memory_max="max", **{'cpuset.cpus.effective': "0-7"})
+    write(tmp_path / 'pods' / 'app',
+          cpu_max="max 100000",
+          **{'cpuset.cpus.effective': "0-7"},
+          cpu_stat=cpu_stat(0, 0, 0, 0),
+          memory_current=str(600 * 2 ** 20),
+          memory_max=str(2 ** 30),
+          memory_stat=f"anon 1\ninactive_file {100 * 2 ** 20}\n",
+          io_stat="8:0 rbytes=0 wbytes=0 rios=0 wios=0 dbytes=0 dios=0\n")
+    return tmp_path
+
+
+def test_root_comes_from_the_environment(cgroupfs, monkeypatch):
+    monkeypatch.setenv('DASHBOARD_CGROUP_ROOT', str(cgroupfs))
+    assert find_root() == str(cgroupfs)
+
+
+def test_tightest_limit_wins(cgroupfs):
+    assert cpu_limit(str(cgroupfs), '/pods/app') == 1.5
+    assert cpu_limit(str(cgroupfs), '/pods') == 1.5
+
+
+def test_tracker_limits_and_throttling(cgroupfs):
+    tracker = CgroupTracker('/pods/app', root=str(cgroupfs))
+    stats = tracker.sample()
+    assert stats.cpu_limit == 1.5
+    assert stats.memory_max == 2 ** 30
+    # The working set leaves out inactive page cache
+    assert stats.memory_used == 500 * 2 ** 20
+    assert stats.memory_current == 600 * 2 ** 20
+    assert stats.memory_percent == pytest.approx(48.8, abs=0.1)
+
+    # 20 CFS periods, 5 of them throttled
+    time.sleep(0.2)
+    write(cgroupfs / 'pods' / 'app', cpu_stat=cpu_stat(150000, 20, 5, 40000),
+          io_stat="8:0 rbytes=4096 wbytes=8192 rios=1 wios=2 dbytes=0 dios=0\n")
+    stats = tracker.sample()
+    assert stats.throttled_percent == 25.0
+    assert stats.throttled_ms > 0
+    assert stats.cpu_percent > 0
+    assert stats.write_bps == pytest.approx(2 * stats.read_bps)
+
+
+def test_tracker_rejects_a_missing_cgroup(cgroupfs):
+    with pytest.raises(OSError):
+        CgroupTracker('/nope', root=str(cgroupfs))
+
+
+def test_tree_reads_children_round_robin(cgroupfs):
+    for i in range(5):
+        write(cgroupfs / 'pods' / f'job{i}', cpu_stat=cpu_stat(0, 0, 0, 0), memory_current=str(i))
+    tree = CgroupTree(str(cgroupfs), budget=4)
+
+    # app and job0..job4: four are read per call, the rest on the next one
+    assert len(tree.rank('/pods')) == 4
+    ranked = tree.rank('/pods', by='memory')
+    assert len(ranked) == 6
+    assert ranked[0].name == 'app'
+
+    tree.collapse('/pods')
+    assert not tree.usage and not tree.listings
@@ -0,0 +1,66 @@
+import time
+import threading
+
+from collector import MetricsCollector
+from sources import SyntheticSource
+
+
+class InterruptedSource(SyntheticSource):
+    # Runs interrupt once, in the middle of sampling a tick that was planned
+    # before it: like a window opening or coming back from the tray then
+    def __init__(self, interrupt):
+        super().__init__(interval=0.05)
+        self.interrupt = interrupt
+
+    def sample(self, metrics):
+        interrupt, self.interrupt = self.interrupt, None
+        if interrupt is not None:
+            interrupt()
+        return super().sample(metrics)
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.01)
+
+
+def disk_window(collector):
+    # A window reading CPU and disk, recording what each update saw
+    seen = []
+    lock = threading.Lock()
+
+    def update(snapshot):
+        with lock:
+            seen.append((snapshot.cpu_percent, snapshot.disk_usage))
+    return seen, lambda: collector.subscribe(update, metrics=('cpu', 'disk'))
+
+
+def test_late_subscriber_waits_for_all_of_its_groups():
+    collector = MetricsCollector(0.05)
+    seen, subscribe = disk_window(collector)
+    collector.source = InterruptedSource(subscribe)
+    collector.subscribe(lambda snapshot: None, metrics=('cpu',))
+    try:
+        wait_for(lambda: len(seen) >= 3)
+    finally:
+        for subscriber in list(collector.subscribers):
+            collector.unsubscribe(subscriber)
+    assert all(cpu is not None and disk is not None for cpu, disk in seen)
+
+
+def test_reactivated_subscriber_waits_for_all_of_its_groups():
+    collector = MetricsCollector(0.05)
+    seen, subscribe = disk_window(collector)
+    window = subscribe()
+    collector.set_active(window, False)
+    collector.source = InterruptedSource(lambda: collector.set_active(window, True))
+    collector.subscribe(lambda snapshot: None, metrics=('cpu',))
+    try:
+        wait_for(lambda: len(seen) >= 3)
+    finally:
+        for subscriber in list(collector.subscribers):
+            collector.unsubscribe(subscriber)
+    assert all(cpu is not None and disk is not None for cpu, disk in seen)
@@ -0,0 +1,66 @@
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from collector import Snapshot
+from exporter import CONTENT_TYPE, start_exporter
+
+
+class StubCollector:
+    # Only what the exporter reads: latest, overhead and subscribe()
+    overhead = None
+
+    def __init__(self, latest):
+        self.latest = latest
+
+    def subscribe(self, callback, metrics=()):
+        return 0
+
+
+def cpu_snapshot(timestamp, percent):
+    values = dict.fromkeys(Snapshot._fields)
+    values.update(timestamp=timestamp, sampled=frozenset(('cpu',)), cpu_percent=percent, per_core=(percent,))
+    return Snapshot(**values)
+
+
+@pytest.fixture
+def scrape():
+    # Serves a stub collector's snapshot and returns (status, content type, body)
+    servers = []
+
+    def scrape(latest, max_age=5.0):
+        server = start_exporter(StubCollector(latest), port=0, max_age=max_age)
+        servers.append(server)
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        try:
+            with urllib.request.urlopen(url, timeout=5) as response:
+                return response.status, response.headers['Content-Type'], response.read().decode()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers['Content-Type'], e.read().decode()
+    yield scrape
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_stale_snapshot_is_not_served(scrape):
+    status, content_type, body = scrape(cpu_snapshot(time.time() - 60, 42.0))
+    assert status == 503
+    assert content_type.startswith('text/plain')
+    assert 'system_cpu_usage_percent' not in body
+
+
+def test_missing_snapshot_is_not_served(scrape):
+    status, _, _ = scrape(None)
+    assert status == 503
+
+
+def test_fresh_snapshot_is_served(scrape):
+    status, content_type, body = scrape(cpu_snapshot(time.time() - 1, 42.0))
+    assert status == 200
+    assert content_type == CONTENT_TYPE
+    assert 'system_cpu_usage_percent 42.0' in body.splitlines()
+    assert 'system_cpu_core_usage_percent{core="0"} 42.0' in body.splitlines()
+    assert body.endswith('# EOF\n')
@@ -0,0 +1,90 @@
+import time
+import socket
+
+import pytest
+
+from fleet import (HEADER, SAMPLE, SAMPLE_PAYLOAD, FleetCollector, FleetSample, encode_hello, encode_sample,
+                   hottest)
+
+
+@pytest.fixture
+def fleet():
+    collector = FleetCollector('127.0.0.1', 0, notify_interval=0.05, max_hosts=2)
+    collector.start()
+    yield collector
+    collector.stop()
+
+
+def connect(fleet, name):
+    sock = socket.create_connection(fleet.address, timeout=5)
+    sock.sendall(encode_hello(name))
+    return sock
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.01)
+
+
+def test_sample_frame_layout():
+    sample = FleetSample(1.5, 10.0, 20.0, 30.0, float('nan'), 1000.0)
+    frame = encode_sample(sample)
+    assert len(frame) == 31
+    length, kind = HEADER.unpack_from(frame)
+    assert (length, kind) == (SAMPLE_PAYLOAD.size, SAMPLE)
+    assert hottest(sample) == ('disk', 30.0)
+
+
+def test_listens_on_localhost_by_default():
+    collector = FleetCollector(port=0)
+    try:
+        assert collector.address[0] == '127.0.0.1'
+    finally:
+        collector.stop()
+
+
+def test_samples_round_trip(fleet):
+    agents = [connect(fleet, name) for name in ('a', 'b')]
+    for i, sock in enumerate(agents):
+        # Split mid-frame: the collector has to reassemble it
+        frame = encode_sample(FleetSample(100.0 + i, 10.0 * i, 50.0, 25.0, float('nan'), 2048.0))
+        sock.sendall(frame[:5])
+        time.sleep(0.02)
+        sock.sendall(frame[5:])
+    wait_for(lambda: len(fleet.summaries()) == 2)
+
+    hosts = {host.name: host for host in fleet.summaries()}
+    assert hosts['b'].sample.cpu == 10.0
+    assert hosts['b'].sample.memory == 50.0
+    assert hosts['a'].cpu_history == (0.0,)
+    assert all(host.connected for host in hosts.values())
+
+    agents[0].close()
+    wait_for(lambda: not {h.name: h for h in fleet.summaries()}['a'].connected)
+    agents[1].close()
+
+
+def test_host_cap_replaces_offline_hosts(fleet):
+    first = connect(fleet, 'a')
+    first.sendall(encode_sample(FleetSample(1.0, 1.0, 1.0, 1.0, 1.0, 1.0)))
+    second = connect(fleet, 'b')
+    second.sendall(encode_sample(FleetSample(1.0, 1.0, 1.0, 1.0, 1.0, 1.0)))
+    wait_for(lambda: len(fleet.summaries()) == 2)
+
+    # Both hosts connected: a third is turned away
+    third = connect(fleet, 'c')
+    third.settimeout(5)
+    assert third.recv(1) == b''
+    third.close()
+
+    # Once one goes offline, a new host takes its place
+    first.close()
+    wait_for(lambda: not {h.name: h for h in fleet.summaries()}['a'].connected)
+    fourth = connect(fleet, 'd')
+    fourth.sendall(encode_sample(FleetSample(1.0, 1.0, 1.0, 1.0, 1.0, 1.0)))
+    wait_for(lambda: {h.name for h in fleet.summaries()} == {'b', 'd'})
+    second.close()
+    fourth.close()
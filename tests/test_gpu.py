@@ -0,0 +1,67 @@
+import sys
+import time
+import subprocess
+
+import pytest
+
+from gpu import GpuSample, NvidiaSmiStream, parse_line
+
+FAKE = [sys.executable, '-m', 'gpu', '--fake-gpus', '2']
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.02)
+
+
+def script(code):
+    # A stand-in nvidia-smi; the query arguments end up in sys.argv
+    return [sys.executable, '-c', code]
+
+
+def test_fake_nvidia_smi_lines_parse():
+    process = subprocess.Popen(FAKE + ['--loop-ms', '10'], stdout=subprocess.PIPE, text=True)
+    try:
+        samples = [parse_line(process.stdout.readline()) for _ in range(4)]
+    finally:
+        process.terminate()
+        process.wait()
+    assert [sample.index for sample in samples] == [0, 1, 0, 1]
+    assert samples[0].name == "Fake GPU 0"
+    assert samples[0].memory_total == 8192
+    assert all(0 <= sample.utilization <= 100 for sample in samples)
+
+
+def test_unsupported_fields_are_none():
+    sample = parse_line("0, Tesla T4, 12, 100, 15360, 40, [N/A]")
+    assert sample == GpuSample(0, "Tesla T4", 12.0, 100.0, 15360.0, 40.0, None)
+    assert parse_line("garbage") is None
+
+
+def test_stream_reads_the_fake():
+    stream = NvidiaSmiStream(FAKE, interval_ms=50)
+    stream.start()
+    try:
+        wait_for(lambda: len(stream.samples()) == 2)
+        assert stream.available
+    finally:
+        stream.stop()
+
+
+@pytest.mark.parametrize('code, interval_ms', [
+    # Stalls after one reading: dropped once older than 3 intervals
+    ('import time; print("0, G, 50, 1, 2, 3, 4", flush=True); time.sleep(60)', 100),
+    # Exits after one reading: dropped right away, however long the interval
+    ('print("0, G, 50, 1, 2, 3, 4", flush=True)', 60000),
+])
+def test_old_readings_are_dropped(code, interval_ms):
+    stream = NvidiaSmiStream(script(code), interval_ms=interval_ms, restart_delay=60)
+    stream.start()
+    try:
+        wait_for(lambda: stream.available)
+        wait_for(lambda: stream.samples() == ())
+    finally:
+        stream.stop()
@@ -0,0 +1,112 @@
+import os
+import sys
+import time
+import threading
+
+import pytest
+
+from collector import MetricsCollector, Sampler
+from render_scheduler import bind_close
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_NVIDIA_SMI = f'"{sys.executable}" "{os.path.join(ROOT, "gpu.py")}" --fake-gpus 2 --loop-ms 50'
+
+# Cycles of the windowed soak; SOAK_CYCLES=1000 for the full run
+SOAK_CYCLES = int(os.environ.get('SOAK_CYCLES', 100))
+
+
+class FakeWindow:
+    # The parts of a Toplevel bind_close uses
+    def __init__(self):
+        self.delete = None
+        self.destroy_handlers = []
+        self.destroyed = 0
+
+    def protocol(self, name, handler):
+        assert name == "WM_DELETE_WINDOW"
+        self.delete = handler
+
+    def bind(self, sequence, handler, add=None):
+        assert sequence == "<Destroy>" and add == "+"
+        self.destroy_handlers.append(handler)
+
+    def destroy(self):
+        # Tk sends <Destroy> for each child widget and for the window itself
+        self.destroyed += 1
+        for widget in (object(), self):
+            for handler in self.destroy_handlers:
+                handler(type('Event', (), {'widget': widget}))
+
+
+class FakeDashboard:
+    # Subscribes like a dashboard window and unsubscribes on close
+    def __init__(self, window, collector, metrics):
+        self.collector = collector
+        self.subscription = collector.subscribe(lambda snapshot: None, metrics=metrics)
+        self.closed = 0
+        bind_close(window, self.close)
+
+    def close(self):
+        self.closed += 1
+        self.collector.unsubscribe(self.subscription)
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.01)
+
+
+@pytest.mark.parametrize('how', ['wm_delete', 'destroy'])
+def test_bind_close_runs_once(how):
+    window = FakeWindow()
+    dashboard = FakeDashboard(window, MetricsCollector(source=Sampler()), ('cpu',))
+    if how == 'wm_delete':
+        window.delete()
+        assert window.destroyed == 1
+    else:
+        window.destroy()
+    window.destroy()
+    assert dashboard.closed == 1
+
+
+def test_open_close_cycles_leave_nothing_behind(monkeypatch):
+    # Dashboards of every kind opened and closed, the GPU ones starting and
+    # stopping nvidia-smi; nothing may stay subscribed or running
+    monkeypatch.setenv('NVIDIA_SMI', FAKE_NVIDIA_SMI)
+    collector = MetricsCollector(0.05)
+    kinds = [('cpu', 'processes'), ('memory',), ('disk',), ('gpu',), ('net', 'tcp'), ('cgroup',)]
+
+    def cycle():
+        windows = [FakeWindow() for _ in kinds]
+        dashboards = [FakeDashboard(window, collector, metrics) for window, metrics in zip(windows, kinds)]
+        time.sleep(0.1)
+        for i, window in enumerate(windows):
+            if i % 2:
+                window.delete()
+            else:
+                window.destroy()
+        assert all(dashboard.closed == 1 for dashboard in dashboards)
+
+    cycle()
+    wait_for(lambda: collector.source.gpu_stream is None)
+    threads = threading.active_count()
+    for _ in range(20):
+        cycle()
+    assert collector.subscribers == {}
+    assert collector.wanted_metrics() == set()
+    wait_for(lambda: collector.source.gpu_stream is None and collector.source.process_table is None)
+    wait_for(lambda: threading.active_count() <= threads)
+
+
+def test_windows_do_not_leak():
+    tk = pytest.importorskip('tkinter')
+    try:
+        tk.Tk().destroy()
+    except tk.TclError:
+        pytest.skip("needs a display")
+    from benchmarks import soak_windows
+    timeline, errors = soak_windows.soak(SOAK_CYCLES, dwell=0.02, warmup=10, checkpoints=5)
+    assert not errors, errors
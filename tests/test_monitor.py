@@ -0,0 +1,78 @@
+import os
+import csv
+
+import pytest
+
+from collector import Snapshot, snapshot_series
+from monitor import CsvWriter, RotatingOutput
+from sources import SyntheticSource
+
+
+def read_csv(path):
+    with open(path, newline='') as f:
+        return list(csv.reader(f))
+
+
+def test_csv_columns_come_from_the_first_row(tmp_path):
+    path = str(tmp_path / 'metrics.csv')
+    out = RotatingOutput(path)
+    writer = CsvWriter(out)
+    writer.write({'timestamp': 1.0, 'cpu.percent': 10.0})
+    writer.write({'timestamp': 2.0, 'cpu.percent': 20.0})
+    out.close()
+    assert read_csv(path) == [['timestamp', 'cpu.percent'], ['1.0', '10.0'], ['2.0', '20.0']]
+
+
+def test_csv_new_series_start_a_new_rotated_file(tmp_path):
+    # A NIC that only has rates from the second reading on must not be dropped
+    path = str(tmp_path / 'metrics.csv')
+    out = RotatingOutput(path, rotate_bytes=1 << 20, rotate_count=2)
+    writer = CsvWriter(out)
+    writer.write({'timestamp': 1.0, 'net.rx_bps': 0.0})
+    writer.write({'timestamp': 2.0, 'net.rx_bps': 5.0, 'net.eth0.rx_bps': 5.0})
+    writer.write({'timestamp': 3.0, 'net.rx_bps': 6.0})
+    out.close()
+    assert read_csv(path + '.1') == [['timestamp', 'net.rx_bps'], ['1.0', '0.0']]
+    assert read_csv(path) == [['timestamp', 'net.rx_bps', 'net.eth0.rx_bps'],
+                              ['2.0', '5.0', '5.0'], ['3.0', '6.0', '']]
+    assert not os.path.exists(path + '.2')
+
+
+def synthetic_rows(source, devices):
+    # Rows of a run on a made-up host where a NIC and a disk show up after
+    # the first devices readings
+    rows = []
+    for i in range(4):
+        snapshot = source.sample({'net', 'disk'})
+        if i < devices:
+            snapshot = snapshot._replace(nics=snapshot.nics[:1], disks=snapshot.disks[:1])
+        row = {'timestamp': float(i)}
+        row.update(snapshot_series(snapshot))
+        rows.append(row)
+    return rows
+
+
+@pytest.mark.parametrize('rotate_bytes, rotate_count', [(0, 5), (1 << 20, 0)])
+def test_csv_device_added_mid_run_keeps_every_row(tmp_path, rotate_bytes, rotate_count):
+    path = str(tmp_path / 'metrics.csv')
+    out = RotatingOutput(path, rotate_bytes, rotate_count)
+    writer = CsvWriter(out)
+    for row in synthetic_rows(SyntheticSource(disks=2, nics=2, interval=0), devices=2):
+        writer.write(row)
+    out.close()
+
+    assert os.listdir(tmp_path) == ['metrics.csv']
+    lines = read_csv(path)
+    headers = [i for i, line in enumerate(lines) if line[0] == 'timestamp']
+    assert headers == [0, 3]
+    assert [line[0] for line in lines] == ['timestamp', '0.0', '1.0', 'timestamp', '2.0', '3.0']
+    assert len(lines[3]) > len(lines[0])
+    assert 'net.eth1.rx_bps' in lines[3] and 'net.eth1.rx_bps' not in lines[0]
+    assert lines[3][:len(lines[0])] == lines[0]
+
+
+def test_empty_nic_totals_are_floats():
+    snapshot = Snapshot(**dict(dict.fromkeys(Snapshot._fields), nics=()))
+    series = dict(snapshot_series(snapshot))
+    assert isinstance(series['net.rx_bps'], float)
+    assert isinstance(series['net.tx_bps'], float)
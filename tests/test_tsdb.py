@@ -0,0 +1,141 @@
+import numpy as np
+import pytest
+
+from sources import SyntheticSource
+from tsdb import TimeSeriesStore
+
+# The start of an hour, so buckets line up with the loops below. A bucket
+# is finished when the one below it is, i.e. a second into the next one.
+T0 = 36000.0
+
+
+def row(value, columns=4):
+    values = np.full(columns, np.nan, dtype=np.float32)
+    values[0] = value
+    return values
+
+
+def minutes(store):
+    times, values = store.segments['1m'].query(0, 0, 1e12)
+    return list(times), list(values['mean'])
+
+
+def test_rollup_means_are_weighted_by_time(tmp_path):
+    store = TimeSeriesStore(str(tmp_path), max_series=4)
+    # 10 s at 1 Hz reading 10, then 10 s of a 10 Hz burst reading 100
+    for i in range(10):
+        store.append_row(T0 + i, row(10))
+    for i in range(100):
+        store.append_row(T0 + 10 + i * 0.1, row(100))
+    store.append_row(T0 + 60, row(0))
+    store.append_row(T0 + 61, row(0))
+
+    times, means = minutes(store)
+    assert times == [T0]
+    # By sample count this would be 91.8
+    assert means[0] == pytest.approx((10 * 10 + 100 * 10.9) / 20.9, rel=1e-4)
+
+
+def test_restart_carries_on_the_unfinished_bucket(tmp_path):
+    store = TimeSeriesStore(str(tmp_path), max_series=4)
+    for i in range(10):
+        store.append_row(T0 + i, row(10))
+    store.close()
+    # The unfinished minute is visible while the dashboard is down
+    assert minutes(store) == ([T0], [10.0])
+
+    store = TimeSeriesStore(str(tmp_path), max_series=4)
+    for i in range(10):
+        store.append_row(T0 + 30 + i, row(30))
+    store.append_row(T0 + 60, row(0))
+    store.append_row(T0 + 61, row(0))
+    store.close()
+
+    # One row for the minute, holding the readings from before and after
+    times, means = minutes(store)
+    assert times == [T0, T0 + 60]
+    assert means[0] == pytest.approx(20.0)
+
+    # The hour written as a preview is overwritten once it is finished
+    store = TimeSeriesStore(str(tmp_path), max_series=4)
+    store.append_row(T0 + 3600, row(0))
+    store.append_row(T0 + 3660, row(0))
+    store.append_row(T0 + 3661, row(0))
+    hours, values = store.segments['1h'].query(0, 0, 1e12)
+    assert list(hours) == [T0]
+    assert values['max'][0] == 30.0
+
+
+def test_queries_leave_the_unfinished_bucket_alone(tmp_path):
+    store = TimeSeriesStore(str(tmp_path), max_series=4)
+    for i in range(10):
+        store.append_row(T0 + i, row(10))
+    store.close()
+
+    # A query-only open, then one that never records, before the restart
+    reader = TimeSeriesStore(str(tmp_path), max_series=4, readonly=True)
+    tier, times, values = reader.query('missing', 0, 1e12)
+    assert len(times) == 0
+    assert minutes(reader) == ([T0], [10.0])
+    with pytest.raises(ValueError):
+        reader.append_row(T0 + 20, row(0))
+    reader.close()
+    TimeSeriesStore(str(tmp_path), max_series=4).close()
+    assert (tmp_path / 'rollups.npz').exists()
+
+    store = TimeSeriesStore(str(tmp_path), max_series=4)
+    for i in range(10):
+        store.append_row(T0 + 30 + i, row(30))
+    store.append_row(T0 + 60, row(0))
+    store.append_row(T0 + 61, row(0))
+    assert minutes(store)[1][0] == pytest.approx(20.0)
+
+
+def test_readonly_open_of_an_empty_directory(tmp_path):
+    reader = TimeSeriesStore(str(tmp_path / 'none'), readonly=True)
+    tier, times, values = reader.query('cpu.percent', 0, 1e12)
+    assert len(times) == 0
+    assert not (tmp_path / 'none').exists()
+
+
+def test_seconds_keep_every_burst_sample(tmp_path):
+    store = TimeSeriesStore(str(tmp_path), max_series=4)
+    # One second of a 10 Hz burst, then the next second starts
+    for i, value in enumerate([50, 90, 95, 60, 99, 70, 80, 91, 92, 93]):
+        store.append_row(T0 + i * 0.1, row(value))
+    store.append_row(T0 + 1, row(0))
+
+    times, values = store.segments['1s'].query(0, 0, 1e12)
+    assert list(times) == [T0]
+    assert values['min'][0] == 50
+    assert values['max'][0] == 99
+    # The first sample of a run counts for a full second
+    assert values['mean'][0] == pytest.approx((50 * 1 + 0.1 * (90 + 95 + 60 + 99 + 70 + 80 + 91 + 92 + 93)) / 1.9)
+
+
+def test_only_recorded_groups_get_columns(tmp_path):
+    store = TimeSeriesStore(str(tmp_path), max_series=64)
+    source = SyntheticSource(cores=4, disks=1, nics=3, interval=0)
+    snapshot = source.sample({'cpu', 'memory', 'disk', 'net'})
+    store.append(snapshot)
+    assert 'cpu.core.3' in store.series_names()
+    assert not [name for name in store.series_names() if name.startswith('net.')]
+
+
+def test_columns_of_series_gone_for_good_are_recycled(tmp_path):
+    store = TimeSeriesStore(str(tmp_path), max_series=2, retention={'1s': 60})
+    for i in range(3):
+        store.append_row(T0 + i, np.array([store.column_for('a', T0 + i), store.column_for('b', T0 + i)],
+                                          dtype=np.float32) + 1)
+    # Full, and b is still within the 1s tier
+    assert store.column_for('c', T0 + 10) is None
+    for i in range(10, 100):
+        store.column_for('a', T0 + i)
+        store.append_row(T0 + i, np.array([1, np.nan], dtype=np.float32))
+
+    assert store.column_for('c', T0 + 100) == 1
+    assert sorted(store.series_names()) == ['a', 'c']
+    times, values = store.segments['1s'].query(1, 0, 1e12)
+    assert np.isnan(values['mean']).all()
+    store.close()
+    assert TimeSeriesStore(str(tmp_path), readonly=True).columns == {'a': 0, 'c': 1}
@@ -0,0 +1,68 @@
+from history import lttb
+from instrument import instrumented
+
+
+class TrendChart:
+    def __init__(self, ax, history, series, title, fg_color, accent_color, ylim=(0, 100)):
+        # ylim=None scales the y axis to the data, for unbounded series
+        # such as throughput
+        self.ax = ax
+        self.canvas = ax.figure.canvas
+        self.history = history
+        self.series = series
+        self.autoscale = ylim is None
+        self.background = None
+
+        # Static artists: axes, grid and labels stay in the blit background.
+        # The x axis shows seconds before now so it never has to move.
+        self.ax.set_title(title, color=accent_color)
+        self.ax.set_xlim(-history.window, 0)
+        self.ax.set_ylim(*(ylim or (0, 1)))
+        self.ax.set_xlabel('Seconds ago', color=fg_color)
+        self.ax.set_facecolor('#2D2D2D')
+        self.ax.grid(True, color='#3D3D3D')
+        self.ax.tick_params(colors=fg_color, labelsize=8)
+
+        self.line, = self.ax.plot([], [], color=accent_color, linewidth=1, animated=True)
+        self.draw_cid = self.canvas.mpl_connect('draw_event', self.on_draw)
+
+    def on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.line)
+
+    @instrumented('trend.update')
+    def update(self):
+        times, values = self.history.series(self.series)
+        if len(times) == 0:
+            return
+
+        # Never draw more points than there are pixels across the plot
+        times, values = lttb(times, values, max(int(self.ax.bbox.width), 3))
+        self.line.set_data(times - times[-1], values)
+
+        if self.autoscale and self.rescale(values.max()):
+            # New ticks are part of the background, so this frame is a full
+            # redraw; draw_event captures the new background afterwards
+            self.canvas.draw_idle()
+            return
+
+        if self.background is None:
+            return
+        self.canvas.restore_region(self.background)
+        self.ax.draw_artist(self.line)
+        self.canvas.blit(self.ax.bbox)
+
+    def rescale(self, peak):
+        # Grow as soon as the data no longer fits, shrink only once it uses
+        # less than a quarter of the axis, so the ticks do not flicker
+        top = self.ax.get_ylim()[1]
+        if top >= peak > top / 4:
+            return False
+        new_top = max(peak * 1.25, 1)
+        if new_top == top:
+            return False
+        self.ax.set_ylim(0, new_top)
+        return True
+
+    def disconnect(self):
+        self.canvas.mpl_disconnect(self.draw_cid)
@@ -0,0 +1,458 @@
+import json
+import os
+import sys
+import time
+import threading
+import numpy as np
+import psutil
+from collector import get_collector, snapshot_series
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.system_dashboard', 'tsdb')
+
+# Tier name -> resolution in seconds, finest first
+TIERS = (('1s', 1), ('1m', 60), ('1h', 3600))
+
+# Tier name -> retention in seconds
+DEFAULT_RETENTION = {
+    '1s': 6 * 3600,
+    '1m': 8 * 24 * 3600,
+    '1h': 400 * 24 * 3600,
+}
+
+# Metric groups the store keeps sampling even when no window is open
+RECORDED_METRICS = ('cpu', 'memory', 'disk')
+
+# Columns a new store gets beyond its host's series, for disks and mounts
+# that come and go; a full store recycles the columns of series gone for
+# longer than the 1s tier's retention
+SPARE_SERIES = 64
+SERIES_STEP = 256
+
+# Seconds one sample counts for at most in a rollup mean: samples are
+# weighted by the time since the previous one, so 10 Hz bursts do not
+# outweigh the 1 Hz stretches around them, and a gap is not filled in
+# with the reading that ended it
+MAX_SAMPLE_WEIGHT = 5.0
+
+MAGIC = int.from_bytes(b'SPDTSDB1', 'little')
+VERSION = 1
+HEADER_SLOTS = 8
+HEADER_BYTES = HEADER_SLOTS * 8
+
+# Header slot indexes
+H_MAGIC, H_VERSION, H_CAPACITY, H_COLUMNS, H_HEAD, H_COUNT, H_RESOLUTION = range(7)
+
+
+class Segment:
+    # One tier on disk: a header, a float64 time column, and one float32
+    # block per field laid out column-major so a series is contiguous in time
+    def __init__(self, path, resolution, capacity, n_columns, fields, readonly=False):
+        # readonly maps the file without writing to it; a missing file, or
+        # one with a different layout, then reads as an empty tier
+        self.path = path
+        self.capacity = capacity
+        self.fields = fields
+
+        size = HEADER_BYTES + capacity * 8 + len(fields) * n_columns * capacity * 4
+        if readonly:
+            if os.path.exists(path) and self.header_matches(path, resolution, capacity, n_columns, size):
+                self.map(path, capacity, n_columns, 'r')
+            else:
+                self.header = np.zeros(HEADER_SLOTS, dtype=np.int64)
+                self.times = np.empty(0)
+                self.columns = {field: np.empty((n_columns, 0), dtype=np.float32) for field in fields}
+            return
+
+        if os.path.exists(path) and not self.header_matches(path, resolution, capacity, n_columns, size):
+            # Keep data written with a different layout instead of misreading it
+            os.replace(path, path + '.old')
+
+        created = not os.path.exists(path)
+        if created:
+            with open(path, 'wb') as f:
+                f.truncate(size)
+        self.map(path, capacity, n_columns, 'r+')
+
+        if created:
+            # Rows are only read back once written, so the file can stay sparse
+            self.header[:] = [MAGIC, VERSION, capacity, n_columns, 0, 0, resolution, 0]
+            self.header.flush()
+
+    def map(self, path, capacity, n_columns, mode):
+        self.header = np.memmap(path, dtype=np.int64, mode=mode, offset=0, shape=(HEADER_SLOTS,))
+        self.times = np.memmap(path, dtype=np.float64, mode=mode, offset=HEADER_BYTES, shape=(capacity,))
+        self.columns = {}
+        offset = HEADER_BYTES + capacity * 8
+        for field in self.fields:
+            self.columns[field] = np.memmap(path, dtype=np.float32, mode=mode, offset=offset,
+                                            shape=(n_columns, capacity))
+            offset += n_columns * capacity * 4
+
+    @staticmethod
+    def header_matches(path, resolution, capacity, n_columns, size):
+        if os.path.getsize(path) != size:
+            return False
+        header = np.fromfile(path, dtype=np.int64, count=HEADER_SLOTS)
+        return (len(header) == HEADER_SLOTS
+                and header[H_MAGIC] == MAGIC
+                and header[H_VERSION] == VERSION
+                and header[H_CAPACITY] == capacity
+                and header[H_COLUMNS] == n_columns
+                and header[H_RESOLUTION] == resolution)
+
+    @property
+    def count(self):
+        return int(self.header[H_COUNT])
+
+    def first_time(self):
+        if self.count == 0:
+            return None
+        oldest = int(self.header[H_HEAD]) if self.count == self.capacity else 0
+        return float(self.times[oldest])
+
+    def last_time(self):
+        if self.count == 0:
+            return None
+        return float(self.times[(int(self.header[H_HEAD]) - 1) % self.capacity])
+
+    def put(self, timestamp, values):
+        # Appends a row, or overwrites the newest one when it has the same
+        # timestamp: a rollup bucket written unfinished at shutdown
+        if self.last_time() == timestamp:
+            head = (int(self.header[H_HEAD]) - 1) % self.capacity
+            for field, block in self.columns.items():
+                block[:, head] = values[field]
+        else:
+            self.append(timestamp, values)
+
+    def append(self, timestamp, values):
+        # values: field -> float32 array with one entry per column
+        head = int(self.header[H_HEAD])
+        self.times[head] = timestamp
+        for field, block in self.columns.items():
+            block[:, head] = values[field]
+        self.header[H_HEAD] = (head + 1) % self.capacity
+        self.header[H_COUNT] = min(self.count + 1, self.capacity)
+
+    def query(self, column, start, end):
+        # Binary search the mapped time column; only the matching slices of
+        # the series are read from disk
+        count = self.count
+        head = int(self.header[H_HEAD])
+        if count < self.capacity:
+            ranges = [(0, count)]
+        else:
+            ranges = [(head, self.capacity), (0, head)]
+
+        times = []
+        values = {field: [] for field in self.columns}
+        for lo, hi in ranges:
+            segment_times = self.times[lo:hi]
+            i = lo + int(np.searchsorted(segment_times, start, side='left'))
+            j = lo + int(np.searchsorted(segment_times, end, side='right'))
+            if i < j:
+                times.append(np.array(self.times[i:j]))
+                for field, block in self.columns.items():
+                    values[field].append(np.array(block[column, i:j]))
+
+        if not times:
+            empty = np.empty(0, dtype=np.float32)
+            return np.empty(0), {field: empty for field in self.columns}
+        return np.concatenate(times), {field: np.concatenate(parts) for field, parts in values.items()}
+
+    def flush(self):
+        self.header.flush()
+        self.times.flush()
+        for block in self.columns.values():
+            block.flush()
+
+
+# Parts of Rollup.state(), as saved in rollups.npz
+ROLLUP_STATE = ('bucket', 'minimum', 'maximum', 'total', 'weight')
+
+
+class Rollup:
+    # Accumulates min/max/mean for the bucket currently being filled
+    def __init__(self, resolution, n_columns):
+        self.resolution = resolution
+        self.bucket = None
+        self.minimum = np.full(n_columns, np.nan, dtype=np.float32)
+        self.maximum = np.full(n_columns, np.nan, dtype=np.float32)
+        self.total = np.zeros(n_columns, dtype=np.float64)
+        self.weight = np.zeros(n_columns, dtype=np.float64)
+
+    def add(self, timestamp, mean, minimum, maximum, weight):
+        # Returns the finished bucket when timestamp starts a new one
+        bucket = timestamp // self.resolution * self.resolution
+        finished = None
+        if self.bucket is not None and bucket != self.bucket:
+            finished = self.take()
+        self.bucket = bucket
+
+        present = weight > 0
+        self.minimum = np.where(present, np.fmin(self.minimum, minimum), self.minimum)
+        self.maximum = np.where(present, np.fmax(self.maximum, maximum), self.maximum)
+        self.total += np.where(present, mean * weight, 0)
+        self.weight += weight
+        return finished
+
+    def state(self):
+        # (bucket, minimum, maximum, total, weight), see restore
+        return self.bucket, self.minimum.copy(), self.maximum.copy(), self.total.copy(), self.weight.copy()
+
+    def restore(self, state):
+        bucket, self.minimum, self.maximum, self.total, self.weight = state
+        self.bucket = None if bucket is None or np.isnan(bucket) else float(bucket)
+
+    def starts_new(self, timestamp):
+        # Whether a reading at timestamp finishes the bucket being filled
+        return self.bucket is not None and timestamp // self.resolution * self.resolution != self.bucket
+
+    def preview(self, carry=None):
+        # The unfinished bucket with carry, a lower tier's unfinished
+        # bucket, folded in; the rollup itself is left as it is
+        preview = Rollup(self.resolution, len(self.total))
+        preview.restore(self.state())
+        if carry is not None:
+            preview.add(*carry)
+        return preview.take()
+
+    def take(self):
+        if self.bucket is None:
+            return None
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = (self.total / self.weight).astype(np.float32)
+        finished = (self.bucket, mean, self.minimum, self.maximum, self.weight)
+        self.bucket = None
+        self.minimum = np.full_like(self.minimum, np.nan)
+        self.maximum = np.full_like(self.maximum, np.nan)
+        self.total = np.zeros_like(self.total)
+        self.weight = np.zeros_like(self.weight)
+        return finished
+
+
+def host_series():
+    # Columns for this host's CPU, memory and disk series plus spares, in
+    # steps of SERIES_STEP
+    disks = psutil.disk_io_counters(perdisk=True) or {}
+    needed = 8 + (psutil.cpu_count() or 1) + 6 * len(disks) + len(psutil.disk_partitions()) + SPARE_SERIES
+    return -(-needed // SERIES_STEP) * SERIES_STEP
+
+
+def stored_series(path):
+    # Columns of an existing store, read from its 1s tier header
+    tier = os.path.join(path, f'{TIERS[0][0]}.dat')
+    if os.path.exists(tier):
+        header = np.fromfile(tier, dtype=np.int64, count=HEADER_SLOTS)
+        if len(header) == HEADER_SLOTS and header[H_MAGIC] == MAGIC:
+            return int(header[H_COLUMNS])
+    return None
+
+
+class TimeSeriesStore:
+    def __init__(self, path=DEFAULT_PATH, retention=None, max_series=None, readonly=False,
+                 metrics=RECORDED_METRICS):
+        # readonly opens the store for queries only, e.g. next to a running
+        # dashboard: nothing is written, and the recording store's state is
+        # left alone. max_series defaults to the existing store's columns,
+        # or host_series() for a new one. Only series of metrics are kept.
+        self.path = path
+        self.retention = dict(DEFAULT_RETENTION, **(retention or {}))
+        max_series = self.max_series = max_series or stored_series(path) or host_series()
+        self.metrics = metrics
+        self.readonly = readonly
+        self.lock = threading.Lock()
+        if not readonly:
+            os.makedirs(path, exist_ok=True)
+
+        # Series name -> column, and when each column last had a reading;
+        # a store missing last_seen counts its series as just seen
+        self.series_path = os.path.join(path, 'series.json')
+        self.columns = {}
+        self.last_seen = np.full(max_series, -np.inf)
+        self.full_reported = False
+        if os.path.exists(self.series_path):
+            with open(self.series_path) as f:
+                saved = json.load(f)
+            names = saved['columns'][:max_series]
+            self.columns = {name: i for i, name in enumerate(names) if name is not None}
+            self.last_seen[:len(names)] = saved.get('last_seen', [time.time()] * len(names))[:len(names)]
+
+        self.segments = {}
+        self.rollups = {}
+        self.last_timestamp = None
+        for name, resolution in TIERS:
+            capacity = max(int(self.retention[name] // resolution), 1)
+            self.segments[name] = Segment(os.path.join(path, f'{name}.dat'),
+                                          resolution, capacity, max_series, ('mean', 'min', 'max'), readonly)
+            self.rollups[name] = Rollup(resolution, max_series)
+
+        # Buckets left unfinished by close() carry on filling after a
+        # restart; their rows were written as previews and get overwritten.
+        # Restored on the first append, so a store that only answers
+        # queries never takes them over.
+        self.rollups_path = os.path.join(path, 'rollups.npz')
+        self.restored = False
+
+    def restore_rollups(self):
+        self.restored = True
+        if not os.path.exists(self.rollups_path):
+            return
+        try:
+            with np.load(self.rollups_path) as saved:
+                states = {name: tuple(saved[f'{name}.{part}'] for part in ROLLUP_STATE) for name in self.rollups}
+        except (OSError, ValueError, KeyError):
+            # Unreadable: those buckets start over
+            states = {}
+        for name, state in states.items():
+            if state[-1].shape == (self.max_series,):
+                self.rollups[name].restore(state)
+        os.remove(self.rollups_path)
+
+    def size_bytes(self):
+        # Fixed disk budget: segments are allocated once at full size
+        return sum(os.path.getsize(segment.path) for segment in self.segments.values())
+
+    def save_series(self):
+        names = [None] * self.max_series
+        for name, column in self.columns.items():
+            names[column] = name
+        while names and names[-1] is None:
+            names.pop()
+        tmp_path = self.series_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'columns': names, 'last_seen': self.last_seen[:len(names)].tolist()}, f)
+        os.replace(tmp_path, self.series_path)
+
+    def column_for(self, name, timestamp):
+        # A new series takes a free column, else the one unseen the longest
+        # once it is older than everything the 1s tier holds; its rows in
+        # the longer tiers are cleared first
+        column = self.columns.get(name)
+        if column is None:
+            column = int(np.argmin(self.last_seen))
+            if self.last_seen[column] > timestamp - self.retention[TIERS[0][0]]:
+                if not self.full_reported:
+                    self.full_reported = True
+                    print(f"Metric history full ({self.max_series} series), not recording {name}",
+                          file=sys.stderr)
+                return None
+            if self.last_seen[column] != -np.inf:
+                self.clear_column(column)
+            self.columns[name] = column
+            self.last_seen[column] = timestamp
+            self.save_series()
+        self.last_seen[column] = timestamp
+        return column
+
+    def clear_column(self, column):
+        for name in [name for name, i in self.columns.items() if i == column]:
+            del self.columns[name]
+        for segment in self.segments.values():
+            for block in segment.columns.values():
+                block[column] = np.nan
+        for rollup in self.rollups.values():
+            rollup.minimum[column] = rollup.maximum[column] = np.nan
+            rollup.total[column] = rollup.weight[column] = 0
+
+    def append(self, snapshot):
+        row = np.full(self.max_series, np.nan, dtype=np.float32)
+        with self.lock:
+            for name, value in snapshot_series(snapshot, self.metrics):
+                column = self.column_for(name, snapshot.timestamp)
+                if column is not None:
+                    row[column] = value
+            self.append_row(snapshot.timestamp, row)
+
+    def append_row(self, timestamp, row):
+        if self.readonly:
+            raise ValueError(f"{self.path} is open read-only")
+        if not self.restored:
+            self.restore_rollups()
+
+        # Cascade finished buckets up through the tiers, the 1s one
+        # included, so every sample of a 10 Hz burst counts; a sample
+        # weighs the seconds since the previous one
+        elapsed = 1.0 if self.last_timestamp is None else timestamp - self.last_timestamp
+        self.last_timestamp = timestamp
+        weight = (~np.isnan(row)) * min(max(elapsed, 0.0), MAX_SAMPLE_WEIGHT)
+        finished = (timestamp, row, row, row, weight)
+        for name, _ in TIERS:
+            finished = self.rollups[name].add(*finished)
+            if finished is None:
+                break
+            self.write_bucket(name, finished)
+
+    def write_bucket(self, name, bucket):
+        timestamp, mean, minimum, maximum, _ = bucket
+        self.segments[name].put(timestamp, {'mean': mean, 'min': minimum, 'max': maximum})
+        self.segments[name].flush()
+
+    def pick_tier(self, start):
+        # Finest tier whose retention still reaches back to start
+        for name, _ in TIERS:
+            oldest = self.segments[name].first_time()
+            if oldest is not None and oldest <= start:
+                return name
+        # Nothing reaches that far back; use the longest tier holding data
+        for name, _ in reversed(TIERS):
+            if self.segments[name].count:
+                return name
+        return TIERS[0][0]
+
+    def query(self, series, start, end, tier=None):
+        # Returns (tier, times, {'mean', 'min', 'max'}) for start <= t <= end
+        with self.lock:
+            column = self.columns.get(series)
+            tier = tier or self.pick_tier(start)
+            if column is None:
+                empty = np.empty(0, dtype=np.float32)
+                return tier, np.empty(0), {'mean': empty, 'min': empty, 'max': empty}
+
+            times, values = self.segments[tier].query(column, start, end)
+            return tier, times, values
+
+    def series_names(self):
+        with self.lock:
+            return list(self.columns)
+
+    def close(self):
+        # Unfinished buckets are written as previews, so queries see them
+        # while the dashboard is down, and saved to carry on after a restart.
+        # A store that recorded nothing leaves the saved buckets as they are.
+        if self.readonly or not self.restored:
+            return
+        with self.lock:
+            saved = {}
+            carry = None
+            for name, _ in TIERS:
+                rollup = self.rollups[name]
+                if carry is not None and rollup.starts_new(carry[0]):
+                    # The lower tier has moved on to a new bucket of this
+                    # tier, so this one can get no more readings
+                    self.write_bucket(name, rollup.take())
+                for part, value in zip(ROLLUP_STATE, rollup.state()):
+                    saved[f'{name}.{part}'] = np.nan if value is None else value
+                carry = rollup.preview(carry)
+                if carry is not None:
+                    self.write_bucket(name, carry)
+            with open(self.rollups_path + '.tmp', 'wb') as f:
+                np.savez(f, **saved)
+            os.replace(self.rollups_path + '.tmp', self.rollups_path)
+            for segment in self.segments.values():
+                segment.flush()
+            self.save_series()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store(path=DEFAULT_PATH, metrics=RECORDED_METRICS):
+    # Shared store fed by the collector; arguments only apply on first call
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TimeSeriesStore(path, metrics=metrics)
+            get_collector().subscribe(_store.append, metrics=metrics)
+        return _store